@@ -1,6 +1,32 @@
+import argparse
+import glob
+import multiprocessing
 import os
+import re
 import sys
-import re 
+import tempfile
+from itertools import islice
+
+# One pass over the document finds every piece of text and tag: group 1 is text, group 2 the
+# slash of an end tag and group 3 the tag name, comments and declarations match no group, and
+# group 4 is a '<' that may start a tag whose end has not been read yet
+TOKENS = re.compile(r'([^<]+|<(?![a-zA-Z/!?]|\Z))'
+                    r'|<(/?)([a-zA-Z][^\s/>]*)(?:"[^"]*"|\'[^\']*\'|[^\'">])*>'
+                    r'|<!--.*?-->|<[!?][^>]*>'
+                    r'|(<)', re.DOTALL)
+
+# A tag, comment or declaration that reaches the end of the text read so far without ending
+UNFINISHED = re.compile(r'<(?:/?(?:[a-zA-Z](?:"[^"]*"|\'[^\']*\'|[^\'">])*(?:"[^"]*|\'[^\']*)?)?|!--(?:(?!-->).)*|[!?][^>]*)\Z', re.DOTALL)
+
+# Number of characters an unfinished tag may hold before its '<' is taken as text, so an unbalanced quote
+# does not keep the rest of the document waiting
+PENDING_LIMIT = 1024 * 1024
+
+# Runs of spaces inside a cell, replaced by one space
+SPACES = re.compile(r' +')
+
+# Names of the start tags removed from the text of a cell, other markup inside a cell is kept as written
+REMOVED = re.compile(r't\w')
 
 def main():
 
@@ -9,168 +35,676 @@ def main():
         converts the data from HTML format to CSV format.
 
         The input file is taken from the system standard input and the output
-        is printed to the system standard output.
+        is printed to the system standard output once the whole input is converted.
+        The input is read a block of lines at a time, so only the table being converted
+        is held in memory, or with --stream only the row being converted, which is
+        printed at once. A table larger than --spill-size is kept in a temporary file
+        until it closes.
+
+        When files, directories or glob patterns are passed, each HTML file is
+        converted to its own CSV file instead, see batch_convert.
 
     """
 
-    # Variables
-    table_list = [] # List for holding the sparated table lists
-    raw_string = '' # String for holding all the data in one string
-    raw_data = [] # List for holding the initial data
-    built_output = [] # List for building the output data
-    output_title = [] # List for holding each table title for output
-    table_counter = 0 # Integer for adding to table title
-    total_br = 0 # Integer for tracking the number of <br /> tags
-    printed_titles = 0 # Integer for printing the titles 
-    add_break = 0 # Integer for adding the newline
+    # Initializing a parsing object for command line input
+    argument_parser = argparse.ArgumentParser(description='Converts the tables of an HTML file read from standard input to CSV, or of each HTML file passed to its own CSV file')
+
+    # Adding arguments to parser object
+    argument_parser.add_argument('inputs', nargs='*') # Optional HTML files, directories or glob patterns to convert in batch mode
+    argument_parser.add_argument('--stream', action='store_true') # Optional argument for printing each row as soon as it closes, padded to the widest row seen so far in its table
+    argument_parser.add_argument('--spill-size', type=int, default=64 * 1024 * 1024) # Optional argument for the number of characters of a table kept in memory before its rows are moved to a temporary file
+    argument_parser.add_argument('--output-dir', nargs='?') # Optional argument for the directory the CSV files of batch mode are written to, next to each input file if not passed
+    argument_parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1) # Optional argument for the number of processes converting files in batch mode
+    argument_parser.add_argument('--unordered', action='store_true') # Optional argument for reporting the files of batch mode as they finish instead of in the order passed
+
+    # Parse the arguments
+    arguments = argument_parser.parse_args()
+
+    # Checking if files were passed for batch mode
+    if arguments.inputs:
+
+        exit(batch_convert(arguments))
+
+    try:
+
+        convert(sys.stdin, sys.stdout, arguments.stream, arguments.spill_size)
+
+    except ValueError as error:
+
+        # Print on standard error
+        print('Error: ' + str(error), file=sys.stderr)
+
+        exit(6)
+
+
+def convert(input_file, output_file, stream = False, spill_size = 64 * 1024 * 1024):
+    """
+        Converts the tables of an HTML document to CSV, reading it a block of lines at a time.
+
+        Parameters
+        ----------
+        input_file : file
+            The HTML document
+
+        output_file : file
+            The file the CSV lines are written to
+
+        stream : boolean, optional
+            Print each row as soon as it closes (default is False)
+
+        spill_size : int, optional
+            The number of characters of a table kept in memory, see TableParser (default is 64 MiB)
+
+        Exceptions
+        ----------
+        ValueError
+            If a cell holds a comma.
+
+    """
 
-    input_data = sys.stdin.readlines()
+    parser = TableParser(output_file, stream, spill_size)
 
-    # Concatenate all the data into one string
-    for line in input_data:
+    lines = input_file.readlines(65536)
 
-        raw_string = raw_string + line.strip()
-    
-    raw_data.append(raw_string)
-    
-    # Separating the raw data by the table tags
-    for i in range(len(raw_data)):
+    while lines:
 
-        raw_element = raw_data[i]
-        
-        # Checking if <br /> tag is present
-        br_matches = re.findall(r'<br.*?>',raw_element, re.IGNORECASE)
-        if br_matches:
-            total_br += len(br_matches)
+        # Lines are joined without the whitespace around them
+        parser.feed(''.join([x.strip() for x in lines]))
 
-        raw_element = re.sub(r'</table.*?>', 'END_TABLE_VARIABLE_cookie', raw_element, re.IGNORECASE)
+        lines = input_file.readlines(65536)
 
-        raw_element = re.sub(r'<table.*?>', '', raw_element)
+    parser.close()
 
-        raw_element = re.sub(r'<br.*?>', '', raw_element)
 
-        split_tables = filter(None, raw_element.split(r'END_TABLE_VARIABLE_cookie'))
+def batch_convert(arguments):
+    """
+        Converts each HTML file passed to a CSV file of the same name in a pool of
+        arguments.jobs processes, and returns the exit status, 6 if any file failed.
+
+        A directory passed stands for the .htm and .html files in it, and glob patterns are
+        expanded. A directory or pattern without any file, and a file whose CSV file would
+        also be written for a file passed before it, are reported as errors before any file
+        is converted. One line is printed per file as soon as its result is known, in the
+        order the files were passed or with --unordered in the order they finish: the name
+        of the CSV file written on standard output, or the error on standard error. A file
+        that fails leaves no CSV file behind and does not stop the other files.
+
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments
+
+    """
+
+    # Variables
+    input_files = [] # List of the HTML files to convert
+    outputs = {} # Dictionary mapping the path of each CSV file to the HTML file it is written for
+    tasks = [] # List of [input file, output file, stream, spill size] for each file
+    status = 0 # Integer for the exit status
+
+    for name in arguments.inputs:
+
+        if os.path.isdir(name):
 
-    
-    # Create a 2D list of each table tag    
-    for element in split_tables:
+            found = sorted(glob.glob(os.path.join(name, '*.htm')) + glob.glob(os.path.join(name, '*.html')))
 
-        table_list.append([element])
-    
+        elif glob.has_magic(name):
 
-    # Building the output data list
-    for table in table_list:
+            found = sorted(glob.glob(name))
 
-        # Variables to reset for each table
-        table_counter += 1 # Integer for the current table
-        table_title = 'TABLE ' + str(table_counter) + ':' # String for each table title
-        row_data = [] # List containing every row of the table
-        extracted_data = [] # List for data extracted from each row
-        total_cells = 0 # Integer for the maximum cell number of each table
+        else:
 
-        output_title.append(table_title)
+            found = [name]
 
-        # Grabbing the table data string
-        table_data = table[0]
-        
-        # Separating the row from the table string
-        row = re.findall(r'<tr.*?>.*?</tr.*?>', table_data, re.IGNORECASE | re.DOTALL)
+        if not found:
 
-        row_data.extend(row)
+            # Print on standard error
+            print('Error: ' + name + ': no HTML files found', file=sys.stderr, flush=True)
 
-        # Separating the data from <th> and <td> tags, and getting the number of cells of each row
-        for row_element in range(len(row_data)):
-            
-            # Finding the number of cells for each row has
-            matches = re.findall(r'<t[d|h].*?>.*?</t[d|h]>*?>', row_data[row_element], re.IGNORECASE)
+            status = 6
 
-            # Replacing all whitespace that is greater than one with one whitespace
-            strip_data = re.sub(r' +', ' ', row_data[row_element])
+        input_files.extend(found)
 
-            # Replacing all opening <t> tags with nothing
-            strip_data = re.sub(r'<t[\w].*?>', '', strip_data)
+        # End of for name in arguments.inputs:
 
-            # Finding everyting located before a closing </td> or </tr> tag
-            strip_data = re.findall(r'(.*?)\</t[d|h].*?>', strip_data, re.IGNORECASE)
+    for input_file in input_files:
 
-            extracted_data.extend([strip_data])
+        output_dir = arguments.output_dir if arguments.output_dir is not None else os.path.dirname(input_file)
+        output_file = os.path.join(output_dir, os.path.splitext(os.path.basename(input_file))[0] + '.csv')
 
-            # Getting the largest number of cells of each row has per table
-            if len(matches) > total_cells:
+        path = os.path.abspath(output_file)
 
-                total_cells = len(matches)
+        # Checking if another file is converted to the same CSV file, a file passed twice is converted once
+        if path in outputs:
 
-        # Stripping white spaces and adding comma's for CSV representation
-        for element in extracted_data:
+            if os.path.abspath(outputs[path]) != os.path.abspath(input_file):
 
-            for ele in range(len(element)):
-                
-                if ',' in element[ele]:
-                    print('Error: Invalid input, comma can not be placed between matching <td></td> or matching <th></th> tags', file=sys.stderr)
-                    exit(6)
+                # Print on standard error
+                print('Error: ' + input_file + ': ' + output_file + ' is also written for ' + outputs[path], file=sys.stderr, flush=True)
 
-                element[ele] = element[ele].strip()
+                status = 6
 
-                if ele < len(element) - 1:
+            continue
 
-                    element[ele] = element[ele] + ','
+        outputs[path] = input_file
 
-        # Ensuring every table contains atleast one row and column
-        if total_cells == 0:
+        tasks.append([input_file, output_file, arguments.stream, arguments.spill_size])
 
-            total_cells = 1
+    with multiprocessing.Pool(max(1, min(arguments.jobs, len(tasks) or 1))) as pool:
 
-        # Filling the smaller rows with comma's to match the desired column length
-        for row_ele in extracted_data:
-            
-            row_size = len(row_ele)
-            
-            if row_size == 0:
+        results = pool.imap_unordered(convert_file, tasks) if arguments.unordered else pool.imap(convert_file, tasks)
 
-                while row_size < total_cells - 1:
+        for input_file, output_file, error in results:
 
-                    row_size += 1
+            if error is None:
 
-                    row_ele.extend(',')
+                print(output_file, flush=True)
 
             else:
 
-                while row_size < total_cells:
+                # Print on standard error
+                print('Error: ' + input_file + ': ' + error, file=sys.stderr, flush=True)
+
+                status = 6
+
+    return status
+
+
+def convert_file(task):
+    """
+        Converts one HTML file to a CSV file, used by the processes of batch_convert.
+
+        The CSV is written to a temporary file of its own in the output directory and renamed
+        once the whole file is converted. Returns [input file, output file, error], where
+        error is None if the file was converted.
+
+        Parameters
+        ----------
+        task : list
+            [input file, output file, stream, spill size]
+
+    """
+
+    input_file, output_file, stream, spill_size = task
+
+    # Variables
+    temporary = None # String for the name of the temporary file
+
+    try:
+
+        descriptor, temporary = tempfile.mkstemp('.tmp', '.' + os.path.basename(output_file) + '.', os.path.dirname(output_file) or '.')
+
+        # mkstemp only lets the owner read the file, the CSV file gets the permissions open would give it
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temporary, 0o666 & ~umask)
+
+        with open(descriptor, 'w', encoding='utf-8') as csv_file, open(input_file, encoding='utf-8') as html_file:
+
+            convert(html_file, csv_file, stream, spill_size)
+
+        os.replace(temporary, output_file)
+
+    except (OSError, ValueError) as error:
+
+        # Removing the part of the CSV written before the error
+        if temporary is not None and os.path.exists(temporary):
+
+            os.remove(temporary)
+
+        return [input_file, output_file, str(error)]
+
+    return [input_file, output_file, None]
+
+
+class TableParser:
+    """
+    A class used to convert the tables of an HTML document to CSV while it is read
+
+    Each table is printed as a 'TABLE <number>:' line followed by one line per <tr>, holding
+    the text of its <td> and <th> cells separated by commas. Rows with fewer cells than the
+    widest row of their table are padded with empty cells. When the document holds n <br>
+    tags, a blank line is printed after each of the first n - 1 tables.
+
+    The lines are written to a temporary file and copied to the output once the whole
+    document is converted, so the blank lines can follow the count of <br> tags and nothing
+    is printed when a cell holds a comma. With stream the lines are printed at once instead,
+    so a blank line is printed before a table when at least as many <br> tags as tables have
+    been found, and after the last table when more have been found. This gives the same
+    lines when each table is followed by a <br> tag.
+
+    The document is split into text and tags by the single regular expression TOKENS, which
+    walks each piece of the document once. Entities are kept as they are written.
+
+    ...
+
+    Attributes
+    ----------
+    target : file
+        The file the CSV lines are written to
+
+    output : file
+        The file the lines are written to while the document is read, target with stream
+        and otherwise a temporary file held in memory up to spill_size characters
+
+    stream : boolean
+        Print each row as soon as it closes, padded to the widest row seen so far in its table,
+        instead of printing the rows when their table closes
+
+    table_count : int
+        The number of tables found
+
+    in_table : boolean
+        A boolean for if a table is open
+
+    break_count : int
+        The number of <br> tags found
+
+    line_count : int
+        The number of lines written to output
+
+    table_ends : list
+        The line_count at the end of each table, the places blank lines may be copied to
+
+    spill_size : int
+        The number of characters of rows kept in memory before they are moved to spill
+
+    rows : list
+        The rows of the open table waiting to be printed, the cells of each joined by commas
+
+    row_size : int
+        The number of characters of rows
+
+    spill : file
+        The temporary file holding the rows of the open table once they are larger than
+        spill_size, None while they are in memory
+
+    total_cells : int
+        The largest number of cells of a row of the open table
+
+    row : list
+        The cells of the open row, None outside of a row
+
+    cell : list
+        The pieces of text of the open cell, None outside of a cell
+
+    pending : str
+        The end of the document read so far that may hold an unfinished tag
+
+    Methods
+    -------
+    feed(self, data)
+        Converts the next piece of the document
+
+    close(self)
+        Ends the document, copying the lines to target
+
+    handle_starttag(self, tag, text)
+        Opens a table, row or cell
+
+    handle_endtag(self, tag, text)
+        Closes a table, row or cell
+
+    start_table(self)
+        Prints the title of a new table
+
+    end_cell(self)
+        Adds the text of the open cell to its row
+
+    end_row(self)
+        Adds the open row to its table, printing it with stream
+
+    end_table(self)
+        Prints the rows of the open table
+
+    pad_row(self, row)
+        Pads a row to total_cells cells
+
+    """
+
+
+    def __init__(self, output, stream = False, spill_size = 64 * 1024 * 1024):
+        """
+        Parameters
+        ----------
+        output : file
+            The file the CSV lines are written to
+
+        stream : boolean, optional
+            Print each row as soon as it closes (default is False)
+
+        spill_size : int, optional
+            The number of characters of a table kept in memory before its rows are moved
+            to a temporary file (default is 64 MiB)
+
+        """
+
+        self.target = output
+        self.output = output if stream else tempfile.SpooledTemporaryFile(spill_size, 'w+', encoding='utf-8', newline='\n')
+        self.stream = stream
+        self.spill_size = spill_size
+        self.table_count = 0
+        self.in_table = False
+        self.break_count = 0
+        self.line_count = 0
+        self.table_ends = []
+        self.rows = []
+        self.row_size = 0
+        self.spill = None
+        self.total_cells = 0
+        self.row = None
+        self.cell = None
+        self.pending = ''
+
+    def feed(self, data):
+        """
+        Converts the next piece of the document. A tag cut off at the end of the piece is kept
+        in pending until the rest of it is fed, up to PENDING_LIMIT characters.
+
+        Parameters
+        ----------
+        data : str
+            The next piece of the document
+
+        """
+
+        # Variables
+        document = self.pending + data # The text not converted yet
+
+        self.pending = ''
+
+        for match in TOKENS.finditer(document):
+
+            kind = match.lastindex
+
+            if kind == 1:
+
+                # Text outside of cells is ignored
+                if self.cell is not None:
+
+                    self.cell.append(match.group(1))
+
+            elif kind == 3:
+
+                if match.group(2):
+
+                    self.handle_endtag(match.group(3).lower(), match.group(0))
+
+                else:
+
+                    self.handle_starttag(match.group(3).lower(), match.group(0))
+
+            elif kind == 4:
+
+                # Checking if the end of the tag may still be fed, otherwise the '<' is text
+                if len(document) - match.start() <= PENDING_LIMIT and UNFINISHED.match(document, match.start()):
+
+                    self.pending = document[match.start():]
+
+                    break
+
+                if self.cell is not None:
+
+                    self.cell.append('<')
+
+            elif self.cell is not None:
+
+                # Comments and declarations inside a cell are kept as written
+                self.cell.append(match.group(0))
+
+            # End of for match in TOKENS.finditer(document):
+
+    def handle_starttag(self, tag, text):
+        """
+        Opens a table, row or cell. A row or cell left open is closed by the next one. Other
+        tags inside a cell are kept as written, except those whose name starts with t.
+
+        Parameters
+        ----------
+        tag : str
+            The name of the tag in lower case
+
+        text : str
+            The tag as written
+
+        """
+
+        if tag == 'table':
+
+            self.end_table()
+            self.start_table()
+
+        elif tag == 'tr' and self.in_table:
+
+            self.end_row()
+
+            self.row = []
+
+        elif (tag == 'td' or tag == 'th') and self.row is not None:
+
+            self.end_cell()
+
+            self.cell = []
+
+        elif tag == 'br':
+
+            self.break_count += 1
+
+        elif self.cell is not None and not REMOVED.match(tag):
+
+            self.cell.append(text)
+
+    def handle_endtag(self, tag, text):
+        """
+        Closes a table, row or cell. Other end tags inside a cell are kept as written.
+
+        Parameters
+        ----------
+        tag : str
+            The name of the tag in lower case
+
+        text : str
+            The tag as written
+
+        """
+
+        if tag == 'td' or tag == 'th':
+
+            self.end_cell()
+
+        elif tag == 'tr':
+
+            self.end_row()
+
+        elif tag == 'table':
+
+            self.end_table()
+
+        elif self.cell is not None:
+
+            self.cell.append(text)
+
+    def close(self):
+        """
+        Ends the document, printing a table left open and copying the lines to target with
+        the blank lines after the tables. A '<' that never became a tag is text.
+
+        """
+
+        if self.pending and self.cell is not None:
+
+            self.cell.append(self.pending)
+
+        self.pending = ''
+
+        self.end_table()
+
+        if self.stream:
+
+            # Checking if the last table is followed by a blank line
+            if 0 < self.table_count < self.break_count:
+
+                self.output.write('\n')
+
+            return
+
+        self.output.seek(0)
+
+        # Variables
+        copied = 0 # Integer for the number of lines copied to target
+
+        # A document of n <br> tags has a blank line after each of its first n - 1 tables
+        for table_end in self.table_ends[:max(self.break_count - 1, 0)]:
+
+            self.target.writelines(islice(self.output, table_end - copied))
+            self.target.write('\n')
+
+            copied = table_end
+
+        self.target.writelines(self.output)
+
+        self.output.close()
+
+    def start_table(self):
+        """
+        Prints the title of a new table, with stream after a blank line if at least as many
+        <br> tags as tables have been found.
+
+        """
+
+        if self.stream and 0 < self.table_count <= self.break_count:
+
+            self.output.write('\n')
+
+        self.table_count += 1
+        self.in_table = True
+
+        self.output.write('TABLE ' + str(self.table_count) + ':\n')
+
+        self.line_count += 1
+
+    def end_cell(self):
+        """
+        Adds the text of the open cell to its row, with each run of spaces replaced by one
+        space and the whitespace around it removed.
+
+        Exceptions
+        ----------
+        ValueError
+            If the cell holds a comma.
+
+        """
+
+        if self.cell is None:
+
+            return
+
+        text = ''.join(self.cell)
+
+        if ',' in text:
+
+            raise ValueError('Invalid input, comma can not be placed between matching <td></td> or matching <th></th> tags')
+
+        self.row.append(SPACES.sub(' ', text).strip())
+
+        self.cell = None
+
+    def end_row(self):
+        """
+        Adds the open row to its table, or prints it with stream. The rows of a table larger
+        than spill_size are moved to a temporary file.
+
+        """
+
+        if self.row is None:
+
+            return
+
+        self.end_cell()
+
+        # Every table has at least one column
+        self.total_cells = max(self.total_cells, len(self.row), 1)
+
+        row = ','.join(self.row)
+
+        self.row = None
+        self.line_count += 1
+
+        if self.stream:
+
+            self.output.write(self.pad_row(row))
+
+            return
+
+        self.row_size += len(row)
+
+        # Checking if the rows have grown too large to keep in memory
+        if self.spill is None and self.row_size > self.spill_size:
+
+            self.spill = tempfile.TemporaryFile('w+', encoding='utf-8', newline='\n')
+
+            self.spill.writelines([x + '\n' for x in self.rows])
+
+            self.rows = []
+
+        if self.spill is not None:
+
+            self.spill.write(row + '\n')
+
+        else:
+
+            self.rows.append(row)
+
+    def end_table(self):
+        """
+        Prints the rows of the open table, padded to its widest row.
+
+        """
+
+        if not self.in_table:
+
+            return
+
+        self.end_row()
 
-                    row_size += 1
+        if self.spill is not None:
 
-                    row_ele.extend(',')
+            self.spill.seek(0)
 
+            self.output.writelines(self.pad_row(x[:-1]) for x in self.spill)
 
-        built_output.append(extracted_data)
- 
+            self.spill.close()
+            self.spill = None
 
-    # Grabing how many tables their are
-    total_title = len(output_title)
-    
-    # Output the data
-    for table in built_output:
+        else:
 
-        if printed_titles < total_title:
+            self.output.writelines([self.pad_row(x) for x in self.rows])
 
-            print(output_title[printed_titles])
+        self.rows = []
+        self.row_size = 0
+        self.total_cells = 0
+        self.in_table = False
 
-            printed_titles += 1
-        
-        for rows in table:
+        # Blank lines are only copied after the tables once the document is converted
+        if not self.stream:
 
-            for rows_data in range(len(rows)):
+            self.table_ends.append(self.line_count)
 
-                print(rows[rows_data], end='')
+    def pad_row(self, row):
+        """
+        Pads a row with empty cells to total_cells cells and ends its line. As cells can not
+        hold commas, a row of n cells holds n - 1 commas, and a row without cells is padded
+        the same as a row of one empty cell.
 
-            print('\n', end='')
+        Parameters
+        ----------
+        row : str
+            The text of each cell joined by commas
 
-        if add_break < total_br-1:
+        """
 
-            print('\n', end='')
+        return row + ',' * (self.total_cells - 1 - row.count(',')) + '\n'
 
-            add_break += 1
-        
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,76 @@
+import io
+import unittest
+from unittest import mock
+
+from table_to_csv import convert
+
+
+def run_convert(document, stream = False):
+    """
+        Converts an HTML document and returns the CSV text written.
+
+    """
+
+    output = io.StringIO()
+
+    convert(io.StringIO(document), output, stream)
+
+    return output.getvalue()
+
+
+class ConvertTest(unittest.TestCase):
+
+    def test_blank_lines_follow_break_count(self):
+
+        tables = '<table><tr><td>a</td></tr></table><br/><table><tr><td>b</td></tr></table><br/><table><tr><td>c</td></tr></table>'
+
+        # Two <br> tags give one blank line, after the first table
+        self.assertEqual(run_convert(tables), 'TABLE 1:\na\n\nTABLE 2:\nb\nTABLE 3:\nc\n')
+
+        # Three <br> tags give two blank lines wherever the tags are
+        self.assertEqual(run_convert(tables + '<br>'), 'TABLE 1:\na\n\nTABLE 2:\nb\n\nTABLE 3:\nc\n')
+
+        # A single <br> tag gives no blank line
+        self.assertEqual(run_convert('<table><tr><td>a</td></tr></table><br /><table><tr><td>b</td></tr></table>'), 'TABLE 1:\na\nTABLE 2:\nb\n')
+
+    def test_blank_lines_with_stream(self):
+
+        tables = '<table><tr><td>a</td></tr></table><br/><table><tr><td>b</td></tr></table><br/>'
+
+        # Tables each followed by a <br> tag give the same lines with stream
+        self.assertEqual(run_convert(tables, True), run_convert(tables))
+        self.assertEqual(run_convert(tables + '<br/>', True), run_convert(tables + '<br/>'))
+
+        # Otherwise only the <br> tags found before the next table count
+        self.assertEqual(run_convert('<table><tr><td>a</td></tr></table><br/><table><tr><td>b</td></tr></table>', True), 'TABLE 1:\na\n\nTABLE 2:\nb\n')
+
+    def test_markup_inside_cells_is_kept(self):
+
+        self.assertEqual(run_convert('<table><tr><td>a<b>b</b> <!-- c --></td><td><a  href="x">y</a></td></tr></table>'), 'TABLE 1:\na<b>b</b> <!-- c -->,<a href="x">y</a>\n')
+
+    def test_comma_prints_nothing(self):
+
+        output = io.StringIO()
+
+        with self.assertRaises(ValueError):
+
+            convert(io.StringIO('<table><tr><td>a</td></tr></table><table><tr><td>b,c</td></tr></table>'), output)
+
+        self.assertEqual(output.getvalue(), '')
+
+    def test_unbalanced_quote_is_flushed(self):
+
+        rows = ''.join('<tr><td>r' + str(i) + '</td></tr>' for i in range(100))
+
+        # The rows after the tag with an unbalanced quote are still converted once it is longer than PENDING_LIMIT
+        with mock.patch('table_to_csv.PENDING_LIMIT', 200):
+
+            output = run_convert('<table><tr><td title="x>a</td></tr>\n' + rows.replace('</tr>', '</tr>\n') + '</table>')
+
+        self.assertEqual(output.splitlines()[-1], 'r99')
+        self.assertEqual(len(output.splitlines()), 102)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
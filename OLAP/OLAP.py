@@ -2,9 +2,45 @@
 
 # Libraries
 import argparse
+import bisect
 import os
 import sys
+import contextlib
 import csv
+import hashlib
+import heapq
+import io
+import json
+import math
+import mmap
+import multiprocessing
+import operator
+import re
+import struct
+from array import array
+from itertools import islice
+from operator import itemgetter
+
+# NumPy is optional, the aggregates fall back to pure Python loops without it
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# First bytes of the binary column cache files written by DataBlock.write_cache
+CACHE_MAGIC = b'OLAPCOL1'
+
+# First bytes of the cube files written by Cube.write
+CUBE_MAGIC = b'OLAPCUB1'
+
+# Number of bits of the hash choosing the register of an approximate distinct count, 2^14 registers
+HLL_PRECISION = 14
+
+# Scale of the quantile sketches, a compressed sketch holds about TDIGEST_COMPRESSION / 2 centroids
+TDIGEST_COMPRESSION = 200
+
+# Number of values a quantile sketch keeps before compressing them, quantiles of fewer values are exact
+TDIGEST_BUFFER = 1000
 
 def main():
     '''
@@ -13,6 +49,164 @@ def main():
         data.
     '''
 
+    # Parse the arguments
+    arguments = build_parser().parse_args()
+
+    check_arguments(arguments)
+
+    # Checking if the results should be read from or saved to the result cache
+    if arguments.result_cache is not None:
+
+        cached_results(arguments, answer_query)
+
+    else:
+
+        answer_query(arguments)
+
+
+def answer_query(arguments):
+    """
+        Reads the input file and outputs the results of the aggregates passed at the command line.
+
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments
+
+    """
+
+    # Checking if --cache is combined with a mode that aggregates the rows without storing them
+    if arguments.cache:
+
+        for option, value in (('--stream', arguments.stream), ('--jobs', arguments.jobs > 1), ('--checkpoint', arguments.checkpoint is not None)):
+
+            if value:
+
+                # Print on standard error
+                print('Error: --cache can not be used with ' + option + '.', file = sys.stderr)
+
+                exit(6)
+
+    # Checking if the results can be rolled up from a cube instead of reading the input file
+    if arguments.cube is not None and cube_results(arguments):
+
+        return
+
+    # Create a DataBlock object
+    data = DataBlock(arguments.input)
+
+    # Checking if the columns can be read from the cache of a previous run
+    if arguments.cache and data.read_cache(arguments.input + '.olapcache'):
+
+        check_fields(arguments, data)
+
+        # The cache holds every row, so the rows are filtered after it is read
+        if arguments.where is not None:
+
+            data = data.select(where_predicate(arguments, data))
+
+    else:
+
+        # Open file passed by the input aggregate function
+        with open(arguments.input, 'rb') as csv_file:
+
+            scanner = CsvScanner(csv_file)
+
+            data.add_header(scanner.read_header())
+
+            check_fields(arguments, data)
+
+            # Only reading and storing the columns used, the cache needs every column for later queries
+            if arguments.cache:
+
+                needed = list(range(len(data.column_header)))
+
+            else:
+
+                needed = needed_columns(arguments, data)
+
+                data.project_columns(needed)
+
+            # Checking if few enough columns are used for scanning the bytes to be faster than the csv module,
+            # the scanner leaves the unused fields empty so it is never used to fill the cache
+            if not arguments.cache and len(needed) * 4 <= len(data.column_header):
+
+                csv_reader = scanner.read_rows(needed)
+
+            else:
+
+                csv_reader = scanner.read_csv()
+
+            # Checking if only the rows appended since the checkpoint should be aggregated
+            if arguments.checkpoint is not None:
+
+                incremental_results(arguments, data)
+
+                return
+
+            # Checking if the rows should be aggregated by several processes
+            if arguments.jobs > 1:
+
+                parallel_results(arguments, data)
+
+                return
+
+            # Checking if the rows should be aggregated while they are read
+            if arguments.stream:
+
+                stream_results(arguments, data, csv_reader)
+
+                return
+
+            # The cache needs every row for later queries, otherwise rows are filtered while they are read
+            if arguments.cache:
+
+                data.add_reader(csv_reader)
+
+            else:
+
+                data.add_reader(csv_reader, where_predicate(arguments, data))
+
+        # Saving the columns for later runs
+        if arguments.cache:
+
+            data.write_cache(arguments.input + '.olapcache')
+
+            if arguments.where is not None:
+
+                data = data.select(where_predicate(arguments, data))
+
+    # Checking if the cube of the query should be written
+    if arguments.build_cube is not None:
+
+        table = AggregateTable(arguments.order, data.column_header, data.input, groupby_indexes(arguments, data.column_header), approx_size(arguments))
+
+        table.add_block(data)
+
+        # Checking if cardinality is too high, the results without a group-by are a single group
+        if arguments.groupby != -1 and len(table.groups) >= arguments.max_groups:
+
+            # Print on standard error
+            print('Error: ' + data.input + ': The field ' + arguments.groupby[0] + ' has to many unique values.', file = sys.stderr)
+
+            exit(6)
+
+        table_results(arguments, data, table)
+
+        return
+    
+    # Computing every aggregate over the stored columns
+    query = Query([[x[0]] + x[1] for x in arguments.order], arguments.groupby[0] if arguments.groupby != -1 else None, approx_size(arguments), arguments.max_groups, arguments.group_cap)
+
+    write_output(*query.run(data))
+
+
+def build_parser():
+    """
+        Builds the parser of the command line arguments, also used for the queries of server.py.
+
+    """
+
     # Initializing a parsing object for command line input
     argument_parser = argparse.ArgumentParser(description='Online Analytical Processing(OLAP) used for calculating min, max, mean(average), sum, and count of numerical columns. The group-by and top-k are used for categorical columns')
 
@@ -22,15 +216,43 @@ def main():
     argument_parser.add_argument('--min', nargs='*', action=Organizer) # Optional argument for getting the minimum value(s)
     argument_parser.add_argument('--max', nargs='*', action=Organizer) # Optional argument for getting the maximum value(s)
     argument_parser.add_argument('--mean', nargs='*', action=Organizer) # Optional argument for getting the mean(average) value(s)
+    argument_parser.add_argument('--var', nargs='*', action=Organizer) # Optional argument for getting the sample variance of value(s)
+    argument_parser.add_argument('--stddev', nargs='*', action=Organizer) # Optional argument for getting the sample standard deviation of value(s)
+    argument_parser.add_argument('--median', nargs='*', action=Organizer) # Optional argument for getting the median value(s)
+    argument_parser.add_argument('--percentile', nargs='*', action=Organizer) # Optional argument for getting the p-th percentile of value(s)
     argument_parser.add_argument('--count', nargs=0, action=Organizer) # Optional argument for counting the number of records
     argument_parser.add_argument('--top', nargs='*', action=Organizer) # Optional argument for getting the top k values
-    argument_parser.add_argument('--groupby', '--group-by', nargs=1, default= -1) # Optional argument for grouping the output data
+    argument_parser.add_argument('--distinct', nargs='*', action=Organizer) # Optional argument for counting the distinct values
+    argument_parser.add_argument('--groupby', '--group-by', nargs=1, default= -1) # Optional argument for grouping the output data, several fields are separated by commas
+    argument_parser.add_argument('--max-groups', type=int, default=100) # Optional argument for the number of groups at which the program stops
+    argument_parser.add_argument('--group-cap', type=int, default=20) # Optional argument for the number of groups after which the output is capped
+    argument_parser.add_argument('--stream', action='store_true') # Optional argument for aggregating the rows while they are read
+    argument_parser.add_argument('--jobs', type=int, default=1) # Optional argument for the number of processes aggregating the rows
+    argument_parser.add_argument('--cache', action='store_true') # Optional argument for reading and writing the binary column cache of the input file
+    argument_parser.add_argument('--approx', action='store_true') # Optional argument for bounding the memory of top and distinct with approximate results
+    argument_parser.add_argument('--approx-size', type=int, default=1000) # Optional argument for the number of values top keeps per group with --approx
+    argument_parser.add_argument('--checkpoint', nargs='?') # Optional argument for the file holding the aggregates of the rows read by earlier runs
+    argument_parser.add_argument('--build-cube', nargs='?') # Optional argument for the file the cube of the group-by fields and numeric fields is written to
+    argument_parser.add_argument('--cube', nargs='?') # Optional argument for the cube file queries are rolled up from
+    argument_parser.add_argument('--where', nargs='?') # Optional argument for the comparisons a row has to pass to be aggregated
+    argument_parser.add_argument('--result-cache', nargs='?') # Optional argument for the directory of the result cache
+    argument_parser.add_argument('--result-cache-size', type=int, default=64 * 1024 * 1024) # Optional argument for the largest size in bytes of the result cache
+
+    return argument_parser
+
+
+def check_arguments(arguments):
+    """
+        Adds count when no aggregate was passed and checks that the input file is a CSV file.
 
-    # Parse the arguments
-    arguments = argument_parser.parse_args()
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments
+
+    """
 
     # Variables
-    line_count = 0 # Line count tracker
     verify_file = '' # String variable to verify the input file extension
 
     # If only --input was put in the commmand line, add count
@@ -48,35 +270,131 @@ def main():
         print('Error: ' + verify_file + ' is not a CSV file, please check if file extension was inputted correctly.', file = sys.stderr)
 
         exit(6)
-    
+
+
+def cached_results(arguments, run):
+    """
+        Outputs the results of a query from the result cache, or runs the query and saves its
+        output to the result cache.
+
+        Only queries that end without an error exit are saved. The non-numeric values they
+        reported are saved with the output and printed again when the results are reused.
+        Queries with --cache, --checkpoint or --build-cube skip the result cache, as reusing
+        their output would skip writing their files.
+
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments
+
+        run : function
+            The function outputting the results of the query when they are not in the cache
+
+    """
+
+    # Variables
+    output = io.StringIO() # The output of the query
+    errors = io.StringIO() # The errors of the query
+
+    # Checking if the query writes files of its own, which only happens when it is run
+    if arguments.cache or arguments.checkpoint is not None or arguments.build_cube is not None:
+
+        run(arguments)
+
+        return
+
+    cache = ResultCache(arguments.result_cache, arguments.result_cache_size)
+
+    key = cache.key(arguments)
+
+    entry = cache.get(key)
+
+    # Checking if the results were saved by an earlier run
+    if entry is not None:
+
+        sys.stdout.write(entry['output'])
+        sys.stderr.write(entry['errors'])
+
+        return
+
+    try:
+
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(errors):
+
+            run(arguments)
+
+    finally:
+
+        # Outputting what was printed, also when the query ended with an error
+        sys.stdout.write(output.getvalue())
+        sys.stderr.write(errors.getvalue())
+
+    cache.put(key, {'output': output.getvalue(), 'errors': errors.getvalue()})
+
+
+def load_block(input_file, use_cache = False):
+    """
+        Reads every column of a CSV file into a DataBlock, for running queries from other programs.
+
+        Parameters
+        ----------
+        input_file : str
+            The name of the input file
+
+        use_cache : boolean, optional
+            Read the columns from the binary cache of the file if it is up to date and write
+            it otherwise (default is False)
+
+    """
+
     # Create a DataBlock object
-    data = DataBlock(arguments.input)
+    data = DataBlock(input_file)
 
-    # Open file passed by the input aggregate function
-    with open(arguments.input, 'r', encoding='utf-8-sig') as csv_file:
+    # Checking if the columns can be read from the cache of a previous run
+    if use_cache and data.read_cache(input_file + '.olapcache'):
 
-        # Read a single line at a time from the file
-        csv_reader = csv.reader(csv_file, delimiter=',')
+        return data
 
-        for row in csv_reader:
+    with open(input_file, 'rb') as csv_file:
 
-            if line_count < 1:
+        scanner = CsvScanner(csv_file)
 
-                data.add_header(row)
+        data.add_header(scanner.read_header())
 
-                line_count = 1
+        data.add_reader(scanner.read_csv())
 
-            else:
+    # Saving the columns for later runs
+    if use_cache:
 
-                data.add_data(row)
-    
-    # Check if group-by was passed and if it's argument is valid
-    if arguments.groupby != -1 and arguments.groupby[0].lower() not in data.column_header:
+        data.write_cache(input_file + '.olapcache')
 
-        # Print on standard error
-        print('Error: \'' + data.input + '\':no group-by argument with name \'' + arguments.groupby[0] + '\' found', file=sys.stderr)
+    return data
+
+
+def check_fields(arguments, data):
+    """
+        Checks that the group-by field and every field passed to an aggregate exist in the header
+        of the input file.
+
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments
+
+        data : DataBlock
+            The DataBlock holding the column headers
+
+    """
+
+    # Check if group-by was passed and if it's arguments are valid
+    for field in groupby_fields(arguments):
 
-        exit(9)
+        if field.lower() not in data.column_header:
+
+            # Print on standard error
+            print('Error: \'' + data.input + '\':no group-by argument with name \'' + field + '\' found', file=sys.stderr)
+
+            exit(9)
     
     # Checking the validity of passed fields
     for ele in arguments.order:
@@ -86,7 +404,7 @@ def main():
 
             continue
 
-        elif ele[0] == 'top':
+        elif ele[0] == 'top' or ele[0] == 'percentile':
 
             if ele[1][1].lower() not in data.column_header:
 
@@ -103,1321 +421,4138 @@ def main():
                 # Print on standard error
                 print('Error: \'' + data.input + '\':no field with name \'' + ele[1][0] + '\' found', file=sys.stderr)
                 exit(8)
-    
-    # Checking if group-by was passed in command line
-    if arguments.groupby != -1:
-
-        # Variables
-        groupby_data = [] # List to hold the data of group-by field
 
-        # Finding the index location of the groupby_name parameter
-        groupby_index = data.column_header.index(arguments.groupby[0].lower())
+    # Checking the comparisons passed to where
+    where_predicate(arguments, data)
 
-        # Fill temp_list with all the values from groupby_name column
-        for i in range(len(data.column_data)):
-            groupby_data.append(data.column_data[i][groupby_index])
 
-        # Create a list of unique elements from temp_list
-        groupby_header = [x for x in set(groupby_data)]
-        
-        # Sort in ascending order
-        groupby_header.sort()
+def where_predicate(arguments, data):
+    """
+        Compiles the comparisons passed to where into a Predicate, None if where was not passed.
 
-        result_data = data.column_group(arguments, arguments.groupby[0])
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments
 
-        output_results(arguments, result_data, groupby_header, data.top_capped, data.groupby_capped)
+        data : DataBlock
+            The DataBlock holding the column headers
 
-    else:
+    """
 
-        # Variables
-        result_data = [] # List for holding all the resulting data other than top k
-        top_data = [] # List for holding top k's data
+    if arguments.where is None:
 
-        # Call the respective functions based on elements in arguments.order
-        for ele in arguments.order:
+        return None
 
-            if ele[0] == 'count':
+    try:
 
-                result_data.append([data.column_count()])
-            
-            elif ele[0] == 'sum':
+        return Predicate(arguments.where, data.column_header)
 
-                result_data.append([data.column_sum(ele[1][0])])
-            
-            elif ele[0] == 'min':
+    except ValueError as error:
 
-                result_data.append([data.column_min(ele[1][0])])
+        # Print on standard error
+        print('Error: \'' + data.input + '\':--where ' + str(error), file=sys.stderr)
 
-            elif ele[0] == 'max':
+        exit(6)
 
-                result_data.append([data.column_max(ele[1][0])])
 
-            elif ele[0] == 'mean':
+def stream_results(arguments, data, csv_reader):
+    """
+        Aggregates the rows of csv_reader as they are read instead of storing them in the DataBlock,
+        so memory is bounded by the number of groups, and outputs the results.
 
-                result_data.append([data.column_mean(ele[1][0])])
-            
-            elif ele[0] == 'top':
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments
 
-                top_data.extend(data.column_top(int(ele[1][0]), ele[1][1]))
-        
-        output_results(arguments, result_data, top_data, data.top_capped)
+        data : DataBlock
+            The DataBlock holding the column headers
 
+        csv_reader : reader
+            The csv reader positioned after the header row
 
-def output_results(result_header, result_data, groupby_list = None, top_capped = False, groupby_capped = False):
     """
-        Outputs all the data to a csv file called output.csv
 
-        Parameters
-        ----------
-        result_header : list
-            All the arguments passed at the command line in order
+    # Variables
+    line_count = 1 # Line count tracker
+    groupby_index = groupby_indexes(arguments, data.column_header) # List of the locations of the group-by fields
+    predicate = where_predicate(arguments, data) # Predicate of the rows aggregated, None for every row
+    width = len(data.column_header) # Integer for the number of fields of a row
 
-        result_data : list
-            All the data based on the arguments passed on the command line
+    table = AggregateTable(arguments.order, data.column_header, data.input, groupby_index, approx_size(arguments))
 
-        groupby_list : list, optional
-            Containing the unique values that the data is grouped by (default is None)
+    for row in csv_reader:
 
-        top_capped : boolean
-            Indicating if top's data has been capped (default is False)
+        # Rows shorter than the header are filled with empty values, the same as DataBlock.add_rows
+        if len(row) < width:
 
-        groupby_capped : boolean
-            Indicating if group-by has been capped (default is False)
+            row = row + [''] * (width - len(row))
 
-    """
+        # Skipping the rows that do not pass where before any value is parsed
+        if predicate is not None and not predicate.test(row):
 
-    # Variables for holding column titles for output
-    min_title = 'min_'
-    max_title = 'max_'
-    mean_title = 'mean_'
-    sum_title = 'sum_'
-    top_title = 'top_'
-    count_title = 'count'
+            line_count += 1
 
-    # List variables for holding the output header and data 
-    output_header = []
-    output_data = []
-    
-    # Checking if output will be in group-by format
-    if result_header.groupby != -1:
-        
-        # Variable
-        top_called = False # Flag for if top was called
-        top_index = -1 # Integer for top's location
+            continue
 
-        for ele in result_header.order:
+        table.add_row(row, line_count)
 
-            if ele[0] == 'top':
+        line_count += 1
 
-                # Top was called
-                top_called = True
+        # Checking if cardinality is too high, the results without a group-by are a single group
+        if arguments.groupby != -1 and len(table.groups) >= arguments.max_groups:
 
-                # Variables for splitting top's data from resulting data list
-                top_list = [] # List that will solely hold top's data
-                split_list = [] # List that will hold the left over data after top's has been extracted 
+            # Print on standard error
+            print('Error: ' + data.input + ': The field ' + arguments.groupby[0] + ' has to many unique values.', file = sys.stderr)
 
-                # Setting the location index for top command
-                top_index = result_header.order.index(ele)
-                
-                # Counter to track how many items from top have been added to ouput_data
-                top_counter = 0
+            exit(6)
 
-                # Splitting top's data from resulting data
-                top_list.extend(result_data[top_index])
+        # End of for row in csv_reader:
 
-                for i in result_data:
+    table_results(arguments, data, table)
 
-                    # Get the index location of i
-                    index = result_data.index(i)
 
-                    # Checking if index is equal to top_index
-                    if index == top_index:
-                        continue
-                    else:
-                        split_list.append(result_data[index])
+def parallel_results(arguments, data):
+    """
+        Splits the input file into newline aligned byte ranges, aggregates each range in a pool of
+        arguments.jobs processes and merges the partial results before outputting them.
 
-                    # End of for i in result_data:
+        Quoted fields holding newlines are not supported as a range may start inside them.
 
-                result_data = split_list
-                break
-                
-                #End of if ele[0] == 'top':
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments
 
-            # End of or ele in result_header.order:
-        
-        # Setting groupby_field to field name passed to group-by
-        groupby_field = result_header.groupby[0]
+        data : DataBlock
+            The DataBlock holding the column headers
 
-        output_header.append(groupby_field.lower())
+    """
 
-        # Checking it top was called
-        if top_called:
-            
-            for ele in  groupby_list:
-                
-                # Reset building_row each iteration
-                building_row = []
+    # Variables
+    groupby_index = groupby_indexes(arguments, data.column_header) # List of the locations of the group-by fields
+    boundaries = [] # List of the byte offsets the ranges start at
+    line_offset = 0 # Integer for the number of rows before the current range
 
-                # Getting the index location of ele in groupby_list
-                ele_index = groupby_list.index(ele)
+    with open(data.input, 'rb') as csv_file:
 
-                building_row.append(ele)
-        
-                for i in range(len(result_data)):
+        # The data starts after the header line
+        boundaries.append(len(csv_file.readline()))
 
-                    building_row.append(result_data[i][ele_index])
+        file_size = os.fstat(csv_file.fileno()).st_size
 
-                    # End of for i in range(len(result_data)):
+        # Moving each boundary to the start of the next line
+        for i in range(1, arguments.jobs):
 
-                # Checking if top_counter is less than the length of top_list
-                if top_counter < len(top_list):
+            csv_file.seek(max(boundaries[0], file_size * i // arguments.jobs))
+            csv_file.readline()
 
-                    # Insert element from top_list into temp_list at location top_index + 1
-                    building_row.insert(top_index+1, top_list[top_counter][0])
+            boundaries.append(max(csv_file.tell(), boundaries[-1]))
 
-                    top_counter += 1
+        boundaries.append(file_size)
 
-                else:
+    needed = needed_columns(arguments, data)
 
-                    # This means that top_list is smaller than resulting data list
-                    building_row.insert(top_index+1, None)
+    ranges = [(arguments.order, data.column_header, data.input, groupby_index, needed, boundaries[i], boundaries[i+1], approx_size(arguments), arguments.max_groups, arguments.where) for i in range(arguments.jobs)]
 
-                # Creating a 2D list
-                output_data.append(building_row)
+    table = AggregateTable(arguments.order, data.column_header, data.input, groupby_index, approx_size(arguments))
 
-                # End of for ele in  groupby_list:
+    with multiprocessing.Pool(arguments.jobs) as pool:
 
-            # Checking if top_counter is less than top_list
-            # This check is only true if top_list has more data than result_data
-            if top_counter < len(top_list):
-                
-                # Loop until top_counter is not less than length of top_list
-                while top_counter < len(top_list):
+        # Merging the partial results in file order
+        for partial, row_count in pool.starmap(aggregate_range, ranges):
 
-                    # Reset building_row each iteration
-                    building_row = []
+            # Reporting the non-numeric values with their line number in the whole file
+            for line_number, position, value in partial.error_log:
 
-                    # Building the reset of the rows
-                    for i in range(len(result_data)):
+                table.non_numeric_error(position, line_number + line_offset, value)
 
-                        # Checking if i value is equal to top_index + 1
-                        if i == top_index + 1:
+            table.merge(partial)
 
-                            building_row.extend(top_list[top_counter])
+            line_offset += row_count
 
-                            top_counter += 1
+            # Checking if cardinality is too high, the results without a group-by are a single group
+            if arguments.groupby != -1 and len(table.groups) >= arguments.max_groups:
 
-                        else:
+                # Print on standard error
+                print('Error: ' + data.input + ': The field ' + arguments.groupby[0] + ' has to many unique values.', file = sys.stderr)
 
-                            building_row.append(None)
+                exit(6)
 
-                        # End of for i in range(len(result_data)):
-                
-                    output_data.append(building_row)
+            # End of for partial, row_count in pool.starmap(aggregate_range, ranges):
 
-                    # End of while top_counter < len(top_list):
+    table_results(arguments, data, table)
 
-            # End of if top_called:
-        else:
-                
-            # Creating output_data list
-            for ele in  groupby_list:
-                
-                # Reset building_row each iteration
-                building_row = []
 
-                # Getting the index location of ele in groupby_list
-                ele_index = groupby_list.index(ele)
+def incremental_results(arguments, data):
+    """
+        Aggregates only the rows appended to the input file since the checkpoint of an earlier run,
+        merges them into the aggregates saved in the checkpoint and outputs the results. The new
+        checkpoint holds the aggregates of every group and the byte offset after the last row read.
 
-                building_row.append(ele)
-        
-                for i in range(len(result_data)):
+        The checkpoint is only reused if it was written for the same aggregates, group-by field, where and
+        header, and the input file still holds the bytes read before the offset, otherwise every row
+        is read again. A last line without a newline is left for the next run as it may still be
+        being written. The non-numeric values of the rows read by earlier runs are not reported again.
 
-                    building_row.append(result_data[i][ele_index])
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments
 
-                    # End of for i in range(len(result_data)):
-                
-                # Creating a 2D list
-                output_data.append(building_row)
+        data : DataBlock
+            The DataBlock holding the column headers
 
-                # End of for ele in  groupby_list:
+    """
 
-        # End of if result_header.groupby != -1:
-    else:
-        # This code is for if no group-by was passed at command line
+    # Variables
+    groupby_index = groupby_indexes(arguments, data.column_header) # List of the locations of the group-by fields
+    predicate = where_predicate(arguments, data) # Predicate of the rows aggregated, None for every row
+    checkpoint = None # Dictionary holding the checkpoint of the earlier run
 
-        # Checking if top k data was passed
-        if groupby_list is not None:
+    table = AggregateTable(arguments.order, data.column_header, data.input, groupby_index, approx_size(arguments))
 
-            # Variables
-            first_row = [] # Temporary list for bulding first row if output data
-            top_index = -1 # Integer for holding the location of top if it was called
+    try:
 
-            # Result placement index
-            result_index = 0
+        with open(arguments.checkpoint, encoding='utf-8') as checkpoint_file:
 
-            # Checking if top was call on command line
-            for ele in result_header.order:
+            checkpoint = json.load(checkpoint_file)
 
-                if ele[0] == 'top':
+    except (OSError, ValueError):
 
-                    # Setting the location index for top command
-                    top_index = result_header.order.index(ele)
+        pass
 
-                # End of for ele in result_header.order:
+    with open(data.input, 'rb') as csv_file:
 
-            # Building the first row of the output data by putting top's data in correct location
-            for order_ele in range(len(result_header.order)):
+        # The data starts after the header line
+        start = len(csv_file.readline())
+        row_count = 0
 
-                # Checking if order_ele is equal to top_index
-                if order_ele == top_index:
-                    first_row.extend(groupby_list[0])
-                
-                # Extending first_row list by a value from result_data
-                if result_index < len(result_data):
-                    first_row.extend(result_data[result_index])
-                    result_index += 1
+        file_size = os.fstat(csv_file.fileno()).st_size
 
-                # End of for order_ele in range(len(result_header.order)):
+        # Checking if the checkpoint was written for this query and the rows it read are unchanged
+        if checkpoint is not None and [checkpoint['header'], checkpoint['order'], checkpoint['groupby'], checkpoint['approx'], checkpoint.get('where')] == [data.column_header, arguments.order, arguments.groupby, table.approx, arguments.where] and start <= checkpoint['offset'] <= file_size:
 
-            output_data.append(first_row)
+            csv_file.seek(checkpoint['offset'] - len(checkpoint['tail']) // 2)
 
-            # Building the rest of the rows for top k data
-            for row_data in range(1,len(groupby_list)):
+            if csv_file.read(len(checkpoint['tail']) // 2).hex() == checkpoint['tail']:
 
-                # Reset building_row to be empty each iteration
-                building_row = []
+                start = checkpoint['offset']
+                row_count = checkpoint['rows']
 
-                for placement in range(len(result_header.order)):
+                table.non_numeric = checkpoint['non_numeric']
+                table.load_groups(checkpoint['groups'])
 
-                    # Checking if placement is equal to top_index
-                    if placement != top_index:
-                        building_row.append(None)
-                    else:
-                        building_row.append(groupby_list[row_data][0])
+        # Finding the end of the last line with a newline, a last line without one is left for the next run
+        end = start
+        position = file_size
 
-                    # End of for placement in range(len(result_header.order)):
-                    
-                output_data.append(building_row)
+        while position > start:
 
-                # End of for row_data in range(len(groupby_list)):
-        
-            # End of if groupby_list is not None:
-        else:   
+            chunk_start = max(start, position - 65536)
 
-            output_data = result_data
+            csv_file.seek(chunk_start)
+            newline = csv_file.read(position - chunk_start).rfind(b'\n')
 
+            if newline != -1:
 
-    # Build the headers based on the command line arguments in result_header.order
-    for ele in result_header.order:
-        
-        if ele[0] == 'count':
+                end = chunk_start + newline + 1
 
-            ele_val = count_title
-            output_header.append(ele_val.lower())
-        
-        elif ele[0] == 'sum':
+                break
 
-            ele_val = sum_title + ele[1][0]
-            output_header.append(ele_val.lower())
+            position = chunk_start
 
-        elif ele[0] == 'min':
+            # End of while position > start:
 
-            ele_val = min_title + ele[1][0]
-            output_header.append(ele_val.lower())
+        # Keeping the bytes before the end so the next run can check they are unchanged
+        csv_file.seek(max(0, end - 64))
+        tail = csv_file.read(end - max(0, end - 64)).hex()
 
-        elif ele[0] == 'max':
+        needed = needed_columns(arguments, data)
 
-            ele_val = max_title + ele[1][0]
-            output_header.append(ele_val.lower())
-            
-        elif ele[0] == 'mean':
-            ele_val = mean_title + ele[1][0]
-            output_header.append(ele_val.lower())
+        # Adding the new rows to the accumulators of the checkpoint
+        for row in CsvScanner(csv_file).read_rows(needed, start, end):
 
-        elif ele[0] == 'top':
+            row_count += 1
 
-            if top_capped:
+            if predicate is not None and not predicate.test(row):
 
-                ele_val = top_title + ele[1][1] + '_capped'
+                continue
 
-            else:
+            table.add_row(row, row_count)
 
-                ele_val = top_title + ele[1][1]
-    
-            output_header.append(ele_val.lower())
-        
-        # End of for ele in result_header.order:
+            # Checking if cardinality is too high, the results without a group-by are a single group
+            if arguments.groupby != -1 and len(table.groups) >= arguments.max_groups:
 
-    # Adding _OTHER row to data if group-by was capped
-    if groupby_capped:
-        
-        other_row = [] # List to hold the other row split
+                # Print on standard error
+                print('Error: ' + data.input + ': The field ' + arguments.groupby[0] + ' has to many unique values.', file = sys.stderr)
 
-        other_row.append('_OTHER')
+                exit(6)
 
-        for i in range(1, len(output_header)):
+    checkpoint = {
+        'header': data.column_header,
+        'order': arguments.order,
+        'groupby': arguments.groupby,
+        'approx': table.approx,
+        'where': arguments.where,
+        'offset': end,
+        'rows': row_count,
+        'tail': tail,
+        'non_numeric': table.non_numeric,
+        'groups': [[x, table.groups[x]] for x in table.groups]
+    }
 
-            other_row.append(None)
+    # Writing to a temporary file first so a run stopped part way keeps the old checkpoint
+    with open(arguments.checkpoint + '.tmp', 'w', encoding='utf-8') as checkpoint_file:
 
-        output_data.insert(20, other_row)
-    
+        # The registers of approximate distinct counts are saved as lists
+        json.dump(checkpoint, checkpoint_file, default=list)
 
-    # Creating a writer object
-    writting = csv.writer(sys.stdout)
+    os.replace(arguments.checkpoint + '.tmp', arguments.checkpoint)
 
-    # Write the column headers
-    writting.writerow(output_header)
+    table_results(arguments, data, table)
 
-    # Write the column rows
-    writting.writerows(output_data)
 
-class Organizer(argparse.Action):
+def aggregate_range(order, column_header, input_file, groupby_index, needed, start, end, approx = 0, max_groups = 100, where = None):
     """
-    A classed used to organized the command line arguments by the order
-    they were passed in.
+        Aggregates the rows of the input file between two byte offsets, used by the processes of
+        parallel_results.
+
+        Returns the AggregateTable, holding the non-numeric values found in its error_log, and
+        the number of rows read.
+
+        Parameters
+        ----------
+        order : list
+            The aggregate arguments in the order they were passed at the command line
+
+        column_header : list
+            A list containing the title of each column
+
+        input_file : str
+            The name of the input file
+
+        groupby_index : list
+            The locations in a row of the fields the data is grouped by, empty if not grouped
+
+        needed : list
+            The locations of the fields used by the aggregates
+
+        start : int
+            The byte offset of the first row
+
+        end : int
+            The byte offset after the last row
+
+        approx : int, optional
+            The number of values top keeps per group, 0 for exact results (default is 0)
+
+        max_groups : int, optional
+            The number of groups at which reading stops (default is 100)
+
+        where : str, optional
+            The comparisons a row has to pass to be aggregated, compiled by each process (default is None)
 
     """
 
-    def __call__(self, parser, namespace, values, option_string = None):
+    # Variables
+    line_count = 1 # Line count tracker
+    predicate = Predicate(where, column_header) if where is not None else None # Predicate of the rows aggregated
 
-        # Check if order is in namespace from argparse
-        if not 'order' in namespace:
+    table = AggregateTable(order, column_header, input_file, groupby_index, approx)
+    table.error_log = []
 
-            # If not create a list in namespace called order
-            setattr(namespace, 'order', [])
+    with open(input_file, 'rb') as csv_file:
 
-        # Set previous to namespace.order
-        previous = namespace.order
+        for row in CsvScanner(csv_file).read_rows(needed, start, end):
 
-        # Append a list of values and argparse action
-        previous.append([self.dest, values])
+            if predicate is not None and not predicate.test(row):
 
-        # Set order to previous in namespace
-        setattr(namespace, 'order', previous)
+                line_count += 1
 
+                continue
 
-class DataBlock:
-    """ 
-    A class used to represent Data
+            table.add_row(row, line_count)
 
-    ...
+            line_count += 1
 
-    Attributes
-    ----------
-    column_header : list
-        A list containing the title of each column
-    
-    column_data : list
-        A list containing the data of each row
+            # Checking if cardinality is too high, the merged result will report it
+            if groupby_index and len(table.groups) >= max_groups:
 
-    input : str
-        The name of the file that is input
+                break
 
-    top_capped : boolean
-        A boolean to hold top's result has been capped
+    return table, line_count - 1
 
-    groupby_capped : boolean
-        A boolean to hold group-by result has been capped
 
-    Methods
-    -------
-    add_header(self, new_header)
-        Adds data to column_header
+def groupby_fields(arguments):
+    """
+        Gets the fields passed to group-by, which are separated by commas, empty if group-by was not passed.
 
-    add_data(self, new_data)
-        Adds data to column_data
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments
+
+    """
 
-    column_sum(self, column_name, groupby_values = None, groupby_index = -1)
-        Sums data of column
+    if arguments.groupby == -1:
 
-    column_min(self, column_name, groupby_values = None, groupby_index = -1)
-        Gets the minimum value of a column
+        return []
 
-    column_max(self, column_name, groupby_values = None, groupby_index =-1)
-        Gets the maximum value of a column
+    return arguments.groupby[0].split(',')
 
-    column_mean(self, column_name, groupby_values = None, groupby_index = -1)
-        Gets the mean(average) value of a column
 
-    column_count(self, groupby_values = None, groupby_index = -1)
-        Counts the records
+def groupby_indexes(arguments, column_header):
+    """
+        Gets the locations in the header of the fields passed to group-by.
 
-    column_group(self, arguments, groupby_arg)
-        Groups data by a field
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments
 
-    column_top(self, n, column_name)
-        Gets the top n values of a field
+        column_header : list
+            A list containing the title of each column
 
     """
 
+    return [column_header.index(x.lower()) for x in groupby_fields(arguments)]
+
+
+def approx_size(arguments):
+    """
+        Gets the number of values top keeps per group when --approx was passed, 0 for exact results.
 
-    def __init__(self, input_file):
-        """
         Parameters
         ----------
-        input_file : str
-            The name of the input file
+        arguments : Namespace
+            The parsed command line arguments
 
-        """
-    
-        self.column_header = []
-        self.column_data = []
-        self.input = input_file
-        self.top_capped = False
-        self.groupby_capped = False
-    
-    def add_header(self, new_header):
-        """
-        Fills the column header list with the data passed.
+    """
+
+    if not arguments.approx:
+
+        return 0
+
+    # Checking if the number of values is positive
+    if arguments.approx_size <= 0:
+
+        # Print on standard error
+        print('Error: --approx-size can only take values greater than 0.', file = sys.stderr)
+
+        exit(6)
+
+    return arguments.approx_size
+
+
+def needed_columns(arguments, data):
+    """
+        Finds the locations of the group-by field, of the fields compared by where and of every
+        field passed to an aggregate.
 
         Parameters
         ----------
-        new_header : str
-            The title of each column header
+        arguments : Namespace
+            The parsed command line arguments
 
-        """
+        data : DataBlock
+            The DataBlock holding the column headers
 
-        # Setting the strings from new_header to be lower case before adding them to column_header
-        self.column_header.extend(x.lower() for x in new_header)
+    """
 
-    def add_data(self, new_data):
-        """
-        Fills the column data list with the data passed.
+    # Variables
+    needed = set() # Set of the locations of the fields used
+
+    needed.update(groupby_indexes(arguments, data.column_header))
+
+    if arguments.where is not None:
+
+        needed.update(where_predicate(arguments, data).columns)
+
+    for ele in arguments.order:
+
+        if ele[0] == 'top' or ele[0] == 'percentile':
+
+            needed.add(data.column_header.index(ele[1][1].lower()))
+
+        elif ele[0] != 'count':
+
+            needed.add(data.column_header.index(ele[1][0].lower()))
+
+    return sorted(needed)
+
+
+def table_results(arguments, data, table):
+    """
+        Outputs the results of an AggregateTable built by stream_results or parallel_results,
+        writing its cube first if --build-cube was passed.
 
         Parameters
         ----------
-        new_data : str
-            The data of each row
+        arguments : Namespace
+            The parsed command line arguments
 
-        """
+        data : DataBlock
+            The DataBlock holding the column headers
+
+        table : AggregateTable
+            The accumulators of every group
+
+    """
+
+    if arguments.build_cube is not None:
+
+        cube = Cube()
+
+        cube.add_table(table, data.column_header)
+        cube.where = arguments.where
+
+        cube.write(arguments.build_cube, data.input)
+
+    write_output(*table_output(arguments, data.input, table))
+
+
+def cube_results(arguments):
+    """
+        Outputs the results of the query rolled up from the cube passed with --cube, returns False
+        without output if the cube is missing, out of date or does not hold the fields of the query.
+
+        The non-numeric values were reported when the cube was built and are not reported again.
+        Sums may differ in the last digits from reading the input file as the sums of the cells
+        of the cube are added together.
+
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments
+
+    """
+
+    cube = Cube()
+
+    if not cube.read(arguments.cube, arguments.input) or not cube.covers(arguments):
+
+        return False
+
+    table = AggregateTable(arguments.order, cube.header, arguments.input, groupby_indexes(arguments, cube.header))
+
+    cube.roll_up(table)
+
+    # Checking if cardinality is too high, the results without a group-by are a single group
+    if arguments.groupby != -1 and len(table.groups) >= arguments.max_groups:
+
+        # Print on standard error
+        print('Error: ' + arguments.input + ': The field ' + arguments.groupby[0] + ' has to many unique values.', file = sys.stderr)
+
+        exit(6)
+
+    write_output(*table_output(arguments, arguments.input, table))
+
+    return True
+
+
+def table_output(arguments, input_file, table):
+    """
+        Builds the output header and rows from the accumulators of an AggregateTable.
+
+        Parameters
+        ----------
+        arguments : Namespace
+            The aggregate arguments in order and the group-by field, as parsed from the command line
+
+        input_file : str
+            The name of the input file
+
+        table : AggregateTable
+            The accumulators of every group
+
+    """
+
+    # Variables
+    groupby_capped = False # Boolean for if group-by has been capped
+
+    if arguments.groupby != -1:
+
+        if len(table.groups) > arguments.group_cap:
+
+            # Print to standard error
+            print('Error:' + input_file + ': ' + arguments.groupby[0] + ' has been capped at ' + str(arguments.group_cap) + ' distinct values', file = sys.stderr)
+
+            groupby_capped = True
+
+        # Sort the group values in ascending order
+        groupby_header = sorted(table.groups)
+
+        result_data = table.group_results(groupby_header)
+
+        return build_output(arguments, result_data, groupby_header, table.top_capped, groupby_capped)
+
+    result_data, top_data = table.total_results()
+
+    return build_output(arguments, result_data, top_data, table.top_capped)
+
+
+def build_output(result_header, result_data, groupby_list = None, top_capped = False, groupby_capped = False):
+    """
+        Builds the output header and rows from the results of the aggregates.
+
+        Parameters
+        ----------
+        result_header : list
+            All the arguments passed at the command line in order
+
+        result_data : list
+            All the data based on the arguments passed on the command line
+
+        groupby_list : list, optional
+            Containing the unique values that the data is grouped by (default is None)
+
+        top_capped : boolean
+            Indicating if top's data has been capped (default is False)
+
+        groupby_capped : boolean
+            Indicating if group-by has been capped (default is False)
+
+    """
+
+    # Variables for holding column titles for output
+    min_title = 'min_'
+    max_title = 'max_'
+    mean_title = 'mean_'
+    sum_title = 'sum_'
+    top_title = 'top_'
+    distinct_title = 'distinct_'
+    var_title = 'var_'
+    stddev_title = 'stddev_'
+    median_title = 'median_'
+    percentile_title = 'percentile_'
+    count_title = 'count'
+
+    # List variables for holding the output header and data 
+    output_header = []
+    output_data = []
+    
+    # Checking if output will be in group-by format
+    if result_header.groupby != -1:
+        
+        # Variable
+        top_called = False # Flag for if top was called
+        top_index = -1 # Integer for top's location
+
+        for ele in result_header.order:
+
+            if ele[0] == 'top':
+
+                # Top was called
+                top_called = True
+
+                # Variables for splitting top's data from resulting data list
+                top_list = [] # List that will solely hold top's data
+                split_list = [] # List that will hold the left over data after top's has been extracted 
+
+                # Setting the location index for top command
+                top_index = result_header.order.index(ele)
+                
+                # Counter to track how many items from top have been added to ouput_data
+                top_counter = 0
+
+                # Splitting top's data from resulting data
+                top_list.extend(result_data[top_index])
+
+                for i in result_data:
+
+                    # Get the index location of i
+                    index = result_data.index(i)
+
+                    # Checking if index is equal to top_index
+                    if index == top_index:
+                        continue
+                    else:
+                        split_list.append(result_data[index])
+
+                    # End of for i in result_data:
+
+                result_data = split_list
+                break
+                
+                #End of if ele[0] == 'top':
+
+            # End of or ele in result_header.order:
+        
+        # Setting the first columns to the field names passed to group-by
+        for groupby_field in groupby_fields(result_header):
+
+            output_header.append(groupby_field.lower())
+
+        # Checking it top was called
+        if top_called:
+            
+            for ele_index, ele in enumerate(groupby_list):
+                
+                # Reset building_row each iteration
+                building_row = []
+
+                # Several group-by fields give a tuple of values
+                if isinstance(ele, tuple):
+                    building_row.extend(ele)
+                else:
+                    building_row.append(ele)
+        
+                for i in range(len(result_data)):
+
+                    building_row.append(result_data[i][ele_index])
+
+                    # End of for i in range(len(result_data)):
+
+                # Checking if top_counter is less than the length of top_list
+                if top_counter < len(top_list):
+
+                    # Insert element from top_list into temp_list after the group-by values
+                    building_row.insert(top_index + len(output_header), top_list[top_counter][0])
+
+                    top_counter += 1
+
+                else:
+
+                    # This means that top_list is smaller than resulting data list
+                    building_row.insert(top_index + len(output_header), None)
+
+                # Creating a 2D list
+                output_data.append(building_row)
+
+                # End of for ele in  groupby_list:
+
+            # Checking if top_counter is less than top_list
+            # This check is only true if top_list has more data than result_data
+            if top_counter < len(top_list):
+                
+                # Loop until top_counter is not less than length of top_list
+                while top_counter < len(top_list):
+
+                    # Reset building_row each iteration
+                    building_row = []
+
+                    # Building the reset of the rows
+                    for i in range(len(result_data)):
+
+                        # Checking if i value is equal to top_index + 1
+                        if i == top_index + 1:
+
+                            building_row.extend(top_list[top_counter])
+
+                            top_counter += 1
+
+                        else:
+
+                            building_row.append(None)
+
+                        # End of for i in range(len(result_data)):
+                
+                    output_data.append(building_row)
+
+                    # End of while top_counter < len(top_list):
+
+            # End of if top_called:
+        else:
+                
+            # Creating output_data list
+            for ele_index, ele in enumerate(groupby_list):
+                
+                # Reset building_row each iteration
+                building_row = []
+
+                # Several group-by fields give a tuple of values
+                if isinstance(ele, tuple):
+                    building_row.extend(ele)
+                else:
+                    building_row.append(ele)
+        
+                for i in range(len(result_data)):
+
+                    building_row.append(result_data[i][ele_index])
+
+                    # End of for i in range(len(result_data)):
+                
+                # Creating a 2D list
+                output_data.append(building_row)
+
+                # End of for ele in  groupby_list:
+
+        # End of if result_header.groupby != -1:
+    else:
+        # This code is for if no group-by was passed at command line
+
+        # Checking if top k data was passed
+        if groupby_list is not None:
+
+            # Variables
+            first_row = [] # Temporary list for bulding first row if output data
+            top_index = -1 # Integer for holding the location of top if it was called
+
+            # Result placement index
+            result_index = 0
+
+            # Checking if top was call on command line
+            for ele in result_header.order:
+
+                if ele[0] == 'top':
+
+                    # Setting the location index for top command
+                    top_index = result_header.order.index(ele)
+
+                # End of for ele in result_header.order:
+
+            # Building the first row of the output data by putting top's data in correct location
+            for order_ele in range(len(result_header.order)):
+
+                # Checking if order_ele is equal to top_index
+                if order_ele == top_index:
+                    first_row.extend(groupby_list[0])
+                
+                # Extending first_row list by a value from result_data
+                if result_index < len(result_data):
+                    first_row.extend(result_data[result_index])
+                    result_index += 1
+
+                # End of for order_ele in range(len(result_header.order)):
+
+            output_data.append(first_row)
+
+            # Building the rest of the rows for top k data
+            for row_data in range(1,len(groupby_list)):
+
+                # Reset building_row to be empty each iteration
+                building_row = []
+
+                for placement in range(len(result_header.order)):
+
+                    # Checking if placement is equal to top_index
+                    if placement != top_index:
+                        building_row.append(None)
+                    else:
+                        building_row.append(groupby_list[row_data][0])
+
+                    # End of for placement in range(len(result_header.order)):
+                    
+                output_data.append(building_row)
+
+                # End of for row_data in range(len(groupby_list)):
+        
+            # End of if groupby_list is not None:
+        else:   
+
+            output_data = result_data
+
+
+    # Build the headers based on the command line arguments in result_header.order
+    for ele in result_header.order:
+        
+        if ele[0] == 'count':
+
+            ele_val = count_title
+            output_header.append(ele_val.lower())
+        
+        elif ele[0] == 'sum':
+
+            ele_val = sum_title + ele[1][0]
+            output_header.append(ele_val.lower())
+
+        elif ele[0] == 'min':
+
+            ele_val = min_title + ele[1][0]
+            output_header.append(ele_val.lower())
+
+        elif ele[0] == 'max':
+
+            ele_val = max_title + ele[1][0]
+            output_header.append(ele_val.lower())
+            
+        elif ele[0] == 'mean':
+            ele_val = mean_title + ele[1][0]
+            output_header.append(ele_val.lower())
+
+        elif ele[0] == 'distinct':
+
+            ele_val = distinct_title + ele[1][0]
+            output_header.append(ele_val.lower())
+
+        elif ele[0] == 'var':
+
+            ele_val = var_title + ele[1][0]
+            output_header.append(ele_val.lower())
+
+        elif ele[0] == 'stddev':
+
+            ele_val = stddev_title + ele[1][0]
+            output_header.append(ele_val.lower())
+
+        elif ele[0] == 'median':
+
+            ele_val = median_title + ele[1][0]
+            output_header.append(ele_val.lower())
+
+        elif ele[0] == 'percentile':
+
+            ele_val = percentile_title + ele[1][0] + '_' + ele[1][1]
+            output_header.append(ele_val.lower())
+
+        elif ele[0] == 'top':
+
+            if top_capped:
+
+                ele_val = top_title + ele[1][1] + '_capped'
+
+            else:
+
+                ele_val = top_title + ele[1][1]
+    
+            output_header.append(ele_val.lower())
+        
+        # End of for ele in result_header.order:
+
+    # Adding _OTHER row to data if group-by was capped
+    if groupby_capped:
+        
+        other_row = [] # List to hold the other row split
+
+        other_row.append('_OTHER')
+
+        for i in range(1, len(output_header)):
+
+            other_row.append(None)
+
+        output_data.insert(result_header.group_cap, other_row)
+
+    return output_header, output_data
+
+
+def write_output(output_header, output_data):
+    """
+        Writes the output header and rows to standard output in CSV format.
+
+        Parameters
+        ----------
+        output_header : list
+            The title of each output column
+
+        output_data : list
+            The output rows
+
+    """
+
+    # Creating a writer object
+    writting = csv.writer(sys.stdout)
+
+    # Write the column headers
+    writting.writerow(output_header)
+
+    # Write the column rows
+    writting.writerows(output_data)
+
+class Organizer(argparse.Action):
+    """
+    A classed used to organized the command line arguments by the order
+    they were passed in.
+
+    """
+
+    def __call__(self, parser, namespace, values, option_string = None):
+
+        # Check if order is in namespace from argparse
+        if not 'order' in namespace:
+
+            # If not create a list in namespace called order
+            setattr(namespace, 'order', [])
+
+        # Set previous to namespace.order
+        previous = namespace.order
+
+        # Append a list of values and argparse action
+        previous.append([self.dest, values])
+
+        # Set order to previous in namespace
+        setattr(namespace, 'order', previous)
+
+
+class Predicate:
+    """
+    A class used to filter rows with the comparisons passed to --where
+
+    The comparisons have the form <field> <operator> <value>, with the operators =, ==, !=,
+    <, <=, > and >=, and are joined with and/or, and grouped with parentheses. Values can be
+    quoted. A comparison to a number converts the field to a float and is false for
+    non-numeric values (true for !=), other comparisons compare the strings. The text is
+    compiled once into nested functions called on each row.
+
+    ...
+
+    Attributes
+    ----------
+    text : str
+        The comparisons passed to --where
+
+    columns : list
+        The sorted locations of the fields compared
+
+    test : function
+        Returns True if a row passes the comparisons
+
+    Methods
+    -------
+    parse_or(self, tokens, column_header)
+        Compiles comparisons joined with or
+
+    parse_and(self, tokens, column_header)
+        Compiles comparisons joined with and
+
+    parse_comparison(self, tokens, column_header)
+        Compiles a single comparison or a group in parentheses
+
+    """
+
+    # Tokens of the comparisons: parentheses, operators, quoted values and words
+    TOKENS = re.compile(r'\s*(?:([()])|(<=|>=|!=|==|=|<|>)|"([^"]*)"|\'([^\']*)\'|([^\s()<>=!"\']+))')
+
+    # Functions of the operators
+    OPERATORS = {'=': operator.eq, '==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+    def __init__(self, text, column_header):
+        """
+        Parameters
+        ----------
+        text : str
+            The comparisons passed to --where
+
+        column_header : list
+            A list containing the title of each column
+
+        Exceptions
+        ----------
+        ValueError
+            If the comparisons can not be parsed or a field is not in the header.
+
+        """
+
+        # Variables
+        tokens = [] # List of [kind, text] of each token
+        position = 0 # Integer for the location in text of the next token
+
+        self.text = text
+        self.columns = set()
+
+        while text[position:].strip():
+
+            match = self.TOKENS.match(text, position)
+
+            if match is None:
+
+                raise ValueError('can not parse \'' + text[position:].strip() + '\'')
+
+            position = match.end()
+
+            if match.group(1):
+
+                tokens.append(['paren', match.group(1)])
+
+            elif match.group(2):
+
+                tokens.append(['operator', match.group(2)])
+
+            elif match.group(3) is not None or match.group(4) is not None:
+
+                tokens.append(['quoted', match.group(3) if match.group(3) is not None else match.group(4)])
+
+            else:
+
+                tokens.append(['word', match.group(5)])
+
+            # End of while text[position:].strip():
+
+        tokens.reverse()
+
+        self.test = self.parse_or(tokens, column_header)
+
+        # Checking if every token was used
+        if tokens:
+
+            raise ValueError('unexpected \'' + tokens[-1][1] + '\'')
+
+        self.columns = sorted(self.columns)
+
+    def parse_or(self, tokens, column_header):
+        """
+        Compiles comparisons joined with or, tokens holds the tokens left in reverse order.
+
+        Parameters
+        ----------
+        tokens : list
+            The tokens left, the next one last
+
+        column_header : list
+            A list containing the title of each column
+
+        """
+
+        test = self.parse_and(tokens, column_header)
+
+        while tokens and tokens[-1][0] == 'word' and tokens[-1][1].lower() == 'or':
+
+            tokens.pop()
+
+            test = (lambda first, second: lambda row: first(row) or second(row))(test, self.parse_and(tokens, column_header))
+
+        return test
+
+    def parse_and(self, tokens, column_header):
+        """
+        Compiles comparisons joined with and.
+
+        Parameters
+        ----------
+        tokens : list
+            The tokens left, the next one last
+
+        column_header : list
+            A list containing the title of each column
+
+        """
+
+        test = self.parse_comparison(tokens, column_header)
+
+        while tokens and tokens[-1][0] == 'word' and tokens[-1][1].lower() == 'and':
+
+            tokens.pop()
+
+            test = (lambda first, second: lambda row: first(row) and second(row))(test, self.parse_comparison(tokens, column_header))
+
+        return test
+
+    def parse_comparison(self, tokens, column_header):
+        """
+        Compiles a single comparison or a group of comparisons in parentheses.
+
+        Parameters
+        ----------
+        tokens : list
+            The tokens left, the next one last
+
+        column_header : list
+            A list containing the title of each column
+
+        """
+
+        # Checking if the comparison is a group in parentheses
+        if tokens and tokens[-1] == ['paren', '(']:
+
+            tokens.pop()
+
+            test = self.parse_or(tokens, column_header)
+
+            if not tokens or tokens.pop() != ['paren', ')']:
+
+                raise ValueError('missing \')\'')
+
+            return test
+
+        # Checking if the comparison is complete
+        if len(tokens) < 3 or tokens[-1][0] not in ('word', 'quoted') or tokens[-2][0] != 'operator' or tokens[-3][0] not in ('word', 'quoted'):
+
+            raise ValueError('expected <field> <operator> <value>')
+
+        field = tokens.pop()[1]
+        compare = self.OPERATORS[tokens.pop()[1]]
+        kind, value = tokens.pop()
+
+        if field.lower() not in column_header:
+
+            raise ValueError('no field with name \'' + field + '\' found')
+
+        index = column_header.index(field.lower())
+        self.columns.add(index)
+
+        number = None
+
+        # Checking if the value is a number
+        if kind == 'word':
+
+            try:
+
+                number = float(value)
+
+            except ValueError:
+
+                pass
+
+        if number is None:
+
+            # Checking if the operator needs a number
+            if compare not in (operator.eq, operator.ne):
+
+                raise ValueError('\'' + value + '\' is not a number')
+
+            def test(row):
+
+                try:
+
+                    return compare(row[index], value)
+
+                except IndexError:
+
+                    return compare('', value)
+
+            return test
+
+        def test(row):
+
+            try:
+
+                return compare(float(row[index]), number)
+
+            except (ValueError, IndexError):
+
+                # Non-numeric values only pass !=
+                return compare is operator.ne
+
+        return test
+
+
+class CsvScanner:
+    """
+    A class used to read the rows of a CSV file from a memory map of its bytes
+
+    Rows are split on the bytes and only the fields that are needed are decoded to
+    strings. Lines holding quotes are left to the csv module.
+
+    ...
+
+    Attributes
+    ----------
+    file : file
+        The input file opened in binary mode
+
+    map : mmap
+        The memory map of the file, None if the file is empty
+
+    position : int
+        The byte offset after the header
+
+    Methods
+    -------
+    read_header(self)
+        Reads the header row
+
+    read_rows(self, needed, start = None, end = None)
+        Reads the data rows decoding only the needed fields
+
+    read_csv(self)
+        Reads the data rows with the csv module
+
+    """
+
+
+    def __init__(self, csv_file):
+        """
+        Parameters
+        ----------
+        csv_file : file
+            The input file opened in binary mode
+
+        """
+
+        self.file = csv_file
+        self.map = None
+        self.position = 0
+
+        # Checking if the file has any data, empty files can not be memory mapped
+        if os.fstat(csv_file.fileno()).st_size > 0:
+
+            self.map = mmap.mmap(csv_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read_header(self):
+        """
+        Reads the header row, skipping the byte order mark if the file starts with one.
+
+        """
+
+        # Checking if the file is empty
+        if self.map is None:
+
+            return []
+
+        self.map.seek(0)
+
+        header = self.map.readline().decode('utf-8-sig')
+        self.position = self.map.tell()
+
+        return next(csv.reader([header]), [])
+
+    def read_rows(self, needed, start = None, end = None):
+        """
+        Yields the data rows, each row holds the decoded fields at the locations in needed
+        and empty strings before them.
+
+        Parameters
+        ----------
+        needed : list
+            The sorted locations of the fields to decode
+
+        start : int, optional
+            The byte offset of the first row (default is after the header)
+
+        end : int, optional
+            The byte offset after the last row (default is the end of the file)
+
+        """
+
+        # Checking if the file is empty
+        if self.map is None:
+
+            return
+
+        # Variables
+        width = needed[-1] + 1 if needed else 0 # Integer for the number of fields of each row
+        readline = self.map.readline
+
+        self.map.seek(self.position if start is None else start)
+
+        if end is None:
+
+            end = len(self.map)
+
+        while self.map.tell() < end:
+
+            line = readline()
+
+            # Checking if the line holds quoted fields
+            if b'"' in line:
+
+                # Joining the lines of quoted fields holding newlines
+                while line.count(b'"') % 2 and self.map.tell() < len(self.map):
+
+                    line += readline()
+
+                row = next(csv.reader([line.decode('utf-8')]), [])
+
+                yield row + [''] * (width - len(row))
+
+                continue
+
+            fields = line.rstrip(b'\r\n').split(b',', width)
+            row = [''] * width
+
+            for i in needed:
+
+                if i < len(fields):
+                    row[i] = fields[i].decode('utf-8')
+
+            yield row
+
+            # End of while self.map.tell() < end:
+
+    def read_csv(self):
+        """
+        Yields the data rows decoded and split by the csv module.
+
+        """
+
+        # Checking if the file is empty
+        if self.map is None:
+
+            return
+
+        self.file.seek(self.position)
+
+        yield from csv.reader(io.TextIOWrapper(self.file, encoding='utf-8', newline=''), delimiter=',')
+
+
+class DataColumn:
+    """
+    A class used to represent the data of a single column
+
+    The values are dictionary encoded, each distinct string is stored once and every
+    row holds the integer code of its value.
+
+    ...
+
+    Attributes
+    ----------
+    codes : array
+        The code of the value of each row
+
+    values : list
+        The distinct values of the column in the order they were first seen
+
+    value_codes : dict
+        A dictionary mapping each distinct value to its code
+
+    numbers : array
+        The value of each row as a float, 0.0 where the value is non-numeric (None until parsed)
+
+    valid : bytearray
+        1 for each row with a numeric value and 0 otherwise (None until parsed)
+
+    Methods
+    -------
+    add_values(self, values)
+        Adds the values of the next rows
+
+    value_at(self, row)
+        Gets the string value of a row
+
+    parse_numbers(self)
+        Converts the column to floats
+
+    """
+
+
+    def __init__(self):
+
+        self.codes = array('i')
+        self.values = []
+        self.value_codes = {}
+        self.numbers = None
+        self.valid = None
+
+    def add_values(self, values):
+        """
+        Adds the values of the next rows to the column.
+
+        Parameters
+        ----------
+        values : list
+            The value of each row
+
+        """
+
+        # Adding the values not seen before in the order they appear
+        for value in dict.fromkeys(values):
+
+            if value not in self.value_codes:
+
+                self.value_codes[value] = len(self.values)
+                self.values.append(value)
+
+        self.codes.extend(map(self.value_codes.__getitem__, values))
+
+    def value_at(self, row):
+        """
+        Gets the string value of a row.
+
+        Parameters
+        ----------
+        row : int
+            The location of the row in the column
+
+        """
+
+        return self.values[self.codes[row]]
+
+    def parse_numbers(self):
+        """
+        Converts every row of the column to a float, each distinct value is only converted once
+        and the result is kept for later calls.
+
+        """
+
+        # Checking if the column has already been converted
+        if self.numbers is not None:
+
+            return
+
+        # Variables
+        parsed = [] # List holding the float of each distinct value, 0.0 if non-numeric
+        flags = bytearray() # 1 for each distinct value that is numeric and 0 otherwise
+
+        for value in self.values:
+
+            # Try to convert the value from a string to a float
+            try:
+
+                parsed.append(float(value))
+                flags.append(1)
+
+            except ValueError:
+
+                parsed.append(0.0)
+                flags.append(0)
+
+        # Looking up the converted value of each row's code
+        self.numbers = array('d', map(parsed.__getitem__, self.codes))
+        self.valid = bytearray(map(flags.__getitem__, self.codes))
+
+
+class DataBlock:
+    """ 
+    A class used to represent Data
+
+    The data is stored by column, see DataColumn.
+
+    ...
+
+    Attributes
+    ----------
+    column_header : list
+        A list containing the title of each column
+    
+    columns : list
+        A list containing the DataColumn of each column, None for columns that are not stored
+
+    row_count : int
+        The number of rows added
+
+    input : str
+        The name of the file that is input
+
+    cache_map : mmap
+        The memory mapped cache file the columns were read from (None if read from the input file)
+
+    row_lines : array
+        The line number of each row when rows were filtered out by --where (None if every row is stored)
+
+    Methods
+    -------
+    add_header(self, new_header)
+        Adds data to column_header
+
+    add_data(self, new_data)
+        Adds a row of data to the columns
+
+    add_rows(self, new_rows)
+        Adds a batch of rows to the columns
+
+    add_reader(self, csv_reader, predicate = None)
+        Adds every row of a reader
+
+    select(self, predicate)
+        Gets a DataBlock of the rows passing a Predicate
+
+    project_columns(self, needed)
+        Stops storing the columns that are not needed
+
+    write_cache(self, cache_file)
+        Writes the columns to a binary cache file
+
+    read_cache(self, cache_file)
+        Reads the columns from a binary cache file
+
+    """
+
+
+    def __init__(self, input_file):
+        """
+        Parameters
+        ----------
+        input_file : str
+            The name of the input file
+
+        """
+    
+        self.column_header = []
+        self.columns = []
+        self.row_count = 0
+        self.input = input_file
+        self.cache_map = None
+        self.row_lines = None
+    
+    def add_header(self, new_header):
+        """
+        Fills the column header list with the data passed.
+
+        Parameters
+        ----------
+        new_header : str
+            The title of each column header
+
+        """
+
+        # Setting the strings from new_header to be lower case before adding them to column_header
+        self.column_header.extend(x.lower() for x in new_header)
+
+        # Creating an empty column for each header
+        self.columns.extend(DataColumn() for x in new_header)
+
+    def add_data(self, new_data):
+        """
+        Adds the value of each field of a row to its column.
+
+        Parameters
+        ----------
+        new_data : str
+            The data of each row
+
+        """
+
+        self.add_rows([new_data])
+
+    def add_rows(self, new_rows):
+        """
+        Adds a batch of rows, one column at a time.
+
+        Rows shorter than the header are filled with empty values.
+
+        Parameters
+        ----------
+        new_rows : list
+            The data of each row
+
+        """
+
+        # Variables
+        width = len(self.columns) # Integer for the number of columns
+
+        # Checking if any row is missing fields
+        if new_rows and min(map(len, new_rows)) < width:
+
+            new_rows = [x + [''] * (width - len(x)) for x in new_rows]
+
+        # Finding the locations of the stored columns
+        indexes = [i for i in range(width) if self.columns[i] is not None]
+
+        # Splitting the rows into the values of each stored column
+        if len(indexes) == width:
+
+            split_values = zip(*new_rows)
+
+        elif len(indexes) == 1:
+
+            split_values = [list(map(itemgetter(indexes[0]), new_rows))]
+
+        elif indexes:
+
+            split_values = zip(*map(itemgetter(*indexes), new_rows))
+
+        else:
+
+            split_values = []
+
+        for i, values in zip(indexes, split_values):
+
+            self.columns[i].add_values(values)
+
+        self.row_count += len(new_rows)
+
+    def add_reader(self, csv_reader, predicate = None):
+        """
+        Adds every row of a reader in batches, so each column is filled a batch at a time.
+
+        Parameters
+        ----------
+        csv_reader : reader
+            The rows to add
+
+        predicate : Predicate, optional
+            Only the rows passing its comparisons are added, keeping their line numbers in
+            row_lines (default is None)
+
+        """
+
+        # Variables
+        line_count = 0 # Integer for the number of rows read
+
+        if predicate is not None and self.row_lines is None:
+
+            self.row_lines = array('q')
+
+        rows = list(islice(csv_reader, 4096))
+
+        while rows:
+
+            # Dropping the rows that do not pass before any value is stored
+            if predicate is not None:
+
+                kept = [i for i in range(len(rows)) if predicate.test(rows[i])]
+
+                self.row_lines.extend(line_count + i + 1 for i in kept)
+
+                line_count += len(rows)
+
+                rows = [rows[i] for i in kept]
+
+            self.add_rows(rows)
+
+            rows = list(islice(csv_reader, 4096))
+
+    def select(self, predicate):
+        """
+        Gets a new DataBlock holding the rows that pass a Predicate, used when the rows were
+        stored before they could be filtered, such as from a cache.
+
+        Parameters
+        ----------
+        predicate : Predicate
+            The comparisons the rows have to pass
+
+        """
+
+        # Variables
+        width = len(self.column_header) # Integer for the number of columns
+        selected = [] # List of the locations of the rows passing
+
+        data = DataBlock(self.input)
+        data.column_header = self.column_header
+
+        # Building each row from only the columns compared
+        compared = [[i, self.columns[i]] for i in predicate.columns]
+        row = [''] * width
+
+        for i in range(self.row_count):
+
+            for index, column in compared:
+
+                row[index] = column.values[column.codes[i]]
+
+            if predicate.test(row):
+
+                selected.append(i)
+
+        for column in self.columns:
+
+            if column is None:
+
+                data.columns.append(None)
+
+                continue
+
+            new_column = DataColumn()
+
+            new_column.add_values([column.values[column.codes[i]] for i in selected])
+
+            data.columns.append(new_column)
+
+        data.row_count = len(selected)
+        data.row_lines = array('q', [self.row_lines[i] if self.row_lines is not None else i + 1 for i in selected])
+
+        return data
+
+    def project_columns(self, needed):
+        """
+        Keeps only the columns at the locations in needed, the values of the other
+        columns are not stored by add_rows. Must be called before any rows are added.
+
+        Parameters
+        ----------
+        needed : list
+            The locations of the columns to store
+
+        """
+
+        for i in range(len(self.columns)):
+
+            if i not in needed:
+
+                self.columns[i] = None
+
+    def write_cache(self, cache_file):
+        """
+        Writes the header and columns to a binary cache file, keyed by the size and
+        modification time of the input file.
+
+        The file starts with CACHE_MAGIC and the length of a JSON description of the
+        columns, followed by the JSON and the raw arrays of every column aligned to 8 bytes.
+        Every column is converted to floats so numeric columns are stored typed. Nothing
+        is written when project_columns has left out some columns.
+
+        Parameters
+        ----------
+        cache_file : str
+            The name of the cache file
+
+        """
+
+        # Variables
+        blocks = [] # List of the raw arrays in the order they are written
+        columns = [] # List describing each column
+        offset = 0 # Integer for the location of the next array after the description
+
+        # Checking if only some columns were stored, later queries need every column
+        if None in self.columns:
+
+            return
+
+        source = os.stat(self.input)
+
+        for column in self.columns:
+
+            column.parse_numbers()
+
+            description = {'values': column.values, 'codes': offset}
+            blocks.append(column.codes.tobytes())
+            offset += len(blocks[-1])
+
+            # Checking if the column has numeric values worth storing
+            if column.valid.find(1) != -1:
+
+                description['numbers'] = offset
+                blocks.append(column.numbers.tobytes())
+                offset += len(blocks[-1])
+
+                description['valid'] = offset
+                blocks.append(bytes(column.valid))
+                offset += len(blocks[-1])
+
+            # Padding the arrays to 8 bytes
+            if offset % 8:
+
+                blocks.append(bytes(8 - offset % 8))
+                offset += len(blocks[-1])
+
+            columns.append(description)
+
+            # End of for column in self.columns:
+
+        metadata = json.dumps({'size': source.st_size, 'mtime': source.st_mtime_ns, 'byteorder': sys.byteorder,
+            'header': self.column_header, 'rows': self.row_count, 'columns': columns}).encode('utf-8')
+
+        # Padding the description so the arrays start aligned
+        metadata += b' ' * (-(len(CACHE_MAGIC) + 8 + len(metadata)) % 8)
+
+        # Writing to a temporary file first so other runs never see a partial cache
+        with open(cache_file + '.tmp', 'wb') as output_file:
+
+            output_file.write(CACHE_MAGIC)
+            output_file.write(len(metadata).to_bytes(8, 'little'))
+            output_file.write(metadata)
+
+            for block in blocks:
+
+                output_file.write(block)
+
+        os.replace(cache_file + '.tmp', cache_file)
+
+    def read_cache(self, cache_file):
+        """
+        Fills the header and columns from a cache file written by write_cache, memory
+        mapping the arrays instead of copying them.
+
+        Returns False if the cache file does not exist, is empty or corrupt, or does not
+        match the current size and modification time of the input file.
+
+        Parameters
+        ----------
+        cache_file : str
+            The name of the cache file
+
+        """
+
+        # Checking if there is a cache file
+        if not os.path.exists(cache_file):
+
+            return False
+
+        # Variables
+        cache_map = None # The memory map of the cache file
+        arrays = None # memoryview of the arrays of the cache file
+        column = None # The DataColumn being read
+        columns = [] # List of the DataColumns read
+        loaded = False # Boolean for if every check passed
+
+        # An empty, truncated or corrupt cache is treated as missing so the input file is read again
+        try:
+
+            with open(cache_file, 'rb') as input_file:
+
+                cache_map = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            # Checking if the file was written by write_cache
+            if cache_map[:len(CACHE_MAGIC)] != CACHE_MAGIC:
+
+                return False
+
+            start = len(CACHE_MAGIC) + 8
+            end = start + struct.unpack('<Q', cache_map[len(CACHE_MAGIC):start])[0]
+            metadata = json.loads(cache_map[start:end])
+
+            source = os.stat(self.input)
+
+            # Checking if the input file has changed since the cache was written
+            if metadata['size'] != source.st_size or metadata['mtime'] != source.st_mtime_ns or metadata['byteorder'] != sys.byteorder:
+
+                return False
+
+            row_count = metadata['rows']
+            columns = []
+
+            # Viewing the arrays of the cache file
+            arrays = memoryview(cache_map)[end:]
+
+            for description in metadata['columns']:
+
+                column = DataColumn()
+
+                column.values = description['values']
+                column.value_codes = dict((x, i) for i, x in enumerate(column.values))
+
+                codes = description['codes']
+                column.codes = arrays[codes:codes + row_count * column.codes.itemsize].cast('i')
+
+                if 'numbers' in description:
+
+                    numbers = description['numbers']
+                    column.numbers = arrays[numbers:numbers + row_count * 8].cast('d')
+
+                    valid = description['valid']
+                    column.valid = bytes(arrays[valid:valid + row_count])
+
+                    # Checking if the numbers were cut short
+                    if len(column.numbers) != row_count or len(column.valid) != row_count:
+
+                        return False
+
+                # Checking if the codes were cut short
+                if len(column.codes) != row_count:
+
+                    return False
+
+                columns.append(column)
+
+                # End of for description in metadata['columns']:
+
+            # Checking if there is a column for every field of the header
+            if len(columns) != len(metadata['header']):
+
+                return False
+
+            loaded = True
+
+        except (ValueError, TypeError, KeyError, IndexError, struct.error):
+
+            return False
+
+        finally:
+
+            # Closing the map unless its arrays are kept, the views of it are dropped first as a map can not be closed while they exist
+            if not loaded and cache_map is not None:
+
+                arrays = column = columns = None
+
+                cache_map.close()
+
+        self.column_header = metadata['header']
+        self.row_count = row_count
+        self.columns = columns
+        self.cache_map = cache_map
+
+        return True
+
+
+class AggregateTable:
+    """
+    A class used to accumulate every aggregate for every group in a single pass
+
+    ...
+
+    Attributes
+    ----------
+    plan : list
+        A list of [slot, aggregate, column_index, column_name, extra] for each element of the arguments order,
+        extra is k for top and the location in numeric_columns for the numeric aggregates, median and
+        percentile have the quantile between 0 and 1 as a sixth element
+
+    numeric_columns : list
+        A list of [column_index, column_name] for each column used by a numeric aggregate, each is
+        converted once per row
+
+    input : str
+        The name of the file that is input
+
+    groupby_index : list
+        The locations in a row of the fields the data is grouped by, empty if not grouped
+
+    group_key : itemgetter
+        Gets the value of the group of a row, a tuple of values when grouped by several fields
+
+    groups : dict
+        A dictionary mapping each group value to its list of accumulators
+
+    non_numeric : list
+        The number of non-numeric values found in each of numeric_columns
+
+    error_log : list
+        When not None, non-numeric values are kept here as [line number, numeric column, value] instead of printed
+
+    top_capped : boolean
+        A boolean to hold top's result has been capped
+
+    approx : int
+        The number of values top keeps per group, 0 for exact top and distinct results
+
+    Methods
+    -------
+    new_group(self)
+        Creates the empty accumulators of a group
+
+    load_groups(self, groups)
+        Sets the accumulators of every group from a saved list
+
+    group_for(self, key)
+        Gets the accumulators of a group
+
+    add_row(self, row, line_number)
+        Adds the values of a row to the accumulators of its group
+
+    non_numeric_error(self, position, line_number, value)
+        Reports a non-numeric value found in a numeric column
+
+    merge(self, other)
+        Adds the accumulators of another AggregateTable
+
+    prune_top(self, slot, size)
+        Reduces the frequencies of approximate top to at most size values
+
+    add_distinct(self, slot, value)
+        Adds a value to the accumulator of distinct
+
+    distinct_result(self, slot)
+        Gets the number of distinct values of an accumulator of distinct
+
+    add_moments(self, slot, values)
+        Adds values to the accumulator of var and stddev
+
+    add_quantiles(self, slot, values)
+        Adds values to the sketch of median and percentile
+
+    compress_quantiles(self, slot)
+        Merges the values and centroids of a quantile sketch into fewer centroids
+
+    variance_result(self, slot)
+        Gets the sample variance of an accumulator of var and stddev
+
+    quantile_result(self, slot, quantile)
+        Gets a quantile of a quantile sketch
+
+    add_block(self, data)
+        Adds every row of a DataBlock to the accumulators
+
+    block_numbers(self, data)
+        Gets the numeric columns of a DataBlock, reporting their non-numeric values
+
+    add_block_numpy(self, data, code_groups, group_codes, numeric_columns)
+        Adds every row of a DataBlock to the accumulators using NumPy
+
+    group_results(self, groupby_values)
+        Gets the results of every aggregate for each group
+
+    total_results(self)
+        Gets the results of every aggregate when the data is not grouped
+
+    top_results(self, step, groupby_values)
+        Gets the top k values of each group
+
+    format_top(self, formatter_list, k_val)
+        Formats a list of (value, frequency) pairs as top's output string
+
+    """
+
+
+    def __init__(self, order, column_header, input_file, groupby_index = -1, approx = 0):
+        """
+        Parameters
+        ----------
+        order : list
+            The aggregate arguments in the order they were passed at the command line
+
+        column_header : list
+            A list containing the title of each column
+
+        input_file : str
+            The name of the input file
+
+        groupby_index : int or list, optional
+            The location in a row of the field the data is grouped by, or the locations of
+            several fields (default is -1)
+
+        approx : int, optional
+            The number of values top keeps per group with approximate top and distinct
+            results, 0 for exact results (default is 0)
+
+        """
+
+        # A single location is the same as a list of one location
+        if isinstance(groupby_index, int):
+
+            groupby_index = [groupby_index] if groupby_index != -1 else []
+
+        self.plan = []
+        self.numeric_columns = []
+        self.input = input_file
+        self.groupby_index = list(groupby_index)
+        self.group_key = itemgetter(*self.groupby_index) if self.groupby_index else None
+        self.groups = {}
+        self.non_numeric = []
+        self.error_log = None
+        self.top_capped = False
+        self.approx = approx
+
+        # Building the plan for each aggregate, slot 0 of a group holds its record count
+        for ele in order:
+
+            if ele[0] == 'count':
+
+                self.plan.append([len(self.plan) + 1, 'count', -1, ''])
+
+            elif ele[0] == 'top':
+
+                # Checking if k passed is zero or negative
+                if int(ele[1][0]) <= 0:
+
+                    # Print on standard error
+                    print('Error: ' + self.input + ' top k can only take values greater than 0.', file = sys.stderr)
+
+                    exit(6)
+
+                self.plan.append([len(self.plan) + 1, 'top', column_header.index(ele[1][1].lower()), ele[1][1], int(ele[1][0])])
+
+            elif ele[0] == 'distinct':
+
+                self.plan.append([len(self.plan) + 1, 'distinct', column_header.index(ele[1][0].lower()), ele[1][0], None])
+
+            else:
+
+                field = ele[1][1] if ele[0] == 'percentile' else ele[1][0]
+                column_index = column_header.index(field.lower())
+
+                # Finding the location of the column in numeric_columns, adding it the first time it is used
+                positions = [x[0] for x in self.numeric_columns]
+
+                if column_index not in positions:
+
+                    positions.append(column_index)
+                    self.numeric_columns.append([column_index, field])
+                    self.non_numeric.append(0)
+
+                self.plan.append([len(self.plan) + 1, ele[0], column_index, field, positions.index(column_index)])
+
+                if ele[0] == 'median':
+
+                    self.plan[-1].append(0.5)
+
+                elif ele[0] == 'percentile':
+
+                    # Checking if p passed is a number from 0 to 100
+                    try:
+
+                        percentile = float(ele[1][0])
+
+                    except ValueError:
+
+                        percentile = -1.0
+
+                    if not 0 <= percentile <= 100:
+
+                        # Print on standard error
+                        print('Error: ' + self.input + ' percentile p can only take values from 0 to 100.', file = sys.stderr)
+
+                        exit(6)
+
+                    self.plan[-1].append(percentile / 100)
+
+            # End of for ele in order:
+
+        # Reusable list holding the converted values of the numeric columns of the current row
+        self.row_numbers = [None] * len(self.numeric_columns)
+
+    def new_group(self):
+        """
+        Creates the empty accumulators of a group.
+
+        Slot 0 holds the number of records, each numeric aggregate holds
+        [sum, number of numeric values, minimum, maximum] and top holds a
+        dictionary of frequencies. Distinct holds a dictionary with the values
+        seen as keys, or the registers of a HyperLogLog sketch with approx.
+        Var and stddev hold [number of numeric values, mean, sum of squared
+        differences from the mean], median and percentile hold the sketch
+        [centroid means, centroid weights, values not compressed yet, minimum, maximum].
+
+        """
+
+        group = [0]
+
+        for step in self.plan:
+
+            if step[1] == 'count':
+
+                group.append(None)
+
+            elif step[1] == 'var' or step[1] == 'stddev':
+
+                group.append([0, 0.0, 0.0])
+
+            elif step[1] == 'median' or step[1] == 'percentile':
+
+                group.append([[], [], [], None, None])
+
+            elif step[1] == 'top':
+
+                group.append({})
+
+            elif step[1] == 'distinct':
+
+                group.append(bytearray(1 << HLL_PRECISION) if self.approx else {})
+
+            else:
+
+                group.append([0.0, 0, None, None])
+
+        return group
+
+    def load_groups(self, groups):
+        """
+        Sets the accumulators of every group from a list of [group value, accumulators]
+        read back from JSON, where the values of several group-by fields are lists.
+
+        Parameters
+        ----------
+        groups : list
+            The value and the accumulators of each group
+
+        """
+
+        self.groups = {}
+
+        for key, group in groups:
+
+            for step in self.plan:
+
+                # The registers of approximate distinct counts are saved as lists
+                if step[1] == 'distinct' and self.approx:
+
+                    group[step[0]] = bytearray(group[step[0]])
+
+            self.groups[tuple(key) if isinstance(key, list) else key] = group
+
+    def group_for(self, key):
+        """
+        Gets the accumulators of a group, creating them the first time the group is seen.
+
+        Parameters
+        ----------
+        key : str
+            The value of the group, None if the data is not grouped
+
+        """
+
+        group = self.groups.get(key)
+
+        if group is None:
+
+            group = self.new_group()
+            self.groups[key] = group
+
+        return group
+
+    def add_row(self, row, line_number):
+        """
+        Adds the values of a row to the accumulators of the group it belongs to.
+
+        Parameters
+        ----------
+        row : list
+            The data of the row
+
+        line_number : int
+            The line number used for reporting non-numeric values
+
+        Exceptions
+        ----------
+        ValueError
+            If a column passed contains values that can not be converted from string to float
+            the message 'Error: <input file>:<line number>: can't compute <column_name> on non-numeric value '<value>'' 
+            will print.
+
+            If more than 100 of these errors are found in a single column then 
+            the message: 'Error: <input>:more than 100 non-numeric values found in aggreate column '<column_name>''
+            will print and the program will extit.
+
+        """
+
+        # Finding the group of the row
+        if self.group_key is not None:
+
+            key = self.group_key(row)
+
+        else:
+
+            key = None
+
+        group = self.group_for(key)
+
+        group[0] += 1
+
+        # Converting each numeric column once for all the aggregates using it
+        row_numbers = self.row_numbers
+
+        for position in range(len(self.numeric_columns)):
+
+            value = row[self.numeric_columns[position][0]]
+
+            # Try to convert the value from a string to a float
+            try:
+
+                row_numbers[position] = float(value)
+
+            except ValueError:
+
+                row_numbers[position] = None
+
+                # Checking if the error should be kept for reporting later
+                if self.error_log is not None:
+
+                    if len(self.error_log) <= 101 * len(self.numeric_columns):
+                        self.error_log.append([line_number, position, value])
+
+                    continue
+
+                self.non_numeric_error(position, line_number, value)
+
+        for step in self.plan:
+
+            aggregate = step[1]
+
+            if aggregate == 'count':
+
+                continue
+
+            slot = group[step[0]]
+
+            if aggregate == 'top':
+
+                value = row[step[2]]
+                slot[value] = slot.get(value, 0) + 1
+
+                # Checking if approximate top holds too many values
+                if self.approx and len(slot) > 2 * self.approx:
+
+                    self.prune_top(slot, self.approx)
+
+                continue
+
+            if aggregate == 'distinct':
+
+                self.add_distinct(slot, row[step[2]])
+
+                continue
+
+            data_value = row_numbers[step[4]]
+
+            # Checking if the value is non-numeric
+            if data_value is None:
+
+                continue
+
+            if aggregate == 'var' or aggregate == 'stddev':
+
+                self.add_moments(slot, (data_value,))
+
+                continue
+
+            if aggregate == 'median' or aggregate == 'percentile':
+
+                self.add_quantiles(slot, (data_value,))
+
+                continue
+
+            slot[0] = slot[0] + data_value
+            slot[1] += 1
+
+            if slot[2] is None or data_value < slot[2]:
+                slot[2] = data_value
+
+            if slot[3] is None or data_value > slot[3]:
+                slot[3] = data_value
+
+            # End of for step in self.plan:
+
+    def non_numeric_error(self, position, line_number, value):
+        """
+        Reports a non-numeric value found in a numeric column.
+
+        Parameters
+        ----------
+        position : int
+            The location of the column in numeric_columns
+
+        line_number : int
+            The line number of the value
+
+        value : str
+            The non-numeric value
+
+        Exceptions
+        ----------
+        ValueError
+            The message 'Error: <input file>:<line number>: can't compute <column_name> on non-numeric value '<value>'' 
+            will print.
+
+            If more than 100 of these errors are found in a single column then 
+            the message: 'Error: <input>:more than 100 non-numeric values found in aggreate column '<column_name>''
+            will print and the program will extit.
+
+        """
+
+        column_name = self.numeric_columns[position][1]
+
+        # Print on standard error
+        print('Error: ' + self.input + ':' + str(line_number) + ': can\'t compute ' + column_name + ' on non-numeric value \'' + value + '\'', file = sys.stderr)
+        self.non_numeric[position] += 1
+
+        if self.non_numeric[position] > 100:
+
+            # Print on standard error
+            print('Error: ' + self.input + ':more than 100 non-numeric values found in aggregate column \'' + column_name + '\'', file = sys.stderr)
+            exit(7)
+
+    def merge(self, other):
+        """
+        Adds the accumulators of another AggregateTable built with the same plan.
+
+        The sums of the two tables are added and the accumulators of var and stddev are
+        combined with Chan's formula, so sums, means, var and stddev may differ in the last
+        digits from a single table of every row. Quantile sketches of more than TDIGEST_BUFFER
+        values are merged centroid by centroid and may differ by the accuracy of the sketch.
+
+        Parameters
+        ----------
+        other : AggregateTable
+            The table to add
+
+        """
+
+        for key, other_group in other.groups.items():
+
+            group = self.group_for(key)
+
+            group[0] += other_group[0]
+
+            for step in self.plan:
+
+                if step[1] == 'count':
+
+                    continue
+
+                slot = group[step[0]]
+                other_slot = other_group[step[0]]
+
+                if step[1] == 'top':
+
+                    for value, frequency in other_slot.items():
+                        slot[value] = slot.get(value, 0) + frequency
+
+                    if self.approx:
+
+                        self.prune_top(slot, self.approx)
+
+                    continue
+
+                if step[1] == 'distinct':
+
+                    # Registers are merged by their maximum, exact values by their union
+                    if self.approx:
+
+                        slot[:] = bytes(map(max, slot, other_slot))
+
+                    else:
+
+                        slot.update(other_slot)
+
+                    continue
+
+                if step[1] == 'var' or step[1] == 'stddev':
+
+                    # Combining the means and squared differences of both parts, by Chan's formula
+                    total_items = slot[0] + other_slot[0]
+
+                    if other_slot[0] > 0:
+
+                        delta = other_slot[1] - slot[1]
+
+                        slot[2] = slot[2] + other_slot[2] + delta * delta * slot[0] * other_slot[0] / total_items
+                        slot[1] = slot[1] + delta * other_slot[0] / total_items
+                        slot[0] = total_items
+
+                    continue
+
+                if step[1] == 'median' or step[1] == 'percentile':
+
+                    slot[0].extend(other_slot[0])
+                    slot[1].extend(other_slot[1])
+
+                    if other_slot[3] is not None and (slot[3] is None or other_slot[3] < slot[3]):
+                        slot[3] = other_slot[3]
+
+                    if other_slot[4] is not None and (slot[4] is None or other_slot[4] > slot[4]):
+                        slot[4] = other_slot[4]
+
+                    self.add_quantiles(slot, other_slot[2])
+
+                    if len(slot[0]) > TDIGEST_BUFFER:
+
+                        self.compress_quantiles(slot)
+
+                    continue
+
+                slot[0] = slot[0] + other_slot[0]
+                slot[1] += other_slot[1]
+
+                if other_slot[2] is not None and (slot[2] is None or other_slot[2] < slot[2]):
+                    slot[2] = other_slot[2]
+
+                if other_slot[3] is not None and (slot[3] is None or other_slot[3] > slot[3]):
+                    slot[3] = other_slot[3]
+
+                # End of for step in self.plan:
+
+    def prune_top(self, slot, size):
+        """
+        Reduces the frequencies of approximate top to at most size values, using the
+        Misra-Gries summary.
+
+        The frequency of the (size + 1)th most frequent value is taken from every frequency
+        and the values left with none are removed. Each frequency kept is at most N/(size + 1)
+        lower than the true frequency of the value, where N is the number of records of the
+        group, and every value more frequent than N/(size + 1) is kept. The same holds after
+        merging tables, so the results of ranges read apart can be combined.
+
+        Parameters
+        ----------
+        slot : dict
+            The frequencies of the values
+
+        size : int
+            The largest number of values kept
+
+        """
+
+        # Checking if the frequencies already fit
+        if len(slot) <= size:
+
+            return
+
+        floor = heapq.nlargest(size + 1, slot.values())[-1]
+
+        for value in list(slot):
+
+            frequency = slot[value] - floor
+
+            if frequency > 0:
+
+                slot[value] = frequency
+
+            else:
+
+                del slot[value]
+
+    def add_distinct(self, slot, value):
+        """
+        Adds a value to the accumulator of distinct.
+
+        With approx the accumulator is a HyperLogLog sketch of 2^HLL_PRECISION registers,
+        each holding the largest number of leading zero bits of the hashes of the values
+        it was chosen for.
+
+        Parameters
+        ----------
+        slot : dict or bytearray
+            The accumulator of distinct
+
+        value : str
+            The value to add
+
+        """
+
+        if not self.approx:
+
+            slot[value] = None
+
+            return
+
+        hashed = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+        register = hashed & ((1 << HLL_PRECISION) - 1)
+        rank = 64 - HLL_PRECISION - (hashed >> HLL_PRECISION).bit_length() + 1
+
+        if rank > slot[register]:
+
+            slot[register] = rank
+
+    def distinct_result(self, slot):
+        """
+        Gets the number of distinct values of an accumulator of distinct.
+
+        The estimate of a HyperLogLog sketch has a standard error of 1.04/sqrt(2^HLL_PRECISION),
+        about 0.8%, and uses linear counting for small numbers of values.
+
+        Parameters
+        ----------
+        slot : dict or bytearray
+            The accumulator of distinct
+
+        """
+
+        if not self.approx:
+
+            return len(slot)
+
+        registers = len(slot)
+        zeros = slot.count(0)
+
+        estimate = 0.7213 / (1 + 1.079 / registers) * registers * registers / sum(2.0 ** -x for x in slot)
+
+        # Checking if linear counting is more accurate for few values
+        if estimate <= 2.5 * registers and zeros > 0:
+
+            estimate = registers * math.log(registers / zeros)
+
+        return int(round(estimate))
+
+    def add_moments(self, slot, values):
+        """
+        Adds values to the accumulator of var and stddev with Welford's method, which updates
+        the mean and the sum of squared differences from it one value at a time instead of
+        subtracting large sums of squares.
+
+        Parameters
+        ----------
+        slot : list
+            The accumulator [number of numeric values, mean, sum of squared differences]
+
+        values : list
+            The numeric values to add, in row order
+
+        """
+
+        total_items, mean, squares = slot
+
+        for data_value in values:
+
+            total_items += 1
+
+            delta = data_value - mean
+            mean += delta / total_items
+            squares += delta * (data_value - mean)
+
+        slot[0] = total_items
+        slot[1] = mean
+        slot[2] = squares
+
+    def add_quantiles(self, slot, values):
+        """
+        Adds values to the sketch of median and percentile.
+
+        The values are kept as they are until TDIGEST_BUFFER of them are waiting, then they
+        are merged into the centroids of a t-digest by compress_quantiles. Adding the values
+        of a block at once compresses at the same points as adding them one at a time.
+
+        Parameters
+        ----------
+        slot : list
+            The sketch [centroid means, centroid weights, values not compressed, minimum, maximum]
+
+        values : list
+            The numeric values to add, in row order
+
+        """
+
+        # Variables
+        position = 0 # Integer for the location of the next value to add
+
+        if not values:
+
+            return
+
+        lowest = min(values)
+        highest = max(values)
+
+        if slot[3] is None or lowest < slot[3]:
+            slot[3] = lowest
+
+        if slot[4] is None or highest > slot[4]:
+            slot[4] = highest
+
+        while position < len(values):
+
+            space = TDIGEST_BUFFER - len(slot[2])
+
+            slot[2].extend(values[position:position + space])
+
+            position += space
+
+            if len(slot[2]) >= TDIGEST_BUFFER:
+
+                self.compress_quantiles(slot)
+
+    def compress_quantiles(self, slot):
+        """
+        Merges the values and centroids of a quantile sketch into fewer centroids.
+
+        Neighbouring points are merged while the weight of a centroid stays within the limit
+        of the t-digest scale function k(q) = TDIGEST_COMPRESSION / (2 pi) * asin(2q - 1),
+        so centroids near the lowest and highest values stay small and the quantiles near
+        the tails are more accurate than those near the median.
+
+        Parameters
+        ----------
+        slot : list
+            The sketch [centroid means, centroid weights, values not compressed, minimum, maximum]
+
+        """
+
+        # Variables
+        points = sorted(zip(slot[0] + slot[2], slot[1] + [1] * len(slot[2]))) # List of (mean, weight) in ascending order
+        total_weight = sum(slot[1]) + len(slot[2]) # Integer for the number of values of the sketch
+        means = [] # List of the means of the new centroids
+        weights = [] # List of the weights of the new centroids
+        before = 0 # Integer for the weight of the centroids before the current one
+        step = 2 * math.pi / TDIGEST_COMPRESSION # Float for a change of 1 in k(q), in the units of asin
+
+        mean, weight = points[0]
+        limit = total_weight * (math.sin(-math.pi / 2 + step) + 1) / 2
+
+        for point_mean, point_weight in points[1:]:
+
+            # Checking if the point fits in the current centroid
+            if before + weight + point_weight <= limit:
+
+                weight += point_weight
+                mean += (point_mean - mean) * point_weight / weight
+
+                continue
+
+            means.append(mean)
+            weights.append(weight)
+
+            before += weight
+
+            limit = total_weight * (math.sin(min(math.asin(min(1.0, 2 * before / total_weight - 1)) + step, math.pi / 2)) + 1) / 2
+
+            mean, weight = point_mean, point_weight
+
+        means.append(mean)
+        weights.append(weight)
+
+        slot[0] = means
+        slot[1] = weights
+        slot[2] = []
+
+    def variance_result(self, slot):
+        """
+        Gets the sample variance of an accumulator of var and stddev, None with fewer than two
+        numeric values.
+
+        Parameters
+        ----------
+        slot : list
+            The accumulator [number of numeric values, mean, sum of squared differences]
+
+        """
+
+        if slot[0] < 2:
+
+            return None
+
+        return slot[2] / (slot[0] - 1)
+
+    def quantile_result(self, slot, quantile):
+        """
+        Gets a quantile of a quantile sketch, None if it holds no values.
+
+        Each centroid is placed at the middle of the ranks of its values and the quantile is
+        interpolated linearly between the two closest, using the minimum and maximum for the
+        first and last rank. With every value its own centroid this is the same as linear
+        interpolation between the sorted values.
+
+        Parameters
+        ----------
+        slot : list
+            The sketch [centroid means, centroid weights, values not compressed, minimum, maximum]
+
+        quantile : float
+            The quantile between 0 and 1
+
+        """
+
+        # Variables
+        points = sorted(zip(slot[0] + slot[2], slot[1] + [1] * len(slot[2]))) # List of (mean, weight) in ascending order
+        ranks = [0.0] # List of the rank of each point
+        values = [slot[3]] # List of the value of each point
+        before = 0 # Integer for the weight of the centroids before the current one
+
+        if not points:
+
+            return None
+
+        for mean, weight in points:
+
+            ranks.append(before + (weight - 1) / 2)
+            values.append(mean)
+
+            before += weight
+
+        ranks.append(before - 1.0)
+        values.append(slot[4])
+
+        target = quantile * (before - 1)
+
+        index = bisect.bisect_left(ranks, target)
+
+        if ranks[index] == target:
+
+            return values[index]
+
+        return values[index - 1] + (values[index] - values[index - 1]) * (target - ranks[index - 1]) / (ranks[index] - ranks[index - 1])
+
+    def add_block(self, data):
+        """
+        Adds every row of a DataBlock to the accumulators, one column at a time.
+
+        Parameters
+        ----------
+        data : DataBlock
+            The DataBlock holding the rows
+
+        Exceptions
+        ----------
+        ValueError
+            See block_numbers.
+
+        """
+
+        # Converting each numeric column once for all the aggregates using it
+        numeric_columns = self.block_numbers(data)
+
+        # Finding the accumulators of each group-by code and the code of each row
+        if len(self.groupby_index) == 1:
+
+            group_column = data.columns[self.groupby_index[0]]
+            code_groups = [self.group_for(x) for x in group_column.values]
+            group_codes = group_column.codes
+
+        elif self.groupby_index:
+
+            group_columns = [data.columns[x] for x in self.groupby_index]
+            key_codes = {} # Dictionary mapping each tuple of codes to the code of its group
+
+            # Numbering each combination of the group-by codes in the order it is first seen
+            group_codes = array('i', [key_codes.setdefault(x, len(key_codes)) for x in zip(*[x.codes for x in group_columns])])
+            code_groups = [self.group_for(tuple(x.values[y] for x, y in zip(group_columns, key))) for key in key_codes]
+
+        else:
+
+            code_groups = [self.group_for(None)]
+            group_codes = bytes(data.row_count)
+
+        # Checking if the vectorized NumPy backend can be used
+        if numpy is not None and data.row_count > 0:
+
+            self.add_block_numpy(data, code_groups, group_codes, numeric_columns)
+
+            return
+
+        for code in group_codes:
+
+            code_groups[code][0] += 1
+
+        for step in self.plan:
+
+            if step[1] == 'count':
+
+                continue
+
+            slots = [x[step[0]] for x in code_groups]
+
+            if step[1] == 'top':
+
+                column = data.columns[step[2]]
+
+                for code, value_code in zip(group_codes, column.codes):
+
+                    slot = slots[code]
+                    value = column.values[value_code]
+                    slot[value] = slot.get(value, 0) + 1
+
+                if self.approx:
+
+                    for slot in slots:
+                        self.prune_top(slot, self.approx)
+
+                continue
+
+            if step[1] == 'distinct':
+
+                column = data.columns[step[2]]
+
+                # Adding each pair of group and value once
+                for code, value_code in dict.fromkeys(zip(group_codes, column.codes)):
+                    self.add_distinct(slots[code], column.values[value_code])
+
+                continue
+
+            column = numeric_columns[step[4]]
+
+            if step[1] in ('var', 'stddev', 'median', 'percentile'):
+
+                # Adding the numeric values of each group in row order
+                group_values = [[] for x in slots]
+
+                for code, data_value, valid in zip(group_codes, column.numbers, column.valid):
+
+                    if valid:
+                        group_values[code].append(data_value)
+
+                add_values = self.add_moments if step[1] == 'var' or step[1] == 'stddev' else self.add_quantiles
+
+                for slot, values in zip(slots, group_values):
+                    add_values(slot, values)
+
+                continue
+
+            for code, data_value, valid in zip(group_codes, column.numbers, column.valid):
+
+                if not valid:
+
+                    continue
+
+                slot = slots[code]
+
+                slot[0] = slot[0] + data_value
+                slot[1] += 1
+
+                if slot[2] is None or data_value < slot[2]:
+                    slot[2] = data_value
+
+                if slot[3] is None or data_value > slot[3]:
+                    slot[3] = data_value
+
+            # End of for step in self.plan:
+
+    def block_numbers(self, data):
+        """
+        Gets the DataColumn of each of numeric_columns converted to floats, reporting every
+        non-numeric value found with non_numeric_error.
+
+        Parameters
+        ----------
+        data : DataBlock
+            The DataBlock holding the rows
+
+        Exceptions
+        ----------
+        ValueError
+            See non_numeric_error.
+
+        """
+
+        # Variables
+        columns = [] # List of the DataColumn of each of numeric_columns
+
+        for position in range(len(self.numeric_columns)):
+
+            column = data.columns[self.numeric_columns[position][0]]
+
+            column.parse_numbers()
+
+            # Finding the location of each non-numeric value
+            i = column.valid.find(0)
+
+            while i != -1:
+
+                self.non_numeric_error(position, data.row_lines[i] if data.row_lines is not None else i + 1, column.value_at(i))
+
+                i = column.valid.find(0, i + 1)
+
+                # End of while i != -1:
+
+            columns.append(column)
+
+            # End of for position in range(len(self.numeric_columns)):
+
+        return columns
+
+    def add_block_numpy(self, data, code_groups, group_codes, numeric_columns):
+        """
+        Adds every row of a DataBlock to the accumulators using NumPy reductions over the
+        group-by codes.
+
+        The sums are accumulated in row order by numpy.bincount so the results are identical
+        to add_block's. Columns holding NaN or negative zero are added with the pure Python
+        loop as NumPy does not order those values the same way.
+
+        Parameters
+        ----------
+        data : DataBlock
+            The DataBlock holding the rows
+
+        code_groups : list
+            The accumulators of each group-by code
+
+        group_codes : array
+            The group-by code of each row
+
+        numeric_columns : list
+            The DataColumn of each of numeric_columns, see block_numbers
+
+        """
+
+        # Variables
+        total_groups = len(code_groups) # Integer for the number of groups
+
+        groups = numpy.frombuffer(group_codes, dtype=numpy.intc if self.groupby_index else numpy.uint8)
+
+        for code, frequency in enumerate(numpy.bincount(groups, minlength=total_groups).tolist()):
+
+            code_groups[code][0] += frequency
+
+        for step in self.plan:
+
+            if step[1] == 'count':
+
+                continue
+
+            slots = [x[step[0]] for x in code_groups]
+
+            if step[1] == 'top':
+
+                column = data.columns[step[2]]
+                total_values = len(column.values)
+
+                # Counting each pair of group and value, in the order the pairs are first seen
+                pairs = groups.astype(numpy.int64) * total_values + numpy.frombuffer(column.codes, dtype=numpy.intc)
+                unique_pairs, first_seen, frequencies = numpy.unique(pairs, return_index=True, return_counts=True)
+                seen_order = numpy.argsort(first_seen, kind='stable')
+
+                for pair, frequency in zip(unique_pairs[seen_order].tolist(), frequencies[seen_order].tolist()):
+
+                    slot = slots[pair // total_values]
+                    value = column.values[pair % total_values]
+                    slot[value] = slot.get(value, 0) + frequency
+
+                if self.approx:
+
+                    for slot in slots:
+                        self.prune_top(slot, self.approx)
+
+                continue
+
+            if step[1] == 'distinct':
+
+                column = data.columns[step[2]]
+                total_values = len(column.values)
+
+                # Adding each pair of group and value once
+                pairs = numpy.unique(groups.astype(numpy.int64) * total_values + numpy.frombuffer(column.codes, dtype=numpy.intc))
+
+                for pair in pairs.tolist():
+                    self.add_distinct(slots[pair // total_values], column.values[pair % total_values])
+
+                continue
+
+            column = numeric_columns[step[4]]
+
+            valid = numpy.frombuffer(column.valid, dtype=numpy.bool_)
+            step_groups = groups[valid]
+            numbers = numpy.frombuffer(column.numbers, dtype=numpy.float64)[valid]
+
+            if step[1] in ('var', 'stddev', 'median', 'percentile'):
+
+                # Splitting the numeric values by group, keeping row order within each group
+                row_order = numpy.argsort(step_groups, kind='stable')
+                boundaries = numpy.cumsum(numpy.bincount(step_groups, minlength=total_groups))[:-1]
+
+                add_values = self.add_moments if step[1] == 'var' or step[1] == 'stddev' else self.add_quantiles
+
+                for slot, values in zip(slots, numpy.split(numbers[row_order], boundaries)):
+                    add_values(slot, values.tolist())
+
+                continue
+
+            # Checking for values that NumPy's minimum and maximum handle differently
+            if numpy.isnan(numbers).any() or numpy.signbit(numbers[numbers == 0]).any():
+
+                for code, data_value in zip(step_groups.tolist(), numbers.tolist()):
+
+                    slot = slots[code]
+
+                    slot[0] = slot[0] + data_value
+                    slot[1] += 1
+
+                    if slot[2] is None or data_value < slot[2]:
+                        slot[2] = data_value
+
+                    if slot[3] is None or data_value > slot[3]:
+                        slot[3] = data_value
+
+                continue
+
+            summed = numpy.bincount(step_groups, weights=numbers, minlength=total_groups).tolist()
+            items = numpy.bincount(step_groups, minlength=total_groups).tolist()
+
+            minimums = numpy.full(total_groups, numpy.inf)
+            numpy.minimum.at(minimums, step_groups, numbers)
+
+            maximums = numpy.full(total_groups, -numpy.inf)
+            numpy.maximum.at(maximums, step_groups, numbers)
+
+            minimums = minimums.tolist()
+            maximums = maximums.tolist()
+
+            for code in range(total_groups):
+
+                # Checking if the group has no numeric values
+                if items[code] == 0:
+
+                    continue
+
+                slot = slots[code]
+
+                slot[0] = slot[0] + summed[code]
+                slot[1] += items[code]
+
+                if slot[2] is None or minimums[code] < slot[2]:
+                    slot[2] = minimums[code]
+
+                if slot[3] is None or maximums[code] > slot[3]:
+                    slot[3] = maximums[code]
+
+            # End of for step in self.plan:
+
+    def group_results(self, groupby_values):
+        """
+        Gets the results of every aggregate for each group as lists of strings.
+
+        A group with no numeric values reports the maximum of the whole column
+        for min and the minimum of the whole column for max.
+
+        Parameters
+        ----------
+        groupby_values : list
+            The values of the groups in output order
+
+        """
+
+        # Variables
+        argval_list = [] # List for all the aggregate results
+
+        for step in self.plan:
+
+            # Reset ele_list each iteration
+            ele_list = []
+            slot_index = step[0]
+
+            if step[1] == 'count':
+
+                for ele in groupby_values:
+                    ele_list.append(str(self.groups[ele][0]))
+
+            elif step[1] == 'sum':
+
+                for ele in groupby_values:
+                    ele_list.append(str(self.groups[ele][slot_index][0]))
+
+            elif step[1] == 'mean':
+
+                for ele in groupby_values:
+
+                    slot = self.groups[ele][slot_index]
+                    total_items = slot[1]
+
+                    if total_items == 0:
+                        total_items = 1.0
+
+                    ele_list.append(str(float(slot[0]/total_items)))
+
+            elif step[1] == 'min' or step[1] == 'max':
+
+                # Finding the extrema of the whole column for groups without numeric values
+                column_min = None
+                column_max = None
+
+                for group in self.groups.values():
+
+                    slot = group[slot_index]
+
+                    if slot[2] is not None and (column_min is None or slot[2] < column_min):
+                        column_min = slot[2]
+
+                    if slot[3] is not None and (column_max is None or slot[3] > column_max):
+                        column_max = slot[3]
+
+                for ele in groupby_values:
+
+                    slot = self.groups[ele][slot_index]
+
+                    if step[1] == 'min':
+
+                        ele_list.append(str(slot[2] if slot[2] is not None else column_max))
+
+                    else:
+
+                        ele_list.append(str(slot[3] if slot[3] is not None else column_min))
+
+            elif step[1] == 'distinct':
+
+                for ele in groupby_values:
+                    ele_list.append(str(self.distinct_result(self.groups[ele][slot_index])))
+
+            elif step[1] == 'var' or step[1] == 'stddev':
+
+                for ele in groupby_values:
+
+                    variance = self.variance_result(self.groups[ele][slot_index])
+
+                    # Groups with fewer than two numeric values have no variance
+                    if variance is None:
+                        ele_list.append('')
+                    elif step[1] == 'var':
+                        ele_list.append(str(variance))
+                    else:
+                        ele_list.append(str(math.sqrt(variance)))
+
+            elif step[1] == 'median' or step[1] == 'percentile':
+
+                for ele in groupby_values:
+
+                    quantile = self.quantile_result(self.groups[ele][slot_index], step[5])
+
+                    ele_list.append(str(quantile) if quantile is not None else '')
+
+            elif step[1] == 'top':
+
+                ele_list = self.top_results(step, groupby_values)
+
+            # Creating a 2D list
+            argval_list.append(ele_list)
+
+            # End of for step in self.plan:
+
+        return argval_list
+
+    def total_results(self):
+        """
+        Gets the results of every aggregate over all the rows when the data is not grouped.
+
+        Returns the list of results other than top and the list of top's results, in the
+        format used by build_output.
+
+        """
+
+        # Variables
+        result_data = [] # List for holding all the resulting data other than top k
+        top_data = [] # List for holding top k's data
+
+        group = self.groups.get(None)
+
+        # Checking if no rows were added
+        if group is None:
+
+            group = self.new_group()
+
+        for step in self.plan:
+
+            slot = group[step[0]]
+
+            if step[1] == 'count':
+
+                result_data.append([group[0]])
+
+            elif step[1] == 'sum':
+
+                result_data.append([float(slot[0])])
+
+            elif step[1] == 'min':
+
+                result_data.append([slot[2]])
+
+            elif step[1] == 'max':
+
+                result_data.append([slot[3]])
+
+            elif step[1] == 'mean':
+
+                # Divide the sum by the total number of records
+                result_data.append([float(slot[0]/float(group[0]))])
+
+            elif step[1] == 'distinct':
+
+                result_data.append([self.distinct_result(slot)])
+
+            elif step[1] == 'var' or step[1] == 'stddev':
+
+                variance = self.variance_result(slot)
+
+                if variance is not None and step[1] == 'stddev':
+
+                    variance = math.sqrt(variance)
+
+                result_data.append([variance])
+
+            elif step[1] == 'median' or step[1] == 'percentile':
+
+                result_data.append([self.quantile_result(slot, step[5])])
+
+            elif step[1] == 'top':
+
+                top_data.extend(self.top_results(step, [None]))
+
+            # End of for step in self.plan:
+
+        return result_data, top_data
+
+    def top_results(self, step, groupby_values):
+        """
+        Gets the top k values of each group, selected with a heap so ties keep the order the
+        values were first seen in.
+
+        Parameters
+        ----------
+        step : list
+            The plan entry of the top aggregate
+
+        groupby_values : list
+            The values of the groups in output order
+
+        Restrictions
+        ------------
+        top is capped at 20 unique values.
+
+        If the column of interest has more than 20 unique values and k is larger than 20 then
+        the error message 'Error: <input>: <column_name> has been capped at 20 distinct values'
+        will print and the output result will only contain 20 items.
+
+        """
+
+        # Variables
+        group_list = [] # List for holding the output formatted values in order of group-by elements
+        distinct_values = set() # Distinct values of the whole column
+        k_val = step[4]
+
+        for group in self.groups.values():
+
+            distinct_values.update(group[step[0]])
+
+        # Checking if the cardinality is greater than 20
+        if len(distinct_values) > 20 and k_val > 20:
+
+            k_val = 20
+
+            # Print to standard error
+            print('Error:' + self.input + ': ' + step[3] + ' has been capped at 20 distinct values', file = sys.stderr)
+
+            self.top_capped = True
+
+        for element in groupby_values:
+
+            # Selecting the k most frequent values of the group, ties keep the order values were first seen
+            formatter_list = heapq.nlargest(k_val, self.groups[element][step[0]].items(), key= lambda x: x[1])
+
+            group_list.append([self.format_top(formatter_list, k_val)])
+
+        # Checking if results are capped
+        if self.top_capped:
+
+            return group_list[:20]
+
+        return group_list
+
+    def format_top(self, formatter_list, k_val):
+        """
+        Formats a list of (value, frequency) pairs as top's output string.
+
+        Parameters
+        ----------
+        formatter_list : list
+            The (value, frequency) pairs sorted in descending order
+
+        k_val : int
+            The maximum number of pairs to output
+
+        """
+
+        return ','.join(str(x[0]) + ": " + str(x[1]) for x in formatter_list[:k_val])
+
+
+class Query:
+    """
+    A class used to run the same aggregates on DataBlocks from other programs
+
+    The aggregates are given in the same form as the command line, for example
+    Query([['sum', 'amount'], ['top', 5, 'product'], ['count']], 'region') is the same query as
+    --sum amount --top 5 product --count --group-by region. The fields are checked and
+    converted to column locations once per header by compile, so running the query again on
+    blocks of the same file does not repeat that work. The results are the rows OLAP.py outputs.
+
+    ...
+
+    Attributes
+    ----------
+    arguments : Namespace
+        The aggregate arguments in order and the group-by field, in the form parsed from the command line
+
+    approx : int
+        The number of values top keeps per group, 0 for exact results
+
+    plans : dict
+        A dictionary mapping each column header compiled, as a tuple, to its [groupby_index, needed, predicate] plan
+
+    Methods
+    -------
+    compile(self, column_header)
+        Checks the fields of the query and finds their locations in a header
 
-        self.column_data.append(new_data)
+    run(self, data)
+        Computes the aggregates over a DataBlock
 
+    check_groups(self, input_file, total_groups)
+        Checks the number of groups against the limits of the query
 
-    def column_sum(self, column_name, groupby_values = None, groupby_index = -1):
-        """
-        Sums up the values of a column.
+    """
 
-        If the arguments 'groupby_values' and 'groupby_index' are passed in, then sum
-        will sum values based on the strings in groupby_values.
 
+    def __init__(self, aggregates, groupby = None, approx = 0, max_groups = 100, group_cap = 20, where = None):
+        """
         Parameters
         ----------
-        column_name : str
-            The name of the column to be summed
+        aggregates : list
+            The aggregates in order, each a list of the aggregate name followed by its
+            arguments as on the command line
 
-        groupby_values : list, optional
-            A list containing the names of interest (default is None)
+        groupby : str or list, optional
+            The field the data is grouped by, or a list of several fields (default is None)
 
-        groupby_index : int, optional
-            The location in the column_data of the names of interest (default is -1)
+        approx : int, optional
+            The number of values top keeps per group with approximate top and distinct
+            results, 0 for exact results (default is 0)
+
+        max_groups : int, optional
+            The number of groups at which the program stops (default is 100)
+
+        group_cap : int, optional
+            The number of groups after which the output is capped (default is 20)
+
+        where : str, optional
+            The comparisons a row has to pass to be aggregated, as passed to --where (default is None)
 
         Exceptions
         ----------
         ValueError
-            If column passed contains values that can not be converted from string to float
-            the message: 'Error: <input file>:<line number>: can't compute <column_name> on non-numeric value '<value>'' 
-            will print.
-
-            If more than 100 of these errors are found in a single column then 
-            the message: 'Error: <input>:more than 100 non-numeric values found in aggreate column '<column_name>''
-            will print and the program will extit.
+            If an aggregate is unknown or is not given the arguments it takes.
 
         """
 
         # Variables
-        non_numeric = 0 # Integer for tracking non-numeric values found
-
-        # Checking if function should run in group-by mode
-        if groupby_values != None and groupby_index != -1:
-
-            # Variables
-            sumval_list = [] # List holding the summed values
-
-            # Finding the index location of the column_name parameter
-            column_index = self.column_header.index(column_name.lower())
+        order = [] # List of [aggregate, arguments] as built by Organizer
 
-            for i in range(len(groupby_values)):
+        for ele in aggregates:
 
-                # Reset tota_summed each iteration
-                total_summed = 0.0
+            if ele[0] == 'count' and len(ele) == 1:
 
-                for j in range(len(self.column_data)):
+                order.append(['count', []])
 
-                    # Try to convert the value at column_index from a string to a float
-                    try:
-
-                        data_value = float(self.column_data[j][column_index])
-
-                    except ValueError:
+            elif ele[0] == 'top' and len(ele) == 3:
 
-                        # Convert failed, print on standard error
-                        print('Error: ' + self.input + ':' + str(j+1) + ': can\'t compute ' + column_name + ' on non-numeric value \'' + self.column_data[j][column_index] + '\'', file = sys.stderr)
-                        non_numeric += 1
+                # Checking if k is a whole number
+                try:
 
-                        if non_numeric > 100:
+                    int(ele[1])
 
-                            # Print on standard error
-                            print('Error: ' + self.input + ':more than 100 non-numeric values found in aggregate column \'' + column_name + '\'', file = sys.stderr)
-                            exit(7)
-                        
-                        continue
+                except (TypeError, ValueError):
 
+                    raise ValueError('top k has to be a whole number, got ' + repr(ele[1]))
 
-                    # Checking if groupby_index string is equal to groupby_values string
-                    if self.column_data[j][groupby_index] == groupby_values[i]:
-                        total_summed = total_summed + float(data_value)
+                order.append(['top', [str(ele[1]), ele[2]]])
 
-                    # End of for j in range(len(self.column_data))
+            elif ele[0] == 'percentile' and len(ele) == 3:
 
-                # Convert total_summed to a string before appending
-                sumval_list.append(str(total_summed))
+                # Checking if p is a number
+                try:
 
-                # End of for i in range(len(groupby_values))
-            
-            return sumval_list
+                    float(ele[1])
 
-            # End of if groupby_values != None and groupby_index != -1:
-        else:
+                except (TypeError, ValueError):
 
-            # Variables
-            total_summed = 0.0 # Total summed value of entire column as a floating point
+                    raise ValueError('percentile p has to be a number, got ' + repr(ele[1]))
 
-            # Finding the index location of the column_name parameter
-            column_index = self.column_header.index(column_name.lower())
+                order.append(['percentile', [str(ele[1]), ele[2]]])
 
-            for i in range(len(self.column_data)):
-                
-                # Try to convert the value at column_index from a string to a float
-                try:
+            elif ele[0] in ('sum', 'min', 'max', 'mean', 'distinct', 'var', 'stddev', 'median') and len(ele) == 2:
 
-                    data_value = float(self.column_data[i][column_index])
+                order.append([ele[0], [ele[1]]])
 
-                except ValueError:
+            else:
 
-                    # Convert failed, print on standard error
-                    print('Error: ' + self.input + ':' + str(i+1) + ': can\'t compute ' + column_name + ' on non-numeric value \'' + self.column_data[i][column_index] + '\'', file = sys.stderr)
-                    non_numeric += 1
+                raise ValueError('unknown aggregate ' + repr(ele))
 
-                    if non_numeric > 100:
+            # End of for ele in aggregates:
 
-                        # Print on standard error
-                        print('Error: ' + self.input + ':more than 100 non-numeric values found in aggregate column \'' + column_name + '\'', file = sys.stderr)
-                        exit(7)
-                        
-                    continue
+        # With no aggregates only the records are counted, as on the command line
+        if not order:
 
-                total_summed = total_summed + data_value
+            order.append(['count', []])
 
-                # End of for i in range(len(self.column_data)):
+        # Several group-by fields are joined by commas, as on the command line
+        if isinstance(groupby, (list, tuple)):
 
-            return float(total_summed)
+            groupby = ','.join(groupby)
 
+        self.arguments = argparse.Namespace(order = order, groupby = [groupby] if groupby is not None else -1, max_groups = max_groups, group_cap = group_cap, where = where)
+        self.approx = approx
+        self.plans = {}
 
-    def column_min(self, column_name, groupby_values = None, groupby_index = -1):
+    def compile(self, column_header):
         """
-        Finds the minimum value of a column.
+        Checks the fields of the query and finds their locations in a header.
 
-        If the arguments 'groupby_values' and 'groupby_index' are passed in, then column_min
-        will find the minimum value of each string in groupby_values.
+        Returns [groupby_index, needed, predicate], where groupby_index are the locations of the
+        group-by fields, needed are the sorted locations of every field used, see needed_columns,
+        and predicate is the compiled where, None if not passed. The plan of each header is kept
+        for later runs.
 
         Parameters
         ----------
-        column_name : str
-            The name of the column to be summed
-
-        groupby_values : list, optional
-            A list containing the names of interest (default is None)
-
-        groupby_index : int, optional
-            The location in the column_data of the names of interest (default is -1)
+        column_header : list
+            A list containing the title of each column
 
         Exceptions
         ----------
         ValueError
-            If column passed contains values that can not be converted from string to float
-            the message 'Error: <input file>:<line number>: can't compute <column_name> on non-numeric value '<value>'' 
-            will print.
-
-            If more than 100 of these errors are found in a single column then 
-            the message: 'Error: <input>:more than 100 non-numeric values found in aggreate column '<column_name>''
-            will print and the program will extit.
+            If the group-by field or a field passed to an aggregate is not in the header, or
+            where can not be parsed.
 
         """
 
-        # Variables
-        non_numeric = 0 # Integer for tracking non-numeric values found
+        key = tuple(column_header)
 
-        # Finding the index location of the column_name parameter
-        column_index = self.column_header.index(column_name.lower())
+        if key in self.plans:
 
-        # Checking if function should run in groupby mode or not
-        if groupby_values != None and groupby_index != -1:
+            return self.plans[key]
 
-            # Variables
-            minval_list = [] # List holding the minimum values
+        # Variables
+        fields = groupby_fields(self.arguments) # List of every field used by the query
 
-            # Initalizing temp_min to the max value of column_name
-            temp_min = self.column_max(column_name.lower())
+        for ele in self.arguments.order:
 
-            for ele in groupby_values:
+            if ele[0] == 'top' or ele[0] == 'percentile':
 
-                # Reset min_val each iteration
-                min_val = temp_min
+                fields.append(ele[1][1])
 
-                for j in range(len(self.column_data)):
+            elif ele[0] != 'count':
 
-                    # Checking if groupby_index string is equal to ele value
-                    if self.column_data[j][groupby_index] == ele:
+                fields.append(ele[1][0])
 
-                        # Try to convert the value at column_index from a string to a float
-                        try:
+        for field in fields:
 
-                            data_value = float(self.column_data[j][column_index])
+            if field.lower() not in column_header:
 
-                        except ValueError:
+                raise ValueError('no field with name \'' + field + '\' found')
 
-                            # Convert failed, print on standard error
-                            print('Error: ' + self.input + ':' + str(j+1) + ': can\'t compute ' + column_name + ' on non-numeric value \'' + self.column_data[j][column_index] + '\'', file = sys.stderr)
-                            non_numeric += 1
+        # Variables
+        predicate = Predicate(self.arguments.where, column_header) if self.arguments.where is not None else None # Predicate of the rows aggregated
+        needed = set(column_header.index(x.lower()) for x in fields) # Set of the locations of the fields used
 
-                            if non_numeric > 100:
+        if predicate is not None:
 
-                                # Print on standard error
-                                print('Error: ' + self.input + ':more than 100 non-numeric values found in aggregate column \'' + column_name + '\'', file = sys.stderr)
-                                exit(7)
-                        
-                            continue
+            needed.update(predicate.columns)
 
-                        if data_value < min_val:
-                            min_val = data_value
+        plan = [groupby_indexes(self.arguments, column_header), sorted(needed), predicate]
 
-                        # End of if self.column_data[j][groupby_index] == ele:
+        self.plans[key] = plan
 
-                    # End of for j in range(len(self.column_data)):
+        return plan
 
-                # Convert min_val to a string before appending
-                minval_list.append(str(min_val))
+    def run(self, data):
+        """
+        Computes the aggregates over a DataBlock.
 
-                # End of for ele in groupby_values:
-            
-            return minval_list
+        Returns the output header and the output rows, the same as OLAP.py prints for the
+        query. Problems with the data, such as non-numeric values or too many groups, are
+        reported and end the program the same as on the command line.
 
-            # End of if groupby_values != None and groupby_index != -1:
-        else:
+        Parameters
+        ----------
+        data : DataBlock
+            The DataBlock holding at least the columns used by the query
 
-            for i in range(len(self.column_data)):
+        """
 
-                try:
+        # Variables
+        groupby_capped = False # Boolean for if group-by has been capped
 
-                    # Setting the min_val to first value in column_data
-                    min_val = float(self.column_data[i][column_index])
-                    break
+        groupby_index, predicate = itemgetter(0, 2)(self.compile(data.column_header))
 
-                except ValueError:
+        # Only the rows passing where are aggregated
+        if predicate is not None:
 
-                    # Convert failed, print on standard error
-                    print('Error: ' + self.input + ':' + str(i+1) + ': can\'t compute ' + column_name + ' on non-numeric value \'' + self.column_data[i][column_index] + '\'', file = sys.stderr)
-                    non_numeric += 1
+            data = data.select(predicate)
 
-                    if non_numeric > 100:
+        table = AggregateTable(self.arguments.order, data.column_header, data.input, groupby_index, self.approx)
 
-                        # Print on standard error
-                        print('Error: ' + self.input + ':more than 100 non-numeric values found in aggregate column \'' + column_name + '\'', file = sys.stderr)
-                        exit(7)
-                        
-                    continue
+        if not groupby_index:
 
-            for i in range(1,len(self.column_data)):
+            table.add_block(data)
 
-                # Try to convert the column_data from a string to float
-                try:
+            result_data, top_data = table.total_results()
 
-                    data_value = float(self.column_data[i][column_index])
+            return build_output(self.arguments, result_data, top_data, table.top_capped)
 
-                except ValueError:
+        if len(groupby_index) == 1:
 
-                    # Convert failed, print on standard error
-                    print('Error: ' + self.input + ':' + str(i+1) + ': can\'t compute ' + column_name + ' on non-numeric value \'' + self.column_data[i][column_index] + '\'', file = sys.stderr)
-                    non_numeric += 1
+            # The distinct values of the column of interest are known before aggregating
+            groupby_values = data.columns[groupby_index[0]].values
 
-                    if non_numeric > 100:
+            groupby_capped = self.check_groups(data.input, len(groupby_values))
 
-                        # Print on standard error
-                        print('Error: ' + self.input + ':more than 100 non-numeric values found in aggregate column \'' + column_name + '\'', file = sys.stderr)
-                        exit(7)
-                        
-                    continue
+            table.add_block(data)
 
+        else:
 
-                if data_value < min_val:
-                    min_val = data_value
+            # The combinations of the values of the fields are found while aggregating
+            table.add_block(data)
 
-                # End of for i in range(1,len(self.column_data)):
-            
-            return float(min_val) 
+            groupby_values = table.groups
 
-    
-    def column_max(self, column_name, groupby_values = None, groupby_index =-1):
-        """
-        Finds the maximum value of a column.
+            groupby_capped = self.check_groups(data.input, len(groupby_values))
 
-        If the arguments 'groupby_values' and 'groupby_index' are passed in, then column_max
-        will find the maximum value of each string in groupby_values.
+        # Sort the group values in ascending order
+        groupby_values = sorted(groupby_values)
 
-        Parameters
-        ----------
-        column_name : str
-            The name of the column to be summed
+        result_data = table.group_results(groupby_values)
 
-        groupby_values : list, optional
-            A list containing the names of interest (default is None)
+        return build_output(self.arguments, result_data, groupby_values, table.top_capped, groupby_capped)
 
-        groupby_index : int, optional
-            The location in the column_data of the names of interest (default is -1)
+    def check_groups(self, input_file, total_groups):
+        """
+        Checks the number of groups against the limits of the query, returning True if the
+        output is capped.
 
-        Exceptions
+        Parameters
         ----------
-        ValueError
-            If column passed contains values that can not be converted from string to float
-            the message 'Error: <input file>:<line number>: can't compute <column_name> on non-numeric value '<value>'' 
-            will print.
+        input_file : str
+            The name of the input file
 
-            If more than 100 of these errors are found in a single column then 
-            the message: 'Error: <input>:more than 100 non-numeric values found in aggreate column '<column_name>''
-            will print and the program will extit.
+        total_groups : int
+            The number of groups
 
         """
 
-        # Variavles
-        non_numeric = 0 # Integer for tracking non-numeric values found
+        groupby_field = self.arguments.groupby[0]
 
-        # Finding the index location of the column_name parameter
-        column_index = self.column_header.index(column_name.lower())
+        # Checking if cardinality is too high
+        if total_groups >= self.arguments.max_groups:
 
-        
-        # Checking if function should run in groupby mode or not
-        if groupby_values != None and groupby_index != -1:
+            # Print on standard error
+            print('Error: ' + input_file + ': The field ' + groupby_field + ' has to many unique values.', file = sys.stderr)
 
-            # Variables
-            maxval_list = [] # List holding all the maximum values
+            exit(6)
 
-            # Finding the minimum value in the column
-            temp_max = self.column_min(column_name)
+        if total_groups > self.arguments.group_cap:
 
-            for i in range(len(groupby_values)):
+            # Print to standard error
+            print('Error:' + input_file + ': ' + groupby_field + ' has been capped at ' + str(self.arguments.group_cap) + ' distinct values', file = sys.stderr)
 
-                # Reset max_val each iteration
-                max_val = temp_max
+            return True
 
-                for j in range(len(self.column_data)):
+        return False
 
-                    # Try to convert the value at column_index from a string to a float
-                    try:
-                        data_value = float(self.column_data[j][column_index])
 
-                    except ValueError:
+class ResultCache:
+    """
+    A class used to save the output of queries in a directory, removing the least recently used
+    outputs when the directory grows past its size
 
-                        # Convert failed, print on standard error
-                        print('Error: ' + self.input + ':' + str(j+1) + ': can\'t compute ' + column_name + ' on non-numeric value \'' + self.column_data[j][column_index] + '\'', file = sys.stderr)
-                        non_numeric += 1
+    Each output is saved in its own file named by the key of the query. Reading a file updates
+    its modification time, so the files with the oldest times are the least recently used.
 
-                        if non_numeric > 100:
+    ...
 
-                            # Print on standard error
-                            print('Error: ' + self.input + ':more than 100 non-numeric values found in aggregate column \'' + column_name + '\'', file = sys.stderr)
-                            exit(7)
-                        
-                        continue
+    Attributes
+    ----------
+    directory : str
+        The directory holding the files of the cache
 
-                    # Checking if groupby_index string is equal to groupby_values string
-                    if self.column_data[j][groupby_index] == groupby_values[i]:
-                        if data_value > max_val:
-                            max_val = data_value
+    max_size : int
+        The largest total size in bytes of the files of the cache
 
-                    # End of for j in range(len(self.column_data)):
+    Methods
+    -------
+    key(self, arguments)
+        Gets the key of a query
 
-                # Convert max_val to string before appending
-                maxval_list.append(str(max_val))
+    get(self, key)
+        Gets the saved output of a query
 
-                # End of for i in range(len(groupby_values)):
+    put(self, key, entry)
+        Saves the output of a query
 
-            return maxval_list
+    evict(self)
+        Removes the least recently used files until the cache fits in max_size
 
-            # End of if groupby_values != None and groupby_index != -1:
-        else:
-            
-            for i in range(len(self.column_data)):
-                try:
+    """
 
-                    # Setting max_val to first value in column_data
-                    max_val = float(self.column_data[i][column_index])
-                    break
 
-                except ValueError:
+    def __init__(self, directory, max_size):
+        """
+        Parameters
+        ----------
+        directory : str
+            The directory holding the files of the cache, created if it does not exist
 
-                    # Convert failed, print on standard error
-                    print('Error: ' + self.input + ':' + str(i+1) + ': can\'t compute ' + column_name + ' on non-numeric value \'' + self.column_data[i][column_index] + '\'', file = sys.stderr)
-                    non_numeric += 1
+        max_size : int
+            The largest total size in bytes of the files of the cache
 
-                    if non_numeric > 100:
+        """
 
-                        # Print on standard error
-                        print('Error: ' + self.input + ':more than 100 non-numeric values found in aggregate column \'' + column_name + '\'', file = sys.stderr)
-                        exit(7)
-                        
-                    continue
-                
+        self.directory = directory
+        self.max_size = max_size
 
-            for i in range(len(self.column_data)):
+        os.makedirs(directory, exist_ok = True)
 
-                # Try to convert the column_data from string to a float
-                try:
+    def key(self, arguments):
+        """
+        Gets the key of a query, from the aggregates in order, the group-by field, where and the path,
+        size and modification time of the input file. Changing the input file changes the key,
+        so outputs of older versions of the file are never reused.
 
-                    data_value = float(self.column_data[i][column_index])
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments
 
-                except ValueError:
+        """
 
-                    # Convert failed, print on standard error
-                    print('Error: ' + self.input + ':' + str(i+1) + ': can\'t compute ' + column_name + ' on non-numeric value \'' + self.column_data[i][column_index] + '\'', file = sys.stderr)
-                    non_numeric += 1
+        source = os.stat(arguments.input)
 
-                    if non_numeric > 100:
+        query = [arguments.input, os.path.abspath(arguments.input), source.st_size, source.st_mtime_ns, arguments.order, arguments.groupby, approx_size(arguments), arguments.max_groups, arguments.group_cap, arguments.cube, arguments.where]
 
-                        # Print on standard error
-                        print('Error: ' + self.input + ':more than 100 non-numeric values found in aggregate column \'' + column_name + '\'', file = sys.stderr)
-                        exit(7)
-                        
-                    continue
+        return hashlib.sha256(json.dumps(query).encode('utf-8')).hexdigest()
 
-                if data_value > max_val:
-                    max_val = data_value
+    def get(self, key):
+        """
+        Gets the saved output of a query, None if it is not in the cache.
 
-                # End of for i in range(len(self.column_data)):
-            
-            return float(max_val)
+        Parameters
+        ----------
+        key : str
+            The key of the query
 
-    
-    def column_mean(self, column_name, groupby_values = None, groupby_index = -1):
         """
-        Finds the mean(average) value of a column.
 
-        If the arguments 'groupby_values' and 'groupby_index' are passed in, then column_mean
-        will find the mean value of each string in groupby_values.
+        entry_file = os.path.join(self.directory, key + '.json')
+
+        try:
+
+            with open(entry_file, encoding='utf-8') as input_file:
+
+                entry = json.load(input_file)
+
+            # Marking the file as recently used
+            os.utime(entry_file)
+
+        except (OSError, ValueError):
+
+            return None
+
+        return entry
+
+    def put(self, key, entry):
+        """
+        Saves the output of a query and removes the least recently used outputs if the cache
+        is larger than max_size.
 
         Parameters
         ----------
-        column_name : str
-            The name of the column to be summed
+        key : str
+            The key of the query
 
-        groupby_values : list, optional
-            A list containing the names of interest (default is None)
+        entry : dict
+            The output and the errors of the query
 
-        groupby_index : int, optional
-            The location in the column_data of the names of interest (default is -1)
+        """
 
-        Exceptions
-        ----------
-        ValueError
-            If column passed contains values that can not be converted from string to float
-            the message 'Error: <input file>:<line number>: can't compute <column_name> on non-numeric value '<value>'' 
-            will print.
+        entry_file = os.path.join(self.directory, key + '.json')
+        temp_file = entry_file + '.' + str(os.getpid())
 
-            If more than 100 of these errors are found in a single column then 
-            the message: 'Error: <input>:more than 100 non-numeric values found in aggreate column '<column_name>''
-            will print and the program will extit.
+        # Writing to a temporary file first so other runs never read half of an entry
+        with open(temp_file, 'w', encoding='utf-8') as output_file:
+
+            json.dump(entry, output_file)
+
+        os.replace(temp_file, entry_file)
+
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used files until the cache fits in max_size.
 
         """
 
         # Variables
-        non_numeric = 0 # Integer for tracking non-numeric values found
+        entries = [] # List of [modification time, size, path] of each file of the cache
+        total_size = 0 # Integer for the total size of the files
 
-        # Checking if function should run in groupby mode or not
-        if groupby_values != None and groupby_index != -1:
+        for name in os.listdir(self.directory):
 
-            # Variables
-            meanval_list = [] # List of mean(average) values
+            if not name.endswith('.json'):
 
-            # Finding the index location of the column_name parameter
-            column_index = self.column_header.index(column_name.lower())
+                continue
 
-            # Find the matching data of groupby_name location
-            for i in range(len(groupby_values)):
+            try:
 
-                # Reseting variables each iteration
-                total_summed = 0.0 # Float containing the summed total
-                mean_val = 0.0  # Float containing the mean(average)
-                total_items = 0 # Integer of the total items that were summed
+                source = os.stat(os.path.join(self.directory, name))
 
-                for j in range(len(self.column_data)):
+            except OSError:
 
-                    # Check if string at groupby_index is not equal to groupby_values string
-                    if self.column_data[j][groupby_index] != groupby_values[i]:
-                        continue
+                continue
 
-                    # Try to convert the value at column_index from a string to a float
-                    try:
+            entries.append([source.st_mtime_ns, source.st_size, os.path.join(self.directory, name)])
+            total_size += source.st_size
 
-                        data_value = float(self.column_data[j][column_index])
+        # Removing the oldest files first
+        entries.sort()
 
-                    except ValueError:
+        for entry in entries:
 
-                        # Convert failed, print to standard error
-                        print('Error: ' + self.input + ':' + str(j+1) + ': can\'t compute ' + column_name + ' on non-numeric value \'' + self.column_data[j][column_index] + '\'', file = sys.stderr)
-                        non_numeric += 1
+            if total_size <= self.max_size:
 
-                        if non_numeric > 100:
+                break
 
-                            # Print to standard error
-                            print('Error: ' + self.input + ':more than 100 non-numeric values found in aggregate column \'' + column_name + '\'', file = sys.stderr)
-                            exit(7)
-                        
-                        continue
+            try:
 
-                    total_summed = total_summed + float(data_value)
-                    total_items += 1
+                os.remove(entry[2])
 
-                    # End of for j in range(len(self.column_data)):
+            except OSError:
 
-                if total_items == 0.0:
-                    total_items = 1.0
-                    
-                # Convert the quotient to a float
-                mean_val = float(total_summed/total_items)
+                pass
 
-                # Convert mean_val to a string before appending
-                meanval_list.append(str(mean_val))
+            total_size -= entry[1]
 
-                # End of for i in range(len(groupby_values)):
-            
-            return meanval_list
+            # End of for entry in entries:
 
-            # End of if groupby_values != None and groupby_index != -1:
-        else: 
-            
-            total_sum = self.column_sum(column_name)
 
-            # Get the number of total items
-            total_items = float(len(self.column_data))
-            
-            # Divide total_sum by total_items and return the quotient as a float
-            return float(total_sum/total_items)
+class Cube:
+    """
+    A class used to store the count, sum, minimum and maximum of numeric fields for every
+    combination of the values of some dimension fields, and to roll them up to fewer fields
 
+    A cube file starts with CUBE_MAGIC and the length of a JSON description, followed by the
+    JSON and the arrays of the cells: the code of each dimension, the number of records, and the
+    sum, number of numeric values, minimum and maximum of each measure.
 
-    def column_count(self, groupby_values = None, groupby_index = -1):
-        """
-        Finds the number of records.
+    ...
 
-        If the arguments 'groupby_values' and 'groupby_index' are passed in, then column_count
-        will find the number of records of each string in groupby_values.
+    Attributes
+    ----------
+    header : list
+        A list containing the title of each column of the input file
 
-        Parameters
-        ----------
-        groupby_values : list, optional
-            A list containing the names of interest (default is None)
+    dimensions : list
+        The locations in the header of the dimension fields
 
-        groupby_index : int, optional
-            The location in the column_data of the names of interest (default is -1)
+    measures : list
+        The locations in the header of the numeric fields
 
-        """
+    values : list
+        The distinct values of each dimension, indexed by the codes of the cells
 
-        # Checking if function should run in groupby mode or not
-        if groupby_values != None and groupby_index != -1:
+    codes : list
+        An array of the codes of the cells for each dimension
 
-            # Variables
-            countval_list = [] # List containing the counted values
-            
-            for ele in groupby_values:
+    counts : array
+        The number of records of each cell
 
-                # Reset totalgroup_records each iteration
-                totalgroup_records = 0
+    stats : list
+        The arrays [sums, numbers of numeric values, minimums, maximums] of each measure
 
-                for j in range(len(self.column_data)):
-                    
-                    # Checking if groupby_index string is equal to ele value
-                    if self.column_data[j][groupby_index] == ele:
-                        totalgroup_records += 1
+    where : str
+        The comparisons the rows of the cube passed, None if every row was aggregated
 
-                    # End of for j in range(len(self.column_data)):
+    Methods
+    -------
+    add_table(self, table, column_header)
+        Fills the cells from the groups of an AggregateTable
 
-                # Convert totalgroup_records to string before appending
-                countval_list.append(str(totalgroup_records))
+    write(self, cube_file, input_file)
+        Writes the cube to a file, keyed by the size and modification time of the input file
 
-                # End of for ele in groupby_values:
-            
-            return countval_list
+    read(self, cube_file, input_file)
+        Reads a cube written by write for the current input file
 
-            # End of if groupby_values != None and groupby_index != -1:
-        else:
-            
-            # Variables
-            total_records = 0 # Integer holding total number of records
+    covers(self, arguments)
+        Checks if a query can be rolled up from the cube
 
-            total_records = len(self.column_data)
+    roll_up(self, table)
+        Adds the cells to the groups of an AggregateTable
 
-            return total_records
+    """
 
 
-    def column_group(self, arguments, groupby_arg):
-        """
-        Finds the data related to the field of interest and based on the arguments passed.
+    def __init__(self):
 
-        Parameters
-        ----------
-        arguments : list
-            A list with all the arguments passed at command line
+        self.header = []
+        self.dimensions = []
+        self.measures = []
+        self.values = []
+        self.codes = []
+        self.counts = array('q')
+        self.stats = []
+        self.where = None
 
-        groupby_arg : str
-            The field the data is going to be organized by
+    def add_table(self, table, column_header):
+        """
+        Fills the cells from the groups of an AggregateTable, its group-by fields are the
+        dimensions and the columns of its numeric aggregates are the measures.
 
-        Exceptions
+        Parameters
         ----------
-        ValueError
-            If a column passed contains values that can not be converted from string to float
-            the message 'Error: <input file>:<line number>: can't compute <column_name> on non-numeric value '<value>'' 
-            will print.
+        table : AggregateTable
+            The accumulators of every group
 
-            If more than 100 of these errors are found in a single column then 
-            the message: 'Error: <input>:more than 100 non-numeric values found in aggreate column '<column_name>''
-            will print and the program will extit.
+        column_header : list
+            A list containing the title of each column
 
         """
-        
+
         # Variables
-        groupby_field = groupby_arg # Setting groupby_field to the arugment passed to groupby
-        temp_values = [] # List to hold all the values from column of interest
-        results_list = [] # List for results
-        argval_list = [] # List for all the argument calls
+        value_codes = [] # List of dictionaries mapping each value of each dimension to its code
+        slots = [] # The location in a group of the accumulators of each measure
 
-        # Finding the index location of the groupby_name parameter
-        groupby_index = self.column_header.index(groupby_field.lower())
+        self.header = list(column_header)
+        self.dimensions = list(table.groupby_index)
+        self.measures = []
+        self.codes = [array('i') for x in self.dimensions]
 
-        # Fill temp_values with values from column of interest
-        for i in range(len(self.column_data)):
-            temp_values.append(self.column_data[i][groupby_index])
-        
-        # Creating a set of unique values
-        cardinality_check = set(temp_values)
-        if len(cardinality_check) > 20:
+        for i in range(len(self.dimensions)):
 
-            # Checking if cardinality is too high
-            if len(cardinality_check) >= 100:
+            value_codes.append({})
 
-                # Print on standard error
-                print('Error: ' + self.input + ': The field ' + groupby_field + ' has to many unique values.', file = sys.stderr)
+        # Sum, min, max and mean of a column hold the same accumulators, the first one is kept
+        for position in range(len(table.numeric_columns)):
 
-                exit(6)
+            matches = [x[0] for x in table.plan if x[1] in ('sum', 'min', 'max', 'mean') and x[4] == position]
 
-            # Print to standard error
-            print('Error:' + self.input + ': ' + groupby_arg + ' has been capped at 20 distinct values', file = sys.stderr)
+            # Columns only used by var, stddev, median or percentile can not be rolled up
+            if matches:
 
-            self.groupby_capped = True
-            
-        # Creating a set of distinct values
-        groupby_values = [x for x in set(temp_values)]
+                self.measures.append(table.numeric_columns[position][0])
+                slots.append(matches[0])
 
-        # Sort in ascending order
-        groupby_values.sort()
+        self.stats = [[array('d'), array('q'), array('d'), array('d')] for x in self.measures]
 
-        # Call the respective function based on elements in arguments.order
-        for ele in arguments.order:
+        for key, group in table.groups.items():
 
-            if ele[0] == 'max':
-                ele_list = self.column_max(ele[1][0], groupby_values, groupby_index)
+            # A single dimension has its value as the key
+            if len(self.dimensions) == 1:
 
-            elif ele[0] == 'count':
-                ele_list = self.column_count(groupby_values, groupby_index)
+                key = (key,)
 
-            elif ele[0] == 'sum':
-                ele_list = self.column_sum(ele[1][0], groupby_values, groupby_index)
+            elif not self.dimensions:
 
-            elif ele[0] == 'min':
-                ele_list = self.column_min(ele[1][0], groupby_values, groupby_index)
+                key = ()
 
-            elif ele[0] == 'max':
-                ele_list = self.column_max(ele[1][0], groupby_values, groupby_index)
-                
-            elif ele[0] == 'mean':
-                ele_list = self.column_mean(ele[1][0], groupby_values, groupby_index)
+            for i in range(len(self.dimensions)):
 
-            elif ele[0] == 'top':
-                ele_list = self.column_top(ele[1][0], ele[1][1], groupby_values, groupby_index)
+                self.codes[i].append(value_codes[i].setdefault(key[i], len(value_codes[i])))
 
-            # Creating a 2D list
-            argval_list.append(ele_list)
+            self.counts.append(group[0])
 
-            # End of for ele in arguments.order:
-        
-        return argval_list
+            for position in range(len(self.measures)):
+
+                slot = group[slots[position]]
+                stats = self.stats[position]
+
+                stats[0].append(slot[0])
+                stats[1].append(slot[1])
+
+                # A cell without numeric values is stored with zeros and no numeric values
+                stats[2].append(slot[2] if slot[2] is not None else 0.0)
+                stats[3].append(slot[3] if slot[3] is not None else 0.0)
 
+            # End of for key, group in table.groups.items():
 
-    def column_top(self, n, column_name, groupby_values = None, groupby_index = -1):
+        self.values = [list(x) for x in value_codes]
+
+    def write(self, cube_file, input_file):
         """
-        Finds the top n values in descending order
+        Writes the cube to a file, keyed by the size and modification time of the input file.
 
         Parameters
         ----------
-        column_name : str
-            The name of the column of interest
+        cube_file : str
+            The name of the cube file
 
-        n : int
-            The number of items to retrieve
+        input_file : str
+            The name of the input file
 
-        groupby_values : list, optional
-            A list containing the names of interest (default is None)
+        """
 
-        groupby_index : int, optional
-            The location in the column_data of the names of interest (default is -1)
+        # Variables
+        blocks = self.codes + [self.counts] + [x for stats in self.stats for x in stats] # List of the arrays in the order they are written
 
-        Restrictions
-        ------------
-        column_top is capped at 20 unique values.
-        
-        If the column of interest has more than 20 unique values then the error message:
-        'Error: <input>: <column_name> has been capped at 20 distinct values' will print
-        and the output result will only contain 20 items.
-        
+        source = os.stat(input_file)
+
+        metadata = json.dumps({'size': source.st_size, 'mtime': source.st_mtime_ns, 'byteorder': sys.byteorder,
+            'header': self.header, 'dimensions': self.dimensions, 'measures': self.measures,
+            'values': self.values, 'where': self.where, 'cells': len(self.counts)}).encode('utf-8')
+
+        # Writing to a temporary file first so other runs never see a partial cube
+        with open(cube_file + '.tmp', 'wb') as output_file:
+
+            output_file.write(CUBE_MAGIC)
+            output_file.write(len(metadata).to_bytes(8, 'little'))
+            output_file.write(metadata)
+
+            for block in blocks:
+
+                block.tofile(output_file)
+
+        os.replace(cube_file + '.tmp', cube_file)
+
+    def read(self, cube_file, input_file):
         """
+        Reads a cube written by write, returns False if the cube file does not exist or does not
+        match the current size and modification time of the input file.
 
-        # Variables
-        top_list = [] # Holds all the data from the column of interest
-        formatter_list = [] # Formatter list to help format output data
-        distinct_values = [] # Distinct values list to hold final formatted data
-        format_place = ''
-        k_val = int(n)
+        Parameters
+        ----------
+        cube_file : str
+            The name of the cube file
 
-        # Checking if n passed is zero or negative
-        if k_val <= 0:
+        input_file : str
+            The name of the input file
 
-            # Print on standard error
-            print('Error: ' + self.input + ' top k can only take values greater than 0.', file = sys.stderr)
+        """
 
-            exit(6)
+        try:
 
-        # Finding the index location of the column_name parameter
-        column_index = self.column_header.index(column_name.lower())
+            with open(cube_file, 'rb') as cube:
 
-        # Building top_list based on column_name
-        for i in range(len(self.column_data)):
+                # Checking if the file was written by write
+                if cube.read(len(CUBE_MAGIC)) != CUBE_MAGIC:
 
-            top_list.append(self.column_data[i][column_index])
+                    return False
 
-            # End of for i in range(len(self.column_data)):
+                metadata = json.loads(cube.read(int.from_bytes(cube.read(8), 'little')))
 
-        
-        cardinality_check = set(top_list)
+                source = os.stat(input_file)
 
-        # Checking if the cardinality is greater than 20
-        if len(cardinality_check) > 20 and k_val > 20:
+                # Checking if the input file has changed since the cube was written
+                if metadata['size'] != source.st_size or metadata['mtime'] != source.st_mtime_ns or metadata['byteorder'] != sys.byteorder:
 
-            k_val = 20
-            
-            # Print to standard error
-            print('Error:' + self.input + ': ' + column_name + ' has been capped at 20 distinct values', file = sys.stderr)
+                    return False
 
-            self.top_capped = True
-                
-        # Checking if top should run in group-by mode
-        if groupby_values != None and groupby_index != -1:
-            
-            group_list = [] # List for holding all the output formatted values in order of group-by elements
+                self.header = metadata['header']
+                self.dimensions = metadata['dimensions']
+                self.measures = metadata['measures']
+                self.values = metadata['values']
+                self.where = metadata.get('where')
+                self.codes = [array('i') for x in self.dimensions]
+                self.counts = array('q')
+                self.stats = [[array('d'), array('q'), array('d'), array('d')] for x in self.measures]
 
-            for element in groupby_values:
+                for block in self.codes + [self.counts] + [x for stats in self.stats for x in stats]:
 
-                # Variables that need to be reset for each element
-                format_place = '' # String for formatting the values found for each element in groupby_values
-                group_top = [] # List fro holding all the values in the field name passed with top
-                
-                for i in range(len(self.column_data)):
-                    
-                    # Checking if the string at groupby_index is not equal to element string
-                    if self.column_data[i][groupby_index] != element:
+                    block.fromfile(cube, metadata['cells'])
 
-                        continue
+        except (OSError, EOFError, ValueError):
 
-                    else:
+            return False
+
+        return True
+
+    def covers(self, arguments):
+        """
+        Checks if a query can be rolled up from the cube, its group-by fields have to be
+        dimensions, its aggregates count or numeric aggregates of measures and its where the
+        same as the one the cube was built with.
+
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments
 
-                        group_top.append(self.column_data[i][column_index])
+        """
 
-                # Create a list of the unique elements
-                formatter_list = [[x, top_list.count(x)] for x in set(group_top)]
+        if arguments.where != self.where:
 
-                # Storing by descending order
-                formatter_list.sort(key= lambda x: x[1], reverse=True)
+            return False
 
-                # Checking if the list of unique values is less than the k passed
-                if len(formatter_list) < k_val:
+        for field in groupby_fields(arguments):
 
-                    # Formatting and building a the ouput based on the length of the formatter list
-                    for i in range(len(formatter_list)):
+            if field.lower() not in self.header or self.header.index(field.lower()) not in self.dimensions:
 
-                        # Check weither or not to add a comma
-                        if i == len(formatter_list) - 1:
+                return False
 
-                            format_place += (str(formatter_list[i][0]) + ": " + str(formatter_list[i][1]))
+        for ele in arguments.order:
 
-                        else:
-                        
-                            format_place += (str(formatter_list[i][0]) + ": " + str(formatter_list[i][1]) + ',')
+            if ele[0] == 'count':
 
+                continue
 
-                        # End of for i in range(k_val):
+            if ele[0] not in ('sum', 'min', 'max', 'mean') or ele[1][0].lower() not in self.header:
 
-                    group_list.append([format_place])
-                else:
+                return False
 
-                    # Formatting and building the output list based on k 
-                    for i in range(k_val):
+            if self.header.index(ele[1][0].lower()) not in self.measures:
 
-                        # Check weither or not to add a comma
-                        if i == k_val - 1:
+                return False
 
-                            format_place += (str(formatter_list[i][0]) + ": " + str(formatter_list[i][1]))
+        return True
 
-                        else:
-                        
-                            format_place += (str(formatter_list[i][0]) + ": " + str(formatter_list[i][1]) + ',')
+    def roll_up(self, table):
+        """
+        Adds the cells to the groups of an AggregateTable built for a query covered by the cube.
 
+        Parameters
+        ----------
+        table : AggregateTable
+            The accumulators of every group, grouped by some of the dimensions
 
-                        # End of for i in range(k_val):
+        """
 
-                    group_list.append([format_place])
+        # Variables
+        positions = [self.dimensions.index(x) for x in table.groupby_index] # The dimension of each group-by field
+        measures = [self.measures.index(x[2]) if x[1] != 'count' else -1 for x in table.plan] # The measure of each aggregate
 
-            distinct_values = group_list
+        for cell in range(len(self.counts)):
 
-        else:
+            key = tuple(self.values[x][self.codes[x][cell]] for x in positions)
 
-            # Create a list of the unique elements
-            formatter_list = [[x, top_list.count(x)] for x in set(top_list)]
+            # A single group-by field has its value as the key
+            if len(key) == 1:
 
-            # Storing by descending order
-            formatter_list.sort(key= lambda x: x[1], reverse=True)
+                key = key[0]
 
-            for i in range(k_val):
+            elif not key:
 
-                if i == k_val - 1:
+                key = None
 
-                    format_place += (str(formatter_list[i][0]) + ": " + str(formatter_list[i][1]))
+            group = table.group_for(key)
 
-                else:
-                    
-                    format_place += (str(formatter_list[i][0]) + ": " + str(formatter_list[i][1]) + ',')
+            group[0] += self.counts[cell]
 
+            for step, position in zip(table.plan, measures):
 
-                # End of for i in range(k_val):
+                if position == -1:
 
-            # Append a list format_place to distince_values
-            distinct_values.append([format_place])
+                    continue
 
-        # Checking if results are capped
-        if self.top_capped:
+                slot = group[step[0]]
+                stats = self.stats[position]
 
-            return distinct_values[:20]
+                # Checking if the cell has no numeric values
+                if stats[1][cell] == 0:
 
-        else:
+                    continue
+
+                slot[0] = slot[0] + stats[0][cell]
+                slot[1] += stats[1][cell]
+
+                if slot[2] is None or stats[2][cell] < slot[2]:
+                    slot[2] = stats[2][cell]
+
+                if slot[3] is None or stats[3][cell] > slot[3]:
+                    slot[3] = stats[3][cell]
 
-            return distinct_values
+            # End of for cell in range(len(self.counts)):
 
 
 if __name__ == '__main__':
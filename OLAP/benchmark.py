@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+# Libraries
+import argparse
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+def main():
+    '''
+        Generates a synthetic CSV file from the command line settings, times OLAP.py on each aggregate
+        and prints one JSON object per aggregate with the rows per second and peak memory of the run.
+    '''
+
+    # Initializing a parsing object for command line input
+    argument_parser = argparse.ArgumentParser(description='Benchmark for OLAP.py, times each aggregate over a deterministic synthetic CSV file')
+
+    # Adding arguments to parser object
+    argument_parser.add_argument('--rows', type=int, default=100000) # Number of data rows to generate
+    argument_parser.add_argument('--columns', type=int, default=8) # Number of columns other than the group-by column
+    argument_parser.add_argument('--numeric', type=float, default=0.5) # Fraction of the columns that are numeric
+    argument_parser.add_argument('--groups', type=int, default=20) # Number of distinct values of the group-by column
+    argument_parser.add_argument('--categories', type=int, default=10) # Number of distinct values of the categorical columns
+    argument_parser.add_argument('--noise', type=float, default=0.0) # Fraction of numeric values replaced by non-numeric ones
+    argument_parser.add_argument('--seed', type=int, default=265) # Seed of the generator
+    argument_parser.add_argument('--repeat', type=int, default=3) # Number of runs of each aggregate, the fastest is reported
+    argument_parser.add_argument('--csv', nargs='?') # Optional file to keep the generated data in
+    argument_parser.add_argument('--olap-args', default='') # Optional extra arguments passed to every OLAP.py run, such as --stream
+
+    # Parse the arguments
+    arguments = argument_parser.parse_args()
+
+    # Variables
+    olap_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'OLAP.py') # The script being measured
+    commit = current_commit(olap_script) # The git commit being measured
+
+    # Checking if the settings can generate the aggregated columns
+    if arguments.columns < 2 or not 0 < arguments.numeric < 1:
+
+        # Print on standard error
+        print('Error: benchmark needs at least one numeric and one categorical column.', file = sys.stderr)
+
+        exit(6)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+
+        csv_name = arguments.csv
+
+        if csv_name is None:
+
+            csv_name = os.path.join(temp_dir, 'benchmark.csv')
+
+        header = generate_csv(csv_name, arguments)
+
+        # The first numeric and categorical columns are the ones aggregated
+        numeric_field = [x for x in header if x.startswith('num')][0]
+        category_field = [x for x in header if x.startswith('cat')][0]
+
+        cases = [
+            ['sum', ['--sum', numeric_field]],
+            ['min', ['--min', numeric_field]],
+            ['max', ['--max', numeric_field]],
+            ['mean', ['--mean', numeric_field]],
+            ['count', ['--count']],
+            ['top', ['--top', '5', category_field]],
+            ['group-by', ['--group-by', 'grp', '--sum', numeric_field, '--mean', numeric_field, '--min', numeric_field, '--max', numeric_field, '--count']]
+        ]
+
+        for case in cases:
+
+            command = [sys.executable, olap_script, '--input', csv_name] + case[1] + arguments.olap_args.split()
+
+            result = time_command(command, arguments.repeat)
+
+            result.update({
+                'aggregate': case[0],
+                'commit': commit,
+                'rows': arguments.rows,
+                'columns': len(header),
+                'groups': arguments.groups,
+                'noise': arguments.noise,
+                'seed': arguments.seed,
+                'olap_args': arguments.olap_args,
+                'rows_per_sec': arguments.rows / result['seconds'] if result['seconds'] > 0 else None
+            })
+
+            print(json.dumps(result, sort_keys=True))
+
+            # End of for case in cases:
+
+
+def generate_csv(csv_name, arguments):
+    """
+        Writes the synthetic CSV file and returns its header.
+
+        The first column 'grp' holds arguments.groups distinct values, followed by the numeric
+        columns 'num<i>' and the categorical columns 'cat<i>'. The same arguments always write
+        the same file.
+
+        Parameters
+        ----------
+        csv_name : str
+            The name of the file to write
+
+        arguments : Namespace
+            The parsed command line arguments
+
+    """
+
+    # Variables
+    generator = random.Random(arguments.seed) # Random generator seeded for repeatable files
+    numeric_count = max(1, min(arguments.columns - 1, round(arguments.columns * arguments.numeric))) # Number of numeric columns
+    category_count = arguments.columns - numeric_count # Number of categorical columns
+
+    header = ['grp'] + ['num' + str(i) for i in range(numeric_count)] + ['cat' + str(i) for i in range(category_count)]
+
+    with open(csv_name, 'w', newline='') as csv_file:
+
+        writer = csv.writer(csv_file)
+
+        writer.writerow(header)
+
+        for i in range(arguments.rows):
+
+            row = ['g' + str(generator.randrange(arguments.groups))]
+
+            for j in range(numeric_count):
+
+                # Checking if the value should be non-numeric noise
+                if generator.random() < arguments.noise:
+
+                    row.append('n/a')
+
+                else:
+
+                    row.append(str(round(generator.uniform(-1000, 1000), 3)))
+
+            for j in range(category_count):
+
+                row.append('c' + str(generator.randrange(arguments.categories)))
+
+            writer.writerow(row)
+
+            # End of for i in range(arguments.rows):
+
+    return header
+
+
+def time_command(command, repeat):
+    """
+        Runs a command repeat times and returns the fastest wall clock time, the largest peak
+        resident memory in kilobytes and the exit status of the last run.
+
+        Parameters
+        ----------
+        command : list
+            The command and its arguments
+
+        repeat : int
+            The number of runs
+
+    """
+
+    # Variables
+    best_time = None # Float for the fastest run
+    peak_rss = 0 # Integer for the largest peak memory
+    status = 0 # Integer for the exit status
+
+    for i in range(max(1, repeat)):
+
+        start = time.perf_counter()
+
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        # Waiting with wait4 to get the resource usage of this process alone
+        pid, wait_status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(wait_status)
+
+        elapsed = time.perf_counter() - start
+
+        if best_time is None or elapsed < best_time:
+
+            best_time = elapsed
+
+        # ru_maxrss is in kilobytes on Linux
+        peak_rss = max(peak_rss, usage.ru_maxrss)
+        status = process.returncode
+
+    return {'seconds': best_time, 'peak_rss_kb': peak_rss, 'exit_status': status}
+
+
+def current_commit(olap_script):
+    """
+        Gets the git commit of the directory holding OLAP.py, None if it can not be found.
+
+        Parameters
+        ----------
+        olap_script : str
+            The path to OLAP.py
+
+    """
+
+    try:
+
+        output = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(olap_script), capture_output=True, text=True)
+
+    except OSError:
+
+        return None
+
+    if output.returncode != 0:
+
+        return None
+
+    return output.stdout.strip()
+
+
+if __name__ == '__main__':
+
+    # Run main function
+    main()
+
+    # End of if __name__ == '__main__':
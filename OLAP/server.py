@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+
+# Libraries
+import argparse
+import asyncio
+import io
+import json
+import os
+import shlex
+import socket
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+
+import OLAP
+
+# Number of compiled queries the server keeps, the least recently used are dropped first
+QUERY_LIMIT = 128
+
+# Number of input files whose tables the server keeps, the least recently used are dropped first
+TABLE_LIMIT = 8
+
+# Number of --where selections kept with each table, the least recently used are dropped first
+SELECTION_LIMIT = 8
+
+def main():
+    '''
+        Starts the query server on a Unix socket or a localhost TCP port, or with --query sends one
+        query to a running server and prints its output and errors the same as OLAP.py.
+    '''
+
+    # Initializing a parsing object for command line input
+    argument_parser = argparse.ArgumentParser(description='Query server for OLAP.py, keeps the tables of the input files in memory between queries')
+
+    # Adding arguments to parser object
+    argument_parser.add_argument('--socket', nargs='?') # Optional argument for the path of the Unix socket
+    argument_parser.add_argument('--port', type=int) # Optional argument for the localhost TCP port
+    argument_parser.add_argument('--query', nargs='?') # Optional argument for sending one query, the OLAP.py arguments in one string
+
+    # Parse the arguments
+    arguments = argument_parser.parse_args()
+
+    # Checking if exactly one address was passed
+    if (arguments.socket is None) == (arguments.port is None):
+
+        # Print on standard error
+        print('Error: pass either --socket <path> or --port <number>.', file = sys.stderr)
+
+        exit(6)
+
+    if arguments.query is not None:
+
+        exit(send_query(arguments, arguments.query))
+
+    server = QueryServer()
+
+    try:
+
+        asyncio.run(server.serve(arguments))
+
+    except KeyboardInterrupt:
+
+        pass
+
+
+def send_query(arguments, query):
+    """
+        Sends a query to a running server, prints the output on standard output and the errors on
+        standard error, and returns the exit status of the query.
+
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments holding the address of the server
+
+        query : str
+            The OLAP.py arguments of the query
+
+    """
+
+    if arguments.socket is not None:
+
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(arguments.socket)
+
+    else:
+
+        connection = socket.create_connection(('127.0.0.1', arguments.port))
+
+    with connection:
+
+        connection.sendall((query.replace('\n', ' ') + '\n').encode('utf-8'))
+
+        response = json.loads(connection.makefile('rb').readline())
+
+    sys.stdout.write(response['output'])
+    sys.stderr.write(response['errors'])
+
+    return response['status']
+
+
+class QueryServer:
+    """
+    A class used to answer OLAP.py queries from tables kept in memory
+
+    Each request is one line holding the OLAP.py command line arguments of a query, such as
+    --input sales.csv --sum revenue --group-by region. Each response is one line holding a JSON
+    object with the CSV text OLAP.py outputs, the errors it prints and its exit status. A table
+    is read the first time its file is queried and read again when the size or modification
+    time of the file changes. The rows passing each --where are selected once and kept with
+    the table, so at most TABLE_LIMIT tables with SELECTION_LIMIT selections each are in memory.
+
+    Queries are answered one at a time by a single worker thread, as the output of a query is
+    captured by redirecting standard output of the whole process. While a query runs the event
+    loop keeps accepting connections and reading their requests, which wait for the worker.
+
+    ...
+
+    Attributes
+    ----------
+    parser : ArgumentParser
+        The parser of the OLAP.py arguments
+
+    tables : OrderedDict
+        A dictionary mapping the path of each input file to [modification time, size, DataBlock,
+        selections], holding at most TABLE_LIMIT tables in the order they were last used.
+        selections is an OrderedDict mapping each where to the DataBlock of the rows passing it,
+        holding at most SELECTION_LIMIT selections in the order they were last used
+
+    queries : OrderedDict
+        A dictionary mapping the aggregates and group-by field of each query to its Query, holding
+        at most QUERY_LIMIT queries in the order they were last used
+
+    executor : ThreadPoolExecutor
+        The single worker thread running the queries
+
+    Methods
+    -------
+    serve(self, arguments)
+        Listens on the address passed until the program is stopped
+
+    handle(self, reader, writer)
+        Answers the queries of one connection
+
+    answer(self, request)
+        Runs a query and returns its response
+
+    run_query(self, argv)
+        Runs a query, printing its output and errors
+
+    query_table(self, arguments)
+        Outputs the results of a query computed over its table
+
+    table(self, input_file, use_cache)
+        Gets the DataBlock of an input file, reading it if it is new or has changed
+
+    selection(self, arguments, data)
+        Gets the DataBlock of the rows of a table passing where
+
+    """
+
+
+    def __init__(self):
+
+        self.parser = OLAP.build_parser()
+        self.tables = OrderedDict()
+        self.queries = OrderedDict()
+        self.executor = ThreadPoolExecutor(max_workers = 1)
+
+    async def serve(self, arguments):
+        """
+        Listens on the address passed until the program is stopped.
+
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed command line arguments holding the address
+
+        """
+
+        if arguments.socket is not None:
+
+            # Removing the socket file left by a previous server
+            if os.path.exists(arguments.socket):
+
+                os.remove(arguments.socket)
+
+            server = await asyncio.start_unix_server(self.handle, path = arguments.socket)
+
+        else:
+
+            server = await asyncio.start_server(self.handle, '127.0.0.1', arguments.port)
+
+        async with server:
+
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        """
+        Answers the queries of one connection, one line each, until it is closed. Each query is
+        run by the worker thread so the event loop is not blocked while it runs.
+
+        Parameters
+        ----------
+        reader : StreamReader
+            The requests of the connection
+
+        writer : StreamWriter
+            The responses of the connection
+
+        """
+
+        try:
+
+            loop = asyncio.get_running_loop()
+
+            request = await reader.readline()
+
+            while request:
+
+                response = await loop.run_in_executor(self.executor, self.answer, request.decode('utf-8'))
+
+                writer.write((json.dumps(response) + '\n').encode('utf-8'))
+
+                await writer.drain()
+
+                request = await reader.readline()
+
+        except (ConnectionError, UnicodeDecodeError):
+
+            pass
+
+        writer.close()
+
+    def answer(self, request):
+        """
+        Runs a query and returns its response, a dictionary with the output, the errors and the
+        exit status.
+
+        Parameters
+        ----------
+        request : str
+            The OLAP.py arguments of the query
+
+        """
+
+        # Variables
+        output = io.StringIO() # The output of the query
+        errors = io.StringIO() # The errors of the query
+        status = 0 # Integer for the exit status of the query
+
+        with redirect_stdout(output), redirect_stderr(errors):
+
+            try:
+
+                self.run_query(shlex.split(request))
+
+            except SystemExit as error:
+
+                # Errors end OLAP.py with exit, which only ends this query
+                status = error.code if isinstance(error.code, int) else int(error.code is not None)
+
+            except Exception as error:
+
+                # Any other error only ends this query, the server keeps running
+                print('Error: ' + str(error), file = sys.stderr)
+
+                status = 1
+
+        return {'output': output.getvalue(), 'errors': errors.getvalue(), 'status': status}
+
+    def run_query(self, argv):
+        """
+        Runs a query over the table of its input file, printing its output and errors the same
+        as OLAP.py. --stream and --jobs have no effect as the table is already in memory, and
+        --checkpoint, --build-cube and --cube are rejected as they read or write files of their own.
+
+        Parameters
+        ----------
+        argv : list
+            The OLAP.py arguments of the query
+
+        """
+
+        arguments = self.parser.parse_args(argv)
+
+        OLAP.check_arguments(arguments)
+
+        # Checking if the query uses an option the server does not support
+        for option, value in (('--checkpoint', arguments.checkpoint), ('--build-cube', arguments.build_cube), ('--cube', arguments.cube)):
+
+            if value is not None:
+
+                # Print on standard error
+                print('Error: ' + option + ' can not be used with the query server.', file = sys.stderr)
+
+                exit(6)
+
+        # Checking if the results should be read from or saved to the result cache
+        if arguments.result_cache is not None:
+
+            OLAP.cached_results(arguments, self.query_table)
+
+        else:
+
+            self.query_table(arguments)
+
+    def query_table(self, arguments):
+        """
+        Outputs the results of a query computed over the table of its input file.
+
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed OLAP.py arguments of the query
+
+        """
+
+        data = self.table(arguments.input, arguments.cache)
+
+        OLAP.check_fields(arguments, data)
+
+        # The rows passing where are selected once, so the query itself has no where
+        if arguments.where is not None:
+
+            data = self.selection(arguments, data)
+
+        # The query of the same aggregates is reused, keeping the plan compiled for the table
+        key = json.dumps([arguments.order, arguments.groupby, OLAP.approx_size(arguments), arguments.max_groups, arguments.group_cap])
+
+        if key in self.queries:
+
+            self.queries.move_to_end(key)
+
+        else:
+
+            self.queries[key] = OLAP.Query([[x[0]] + x[1] for x in arguments.order], arguments.groupby[0] if arguments.groupby != -1 else None, OLAP.approx_size(arguments), arguments.max_groups, arguments.group_cap)
+
+            # Dropping the least recently used query
+            if len(self.queries) > QUERY_LIMIT:
+
+                self.queries.popitem(last = False)
+
+        OLAP.write_output(*self.queries[key].run(data))
+
+    def table(self, input_file, use_cache):
+        """
+        Gets the DataBlock of an input file, reading it if it is new or if its size or
+        modification time changed since it was read.
+
+        Parameters
+        ----------
+        input_file : str
+            The name of the input file
+
+        use_cache : boolean
+            Read the columns from the binary cache of the file, see OLAP.load_block
+
+        """
+
+        path = os.path.abspath(input_file)
+        source = os.stat(path)
+
+        entry = self.tables.get(path)
+
+        if entry is None or entry[0] != source.st_mtime_ns or entry[1] != source.st_size:
+
+            entry = [source.st_mtime_ns, source.st_size, OLAP.load_block(input_file, use_cache), OrderedDict()]
+
+            self.tables[path] = entry
+
+            # Dropping the least recently used table with its selections
+            if len(self.tables) > TABLE_LIMIT:
+
+                self.tables.popitem(last = False)
+
+        self.tables.move_to_end(path)
+
+        return entry[2]
+
+    def selection(self, arguments, data):
+        """
+        Gets the DataBlock of the rows of a table passing where, selecting them the first time
+        where is run on the table. The selections are dropped with the table when its file changes.
+
+        Parameters
+        ----------
+        arguments : Namespace
+            The parsed OLAP.py arguments of the query
+
+        data : DataBlock
+            The DataBlock of the input file, as returned by table
+
+        """
+
+        selections = self.tables[os.path.abspath(arguments.input)][3]
+
+        if arguments.where in selections:
+
+            selections.move_to_end(arguments.where)
+
+        else:
+
+            selections[arguments.where] = data.select(OLAP.where_predicate(arguments, data))
+
+            # Dropping the least recently used selection
+            if len(selections) > SELECTION_LIMIT:
+
+                selections.popitem(last = False)
+
+        return selections[arguments.where]
+
+
+if __name__ == '__main__':
+
+    # Run main function
+    main()
+
+    # End of if __name__ == '__main__':
@@ -0,0 +1,101 @@
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+from collections import Counter
+
+import OLAP
+
+
+def parse_top(text):
+    """
+        Gets the (value, frequency) pairs of top's output.
+
+    """
+
+    return [(x.split(': ')[0], int(x.split(': ')[1])) for x in text.split(',')]
+
+
+class ApproxTest(unittest.TestCase):
+
+    def write_csv(self, rows):
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        input_file = os.path.join(directory.name, 'a.csv')
+
+        with open(input_file, 'w') as csv_file:
+
+            csv_file.write('g,v,u\n' + ''.join(','.join(x) + '\n' for x in rows))
+
+        return input_file
+
+    def test_small_input_agrees_with_exact(self):
+
+        generator = random.Random(7)
+        input_file = self.write_csv([('g' + str(generator.randrange(3)), 'v' + str(generator.randrange(8)), 'u' + str(generator.randrange(200))) for i in range(2000)])
+        data = OLAP.load_block(input_file)
+
+        # Fewer values than approx keeps, so top is exact and distinct only misses values sharing a register
+        for groupby in (None, 'g'):
+
+            exact = OLAP.Query([['top', 5, 'v'], ['distinct', 'u']], groupby).run(data)[1]
+            approx = OLAP.Query([['top', 5, 'v'], ['distinct', 'u']], groupby, 10).run(data)[1]
+
+            self.assertEqual([x[:-1] for x in approx], [x[:-1] for x in exact])
+
+            for approx_row, exact_row in zip(approx, exact):
+
+                self.assertLessEqual(abs(int(approx_row[-1]) - int(exact_row[-1])), 2)
+
+        exact = subprocess.run([sys.executable, OLAP.__file__, '--input', input_file, '--top', '5', 'v', '--group-by', 'g'], capture_output=True, text=True).stdout
+
+        for mode in ([], ['--stream'], ['--jobs', '3']):
+
+            self.assertEqual(subprocess.run([sys.executable, OLAP.__file__, '--input', input_file, '--top', '5', 'v', '--group-by', 'g', '--approx', '--approx-size', '10'] + mode, capture_output=True, text=True).stdout, exact)
+
+    def test_large_input_within_bounds(self):
+
+        generator = random.Random(1)
+        rows = [('g0', 'v' + str(int(generator.paretovariate(1.2))), 'u' + str(generator.randrange(40000))) for i in range(60000)]
+        input_file = self.write_csv(rows)
+        frequencies = Counter(x[1] for x in rows)
+        distinct = len(set(x[2] for x in rows))
+        size = 10
+
+        # Misra-Gries undercounts each value by at most rows / (size + 1)
+        bound = len(rows) / (size + 1)
+
+        results = [OLAP.Query([['top', size, 'v'], ['distinct', 'u']], None, size).run(OLAP.load_block(input_file))[1][0]]
+
+        for mode in (['--stream'], ['--jobs', '3']):
+
+            output = subprocess.run([sys.executable, OLAP.__file__, '--input', input_file, '--top', str(size), 'v', '--distinct', 'u', '--approx', '--approx-size', str(size)] + mode, capture_output=True, text=True).stdout
+            results.append([output.splitlines()[1].rsplit(',', 1)[0].strip('"'), int(output.splitlines()[1].rsplit(',', 1)[1])])
+
+        for top, estimate in results:
+
+            top = parse_top(top)
+
+            for value, frequency in top:
+
+                self.assertLessEqual(frequency, frequencies[value])
+                self.assertGreaterEqual(frequency, frequencies[value] - bound)
+
+            # Every value more frequent than the bound is kept
+            for value, frequency in frequencies.items():
+
+                if frequency > bound:
+
+                    self.assertIn(value, [x[0] for x in top])
+
+            # Four standard errors of the HyperLogLog sketch
+            self.assertLess(abs(estimate - distinct), 4 * 0.0081 * distinct)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+OLAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'OLAP.py')
+
+
+def run_olap(*arguments):
+    """
+        Runs OLAP.py with the arguments passed and returns the exit status and standard output.
+
+    """
+
+    result = subprocess.run([sys.executable, OLAP] + list(arguments), capture_output=True, text=True)
+
+    return result.returncode, result.stdout
+
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self):
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        # A wide file so a query of one field would be read by the byte scanner
+        self.input = os.path.join(directory.name, 'wide.csv')
+
+        with open(self.input, 'w') as csv_file:
+
+            csv_file.write('g,x1,x2,x3,x4,x5,x6,x7\n')
+
+            for i in range(50):
+
+                csv_file.write(','.join([str(i % 3)] + [str(i * j) for j in range(1, 8)]) + '\n')
+
+    def test_different_queries_share_cache(self):
+
+        for fields in (['--sum', 'x1'], ['--sum', 'x3', '--max', 'x7'], ['--mean', 'x5', '--group-by', 'g']):
+
+            expected = run_olap('--input', self.input, *fields)
+
+            self.assertEqual(expected[0], 0)
+            self.assertEqual(run_olap('--input', self.input, '--cache', *fields), expected)
+            self.assertTrue(os.path.exists(self.input + '.olapcache'))
+
+    def test_corrupt_cache_is_rewritten(self):
+
+        expected = run_olap('--input', self.input, '--sum', 'x2')
+
+        for contents in (b'', b'OLAPCOL1', b'garbage'):
+
+            with open(self.input + '.olapcache', 'wb') as cache_file:
+
+                cache_file.write(contents)
+
+            self.assertEqual(run_olap('--input', self.input, '--cache', '--sum', 'x2'), expected)
+            self.assertEqual(run_olap('--input', self.input, '--cache', '--sum', 'x2'), expected)
+
+    def test_modes_without_stored_rows_are_rejected(self):
+
+        checkpoint = self.input + '.checkpoint'
+        modes = (['--stream'], ['--jobs', '2'], ['--checkpoint', checkpoint])
+
+        for mode in modes:
+
+            self.assertEqual(run_olap('--input', self.input, '--cache', '--sum', 'x1', *mode), (6, ''))
+
+        # Also when the cache file of an earlier run would be read
+        run_olap('--input', self.input, '--cache', '--sum', 'x1')
+
+        for mode in modes:
+
+            self.assertEqual(run_olap('--input', self.input, '--cache', '--sum', 'x1', *mode), (6, ''))
+
+        self.assertFalse(os.path.exists(checkpoint))
+
+
+if __name__ == '__main__':
+
+    unittest.main()
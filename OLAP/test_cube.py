@@ -0,0 +1,140 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import OLAP
+
+
+def parse(*arguments):
+    """
+        Parses the arguments passed the same as the command line of OLAP.py.
+
+    """
+
+    arguments = OLAP.build_parser().parse_args(list(arguments))
+
+    OLAP.check_arguments(arguments)
+
+    return arguments
+
+
+def run_olap(*arguments):
+    """
+        Runs a query of OLAP.py and returns its standard output.
+
+    """
+
+    output = io.StringIO()
+
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+
+        OLAP.answer_query(parse(*arguments))
+
+    return output.getvalue()
+
+
+class CubeTest(unittest.TestCase):
+
+    def setUp(self):
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.input = os.path.join(directory.name, 'sales.csv')
+        self.cube = os.path.join(directory.name, 'sales.cube')
+
+        # Whole numbers so the sums rolled up are exactly the sums of the rows
+        with open(self.input, 'w') as csv_file:
+
+            csv_file.write('region,product,amount,qty\n')
+
+            for i in range(200):
+
+                csv_file.write('r' + str(i % 3) + ',p' + str(i % 5) + ',' + str(i * 7 % 101) + ',' + (str(i % 9) if i % 17 else 'n/a') + '\n')
+
+        run_olap('--input', self.input, '--sum', 'amount', '--max', 'qty', '--group-by', 'region,product', '--build-cube', self.cube)
+
+    def rolled_up(self, *arguments):
+        """
+            Checks if the query is answered from the cube, with the same output as reading the input file.
+
+        """
+
+        output = io.StringIO()
+
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+
+            used = OLAP.cube_results(parse('--input', self.input, '--cube', self.cube, *arguments))
+
+        if used:
+
+            self.assertEqual(output.getvalue(), run_olap('--input', self.input, *arguments))
+
+        # The output with --cube is the same whether the cube is used or not
+        self.assertEqual(run_olap('--input', self.input, '--cube', self.cube, *arguments), run_olap('--input', self.input, *arguments))
+
+        return used
+
+    def test_roll_up_matches_direct_query(self):
+
+        self.assertTrue(self.rolled_up('--sum', 'amount', '--max', 'qty', '--group-by', 'region,product'))
+        self.assertTrue(self.rolled_up('--count', '--mean', 'amount', '--min', 'qty', '--group-by', 'region'))
+        self.assertTrue(self.rolled_up('--sum', 'qty', '--group-by', 'product'))
+        self.assertTrue(self.rolled_up('--sum', 'amount', '--count'))
+
+    def test_uncovered_query_reads_input(self):
+
+        self.assertFalse(self.rolled_up('--sum', 'amount', '--group-by', 'qty'))
+        self.assertFalse(self.rolled_up('--top', '2', 'product', '--group-by', 'region'))
+        self.assertFalse(self.rolled_up('--var', 'amount'))
+        self.assertFalse(self.rolled_up('--sum', 'amount', '--where', 'qty > 3'))
+
+    def test_stale_cube_is_refused(self):
+
+        with open(self.input, 'a') as csv_file:
+
+            csv_file.write('r0,p0,1000,1\n')
+
+        self.assertFalse(self.rolled_up('--sum', 'amount', '--group-by', 'region'))
+
+        # A cube built again from the changed file is used
+        run_olap('--input', self.input, '--sum', 'amount', '--group-by', 'region', '--build-cube', self.cube)
+
+        self.assertTrue(self.rolled_up('--sum', 'amount', '--group-by', 'region'))
+
+    def test_cube_of_other_file_is_refused(self):
+
+        other = os.path.join(os.path.dirname(self.input), 'other.csv')
+
+        with open(other, 'w') as csv_file:
+
+            csv_file.write('region,amount\nr0,1\n')
+
+        output = io.StringIO()
+
+        with contextlib.redirect_stdout(output):
+
+            self.assertFalse(OLAP.cube_results(parse('--input', other, '--cube', self.cube, '--sum', 'amount')))
+
+        self.assertEqual(output.getvalue(), '')
+
+    def test_truncated_cube_is_refused(self):
+
+        with open(self.cube, 'rb') as cube_file:
+
+            contents = cube_file.read()
+
+        for size in (0, 4, len(OLAP.CUBE_MAGIC) + 4, len(contents) // 2, len(contents) - 1):
+
+            with open(self.cube, 'wb') as cube_file:
+
+                cube_file.write(contents[:size])
+
+            self.assertFalse(self.rolled_up('--sum', 'amount', '--group-by', 'region'))
+
+
+if __name__ == '__main__':
+
+    unittest.main()
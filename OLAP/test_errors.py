@@ -0,0 +1,64 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import OLAP
+
+
+class NonNumericTest(unittest.TestCase):
+
+    def write_csv(self, rows):
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        input_file = os.path.join(directory.name, 'n.csv')
+
+        with open(input_file, 'w') as csv_file:
+
+            csv_file.write('g,v\n' + ''.join(x + '\n' for x in rows))
+
+        return input_file
+
+    def run_query(self, query, data):
+
+        errors = io.StringIO()
+
+        with contextlib.redirect_stderr(errors):
+
+            results = query.run(data)
+
+        return results, errors.getvalue()
+
+    def test_each_run_reports_each_column_once(self):
+
+        input_file = self.write_csv(['a,1', 'a,x', 'b,2'])
+        data = OLAP.load_block(input_file)
+        query = OLAP.Query([['sum', 'v'], ['mean', 'v']], 'g')
+
+        expected = 'Error: ' + input_file + ':2: can\'t compute v on non-numeric value \'x\'\n'
+
+        # The same block queried again, as the server does, reports its values again
+        for run in range(2):
+
+            self.assertEqual(self.run_query(query, data), ((['g', 'sum_v', 'mean_v'], [['a', '1.0', '1.0'], ['b', '2.0', '2.0']]), expected))
+
+    def test_more_than_100_values_exit(self):
+
+        data = OLAP.load_block(self.write_csv(['a,x'] * 101 + ['a,1']))
+
+        with self.assertRaises(SystemExit) as raised:
+
+            self.run_query(OLAP.Query([['sum', 'v']]), data)
+
+        self.assertEqual(raised.exception.code, 7)
+
+        # Up to 100 values are reported without stopping
+        self.assertEqual(self.run_query(OLAP.Query([['sum', 'v']]), OLAP.load_block(self.write_csv(['a,x'] * 100 + ['a,1'])))[0], (['sum_v'], [[1.0]]))
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,116 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import OLAP
+
+
+def run_olap(*arguments):
+    """
+        Runs OLAP.py with the arguments passed and returns the exit status, standard output and standard error.
+
+    """
+
+    result = subprocess.run([sys.executable, OLAP.__file__] + list(arguments), capture_output=True, text=True)
+
+    return result.returncode, result.stdout, result.stderr
+
+
+class GroupByTest(unittest.TestCase):
+
+    def setUp(self):
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.directory = directory.name
+        self.input = os.path.join(self.directory, 'sales.csv')
+
+        # 3 regions by 4 products, so 12 groups of two fields
+        self.rows = [('r' + str(i % 3), 'p' + str(i % 4), i) for i in range(120)]
+
+        with open(self.input, 'w') as csv_file:
+
+            csv_file.write('region,product,amount\n' + ''.join(a + ',' + b + ',' + str(c) + '\n' for a, b, c in self.rows))
+
+        self.modes = ([], ['--stream'], ['--jobs', '3'], ['--checkpoint', os.path.join(self.directory, 'sales.checkpoint')])
+
+    def expected_rows(self, first, second):
+        """
+            Gets the output lines of --sum amount --count grouped by the fields at first and second of each row.
+
+        """
+
+        groups = {}
+
+        for row in self.rows:
+
+            groups.setdefault((row[first], row[second]), []).append(row[2])
+
+        return [a + ',' + b + ',' + str(float(sum(x))) + ',' + str(len(x)) for (a, b), x in sorted(groups.items())]
+
+    def test_two_fields(self):
+
+        for mode in self.modes:
+
+            self.assertEqual(run_olap('--input', self.input, '--sum', 'amount', '--count', '--group-by', 'region,product', *mode),
+                             (0, '\n'.join(['region,product,sum_amount,count'] + self.expected_rows(0, 1)) + '\n', ''))
+
+        # The group columns follow the order of the fields
+        status, output, errors = run_olap('--input', self.input, '--sum', 'amount', '--count', '--group-by', 'product,region')
+
+        self.assertEqual(output.splitlines(), ['product,region,sum_amount,count'] + self.expected_rows(1, 0))
+
+        header, rows = OLAP.Query([['sum', 'amount'], ['count']], 'region,product').run(OLAP.load_block(self.input))
+
+        self.assertEqual(header, ['region', 'product', 'sum_amount', 'count'])
+        self.assertEqual([','.join(x) for x in rows], self.expected_rows(0, 1))
+
+    def test_group_cap(self):
+
+        expected = self.expected_rows(0, 1)
+
+        for mode in self.modes:
+
+            status, output, errors = run_olap('--input', self.input, '--sum', 'amount', '--count', '--group-by', 'region,product', '--group-cap', '5', *mode)
+
+            # Every group is still output, with the _OTHER row after the first 5
+            self.assertEqual(status, 0)
+            self.assertEqual(output.splitlines(), ['region,product,sum_amount,count'] + expected[:5] + ['_OTHER,,,'] + expected[5:])
+            self.assertEqual(errors, 'Error:' + self.input + ': region,product has been capped at 5 distinct values\n')
+
+        # 12 groups are not capped at 12
+        self.assertEqual(run_olap('--input', self.input, '--count', '--group-by', 'region,product', '--group-cap', '12')[2], '')
+
+    def test_too_many_groups(self):
+
+        for mode in self.modes:
+
+            self.assertEqual(run_olap('--input', self.input, '--sum', 'amount', '--group-by', 'region,product', '--max-groups', '12', *mode),
+                             (6, '', 'Error: ' + self.input + ': The field region,product has to many unique values.\n'))
+
+            self.assertEqual(run_olap('--input', self.input, '--sum', 'amount', '--group-by', 'region,product', '--max-groups', '13', '--group-cap', '20', *mode)[0], 0)
+
+        errors = io.StringIO()
+
+        with contextlib.redirect_stderr(errors), self.assertRaises(SystemExit) as raised:
+
+            OLAP.Query([['sum', 'amount']], 'region,product', max_groups=12).run(OLAP.load_block(self.input))
+
+        self.assertEqual(raised.exception.code, 6)
+        self.assertIn('has to many unique values', errors.getvalue())
+
+    def test_max_groups_without_group_by(self):
+
+        for mode in self.modes:
+
+            self.assertEqual(run_olap('--input', self.input, '--sum', 'amount', '--max-groups', '1', *mode), (0, 'sum_amount\n7140.0\n', ''))
+
+
+if __name__ == '__main__':
+
+    unittest.main()
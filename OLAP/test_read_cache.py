@@ -0,0 +1,97 @@
+import mmap
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import OLAP
+
+MMAP = mmap.mmap
+
+
+class ReadCacheTest(unittest.TestCase):
+
+    def setUp(self):
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.input = os.path.join(directory.name, 'c.csv')
+        self.cache = self.input + '.olapcache'
+
+        with open(self.input, 'w') as csv_file:
+
+            csv_file.write('g,v\n' + ''.join('g' + str(i % 4) + ',' + str(i) + '\n' for i in range(100)))
+
+        # Reading with the cache writes the cache file
+        OLAP.load_block(self.input, True)
+
+        with open(self.cache, 'rb') as cache_file:
+
+            self.contents = cache_file.read()
+
+    def read_cache(self):
+        """
+            Reads the cache file into a new DataBlock, returning the result and the maps opened.
+
+        """
+
+        maps = []
+
+        def recording(*arguments, **keywords):
+
+            maps.append(MMAP(*arguments, **keywords))
+
+            return maps[-1]
+
+        data = OLAP.DataBlock(self.input)
+
+        with mock.patch.object(OLAP.mmap, 'mmap', recording):
+
+            loaded = data.read_cache(self.cache)
+
+        return loaded, data, maps
+
+    def write_cache(self, contents):
+
+        with open(self.cache, 'wb') as cache_file:
+
+            cache_file.write(contents)
+
+    def test_map_is_kept_when_loaded(self):
+
+        loaded, data, maps = self.read_cache()
+
+        self.assertTrue(loaded)
+        self.assertIs(data.cache_map, maps[0])
+        self.assertFalse(maps[0].closed)
+        self.assertEqual(data.row_count, 100)
+
+    def test_map_is_closed_when_refused(self):
+
+        # Another magic, or cut short inside the metadata, the arrays or the valid flags of v, the last array
+        for contents in (b'garbage', self.contents[:len(OLAP.CACHE_MAGIC) + 12], self.contents[:len(self.contents) // 2], self.contents[:-50]):
+
+            self.write_cache(contents)
+
+            loaded, data, maps = self.read_cache()
+
+            self.assertFalse(loaded)
+            self.assertIsNone(data.cache_map)
+            self.assertEqual([x.closed for x in maps], [True])
+
+        # A cache of an older version of the input file
+        self.write_cache(self.contents)
+
+        source = os.stat(self.input)
+        os.utime(self.input, ns = (source.st_atime_ns, source.st_mtime_ns + 10 ** 9))
+
+        loaded, data, maps = self.read_cache()
+
+        self.assertFalse(loaded)
+        self.assertEqual([x.closed for x in maps], [True])
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,155 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import OLAP
+
+
+def run_olap(*arguments):
+    """
+        Runs OLAP.py with the arguments passed and returns the exit status, standard output and standard error.
+
+    """
+
+    result = subprocess.run([sys.executable, OLAP.__file__] + list(arguments), capture_output=True, text=True)
+
+    return result.returncode, result.stdout, result.stderr
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.directory = directory.name
+        self.cache = os.path.join(self.directory, 'results')
+        self.input = os.path.join(self.directory, 'r.csv')
+
+        with open(self.input, 'w') as csv_file:
+
+            csv_file.write('g,v\na,1\na,x\nb,2\n')
+
+    def entries(self):
+
+        return sorted(x for x in os.listdir(self.cache) if x.endswith('.json'))
+
+    def test_hit_reuses_output(self):
+
+        expected = run_olap('--input', self.input, '--sum', 'v', '--group-by', 'g')
+
+        self.assertEqual(run_olap('--input', self.input, '--sum', 'v', '--group-by', 'g', '--result-cache', self.cache), expected)
+        self.assertEqual(len(self.entries()), 1)
+
+        entry_file = os.path.join(self.cache, self.entries()[0])
+
+        with open(entry_file, encoding='utf-8') as input_file:
+
+            entry = json.load(input_file)
+
+        # The non-numeric value is saved with the output, written by csv with \r\n line ends
+        self.assertEqual([entry['output'].replace('\r\n', '\n'), entry['errors']], list(expected[1:]))
+
+        # Changing the saved output shows the second run reads it instead of the input
+        with open(entry_file, 'w', encoding='utf-8') as output_file:
+
+            json.dump({'output': 'saved\n', 'errors': 'saved error\n'}, output_file)
+
+        self.assertEqual(run_olap('--input', self.input, '--sum', 'v', '--group-by', 'g', '--result-cache', self.cache), (0, 'saved\n', 'saved error\n'))
+
+        # A different query is not answered from the same entry
+        self.assertEqual(run_olap('--input', self.input, '--count', '--group-by', 'g', '--result-cache', self.cache)[1], 'g,count\na,2\nb,1\n')
+        self.assertEqual(len(self.entries()), 2)
+
+    def test_changed_input_changes_key(self):
+
+        arguments = OLAP.build_parser().parse_args(['--input', self.input, '--sum', 'v'])
+        OLAP.check_arguments(arguments)
+
+        cache = OLAP.ResultCache(self.cache, 1024)
+        keys = [cache.key(arguments)]
+
+        self.assertEqual(cache.key(arguments), keys[0])
+
+        # The same size with a later modification time
+        source = os.stat(self.input)
+        os.utime(self.input, ns = (source.st_atime_ns, source.st_mtime_ns + 10 ** 9))
+
+        keys.append(cache.key(arguments))
+
+        # The same modification time with another size
+        with open(self.input, 'a') as csv_file:
+
+            csv_file.write('b,3\n')
+
+        os.utime(self.input, ns = (source.st_atime_ns, source.st_mtime_ns + 10 ** 9))
+
+        keys.append(cache.key(arguments))
+
+        self.assertEqual(len(set(keys)), 3)
+
+        # Appended rows are output instead of the saved results of the older file
+        with open(self.input, 'w') as csv_file:
+
+            csv_file.write('g,v\na,1\n')
+
+        self.assertEqual(run_olap('--input', self.input, '--sum', 'v', '--result-cache', self.cache)[1], 'sum_v\n1.0\n')
+
+        with open(self.input, 'a') as csv_file:
+
+            csv_file.write('b,2\n')
+
+        self.assertEqual(run_olap('--input', self.input, '--sum', 'v', '--result-cache', self.cache)[1], 'sum_v\n3.0\n')
+
+    def test_least_recently_used_are_evicted(self):
+
+        entry = {'output': 'x' * 100, 'errors': ''}
+        size = len(json.dumps(entry))
+
+        cache = OLAP.ResultCache(self.cache, 3 * size)
+
+        for number, key in enumerate(['a', 'b', 'c']):
+
+            cache.put(key, entry)
+
+            # Distinct times, oldest first, so the order does not depend on the clock's resolution
+            os.utime(os.path.join(self.cache, key + '.json'), (1000 + number, 1000 + number))
+
+        self.assertEqual(self.entries(), ['a.json', 'b.json', 'c.json'])
+
+        # Reading a marks it as the most recently used
+        self.assertEqual(cache.get('a'), entry)
+
+        cache.put('d', entry)
+
+        self.assertEqual(self.entries(), ['a.json', 'c.json', 'd.json'])
+        self.assertIsNone(cache.get('b'))
+
+        # A larger entry removes as many of the oldest as needed
+        cache.put('e', {'output': 'x' * (2 * size), 'errors': ''})
+
+        self.assertEqual(self.entries(), ['e.json'])
+
+    def test_queries_writing_files_are_run(self):
+
+        expected = run_olap('--input', self.input, '--sum', 'v', '--group-by', 'g', '--result-cache', self.cache)
+
+        cube = os.path.join(self.directory, 'r.cube')
+        checkpoint = os.path.join(self.directory, 'r.checkpoint')
+
+        # The same query is in the result cache, but each still has to write its file
+        for option, written in ((['--build-cube', cube], cube), (['--checkpoint', checkpoint], checkpoint), (['--cache'], self.input + '.olapcache')):
+
+            self.assertEqual(run_olap('--input', self.input, '--sum', 'v', '--group-by', 'g', '--result-cache', self.cache, *option), expected)
+            self.assertTrue(os.path.exists(written), written)
+
+        self.assertEqual(len(self.entries()), 1)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
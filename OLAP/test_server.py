@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import OLAP
+import server
+
+
+def run_olap(*arguments):
+    """
+        Runs OLAP.py with the arguments passed and returns the response the server would send.
+
+    """
+
+    result = subprocess.run([sys.executable, OLAP.__file__] + list(arguments), capture_output=True, text=True)
+
+    return {'output': result.stdout, 'errors': result.stderr, 'status': result.returncode}
+
+
+class QueryServerTest(unittest.TestCase):
+
+    def setUp(self):
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.directory = directory.name
+        self.input = self.write_csv('sales.csv', 'region,amount\nwest,5\neast,x\nwest,50\neast,7\nnorth,3\n')
+
+        self.server = server.QueryServer()
+        self.addCleanup(self.server.executor.shutdown)
+
+    def write_csv(self, name, contents):
+
+        input_file = os.path.join(self.directory, name)
+
+        with open(input_file, 'w') as csv_file:
+
+            csv_file.write(contents)
+
+        return input_file
+
+    def answer(self, *arguments):
+
+        # The csv module ends lines with \r\n, which the command line output has as \n
+        response = self.server.answer(' '.join(arguments))
+        response['output'] = response['output'].replace('\r\n', '\n')
+
+        return response
+
+    def test_where_is_selected_once(self):
+
+        for where in ('amount > 4', 'region != north'):
+
+            arguments = ['--input', self.input, '--sum', 'amount', '--group-by', 'region', '--where', '"' + where + '"']
+            expected = run_olap(*[x.strip('"') for x in arguments])
+
+            self.assertEqual(self.answer(*arguments), expected)
+
+            selected = self.server.tables[os.path.abspath(self.input)][3][where]
+
+            # The same query and another query with the same where reuse the selected rows
+            self.assertEqual(self.answer(*arguments), expected)
+            self.assertEqual(self.answer('--input', self.input, '--count', '--where', '"' + where + '"')['status'], 0)
+            self.assertIs(self.server.tables[os.path.abspath(self.input)][3][where], selected)
+
+        self.assertEqual(list(self.server.tables[os.path.abspath(self.input)][3]), ['amount > 4', 'region != north'])
+
+        # A changed file is read again without the selections of the older rows
+        with open(self.input, 'a') as csv_file:
+
+            csv_file.write('west,100\n')
+
+        self.assertEqual(self.answer('--input', self.input, '--sum', 'amount', '--where', '"amount > 4"')['output'], 'sum_amount\n162.0\n')
+        self.assertEqual(list(self.server.tables[os.path.abspath(self.input)][3]), ['amount > 4'])
+
+    def test_selections_are_bounded(self):
+
+        for i in range(server.SELECTION_LIMIT + 2):
+
+            self.answer('--input', self.input, '--count', '--where', '"amount > ' + str(i) + '"')
+
+        self.assertEqual(list(self.server.tables[os.path.abspath(self.input)][3]), ['amount > ' + str(i) for i in range(2, server.SELECTION_LIMIT + 2)])
+
+    def test_tables_are_bounded(self):
+
+        files = [self.write_csv('f' + str(i) + '.csv', 'v\n' + str(i) + '\n') for i in range(server.TABLE_LIMIT + 2)]
+
+        for input_file in files:
+
+            self.assertEqual(self.answer('--input', input_file, '--sum', 'v')['status'], 0)
+
+        # Querying the oldest table kept marks it as the most recently used
+        data = self.server.table(files[2], False)
+
+        self.answer('--input', files[0], '--sum', 'v')
+
+        self.assertEqual(list(self.server.tables), [os.path.abspath(x) for x in files[4:] + [files[2], files[0]]])
+        self.assertIs(self.server.table(files[2], False), data)
+
+    def test_connections_are_answered(self):
+
+        socket_path = os.path.join(self.directory, 'olap.sock')
+
+        async def send(query):
+
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+
+            writer.write((query + '\n').encode('utf-8'))
+
+            response = json.loads(await reader.readline())
+
+            writer.close()
+
+            return response
+
+        async def run():
+
+            serving = asyncio.ensure_future(self.server.serve(argparse.Namespace(socket = socket_path)))
+
+            while not os.path.exists(socket_path):
+
+                await asyncio.sleep(0.01)
+
+            # Several connections at once are answered one query at a time by the worker thread
+            responses = await asyncio.gather(*[send('--input ' + self.input + ' --count --where "amount > ' + str(i) + '"') for i in range(4)])
+
+            serving.cancel()
+
+            return responses
+
+        self.assertEqual([x['output'].replace('\r\n', '\n') for x in asyncio.run(run())], ['count\n4\n'] * 3 + ['count\n3\n'])
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+OLAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'OLAP.py')
+
+
+def run_olap(*arguments):
+    """
+        Runs OLAP.py with the arguments passed and returns the exit status, standard output and standard error.
+
+    """
+
+    result = subprocess.run([sys.executable, OLAP] + list(arguments), capture_output=True, text=True)
+
+    return result.returncode, result.stdout, result.stderr
+
+
+class StreamTest(unittest.TestCase):
+
+    def setUp(self):
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.input = os.path.join(directory.name, 's.csv')
+
+        with open(self.input, 'w') as csv_file:
+
+            csv_file.write('a,b,c\n1,2,3\n4,5\n6\n')
+
+    def test_short_rows_are_padded(self):
+
+        for fields in (['--sum', 'c'], ['--sum', 'c', '--group-by', 'b'], ['--sum', 'a', '--group-by', 'c', '--where', 'c = 3']):
+
+            expected = run_olap('--input', self.input, *fields)
+
+            self.assertEqual(expected[0], 0)
+
+            for mode in (['--stream'], ['--jobs', '2']):
+
+                self.assertEqual(run_olap('--input', self.input, *fields, *mode), expected)
+
+    def test_short_row_values_are_empty(self):
+
+        self.assertEqual(run_olap('--input', self.input, '--sum', 'c', '--stream')[1], 'sum_c\n3.0\n')
+
+
+if __name__ == '__main__':
+
+    unittest.main()
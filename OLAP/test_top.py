@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import OLAP
+
+
+class TopTest(unittest.TestCase):
+
+    def setUp(self):
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.input = os.path.join(directory.name, 'tie.csv')
+
+        with open(self.input, 'w') as csv_file:
+
+            csv_file.write('g,v\nx,b\ny,a\nx,b\ny,a\nx,c\nx,d\ny,d\n')
+
+    def run_top(self):
+
+        return OLAP.Query([['top', 3, 'v']], 'g').run(OLAP.load_block(self.input))[1]
+
+    def test_ties_keep_first_seen_order(self):
+
+        self.assertEqual(OLAP.Query([['top', 3, 'v']]).run(OLAP.load_block(self.input)), (['top_v'], [['b: 2,a: 2,d: 2']]))
+        self.assertEqual(self.run_top(), [['x', 'b: 2,c: 1,d: 1'], ['y', 'a: 2,d: 1']])
+
+    def test_ties_without_numpy(self):
+
+        expected = self.run_top()
+
+        with mock.patch('OLAP.numpy', None):
+
+            self.assertEqual(self.run_top(), expected)
+
+    def test_ties_while_streaming(self):
+
+        expected = subprocess.run([sys.executable, OLAP.__file__, '--input', self.input, '--top', '3', 'v', '--group-by', 'g'], capture_output=True, text=True).stdout
+
+        for mode in (['--stream'], ['--jobs', '3']):
+
+            self.assertEqual(subprocess.run([sys.executable, OLAP.__file__, '--input', self.input, '--top', '3', 'v', '--group-by', 'g'] + mode, capture_output=True, text=True).stdout, expected)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
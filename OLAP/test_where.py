@@ -0,0 +1,97 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import OLAP
+
+HEADER = ['region', 'amount', 'name']
+
+
+def passing(text, rows):
+    """
+        Gets the rows passing the comparisons of text.
+
+    """
+
+    predicate = OLAP.Predicate(text, HEADER)
+
+    return [x for x in rows if predicate.test(x)]
+
+
+class PredicateTest(unittest.TestCase):
+
+    def test_and_binds_tighter_than_or(self):
+
+        rows = [['west', '5', 'a'], ['east', '50', 'b'], ['west', '50', 'c'], ['north', '50', 'd']]
+
+        self.assertEqual(passing('region = east or region = west and amount > 10', rows), rows[1:3])
+        self.assertEqual(passing('(region = east or region = west) and amount > 10', rows), rows[1:3])
+        self.assertEqual(passing('region = west and (amount < 10 or name = c)', rows), [rows[0], rows[2]])
+        self.assertEqual(passing('region = west AND amount > 10 OR name = d', rows), rows[2:])
+
+    def test_quoted_values(self):
+
+        rows = [['new york', '1', 'a'], ['new', '2', 'b'], ['and', '3', 'c'], ['7', '4', 'd']]
+
+        self.assertEqual(passing('region = "new york"', rows), rows[:1])
+        self.assertEqual(passing("region = 'new york' or region = \"and\"", rows), [rows[0], rows[2]])
+
+        # A quoted number is compared as a string
+        self.assertEqual(passing('region = "7.0"', rows), [])
+        self.assertEqual(passing('region = 7.0', rows), rows[3:])
+
+    def test_number_and_string_comparisons(self):
+
+        rows = [['a', '10', 'x'], ['b', '9', 'y'], ['c', 'n/a', 'z'], ['d', '', 'w']]
+
+        # Numbers are compared as numbers, not as strings where '9' > '10'
+        self.assertEqual(passing('amount > 9.5', rows), rows[:1])
+        self.assertEqual(passing('amount <= 9', rows), rows[1:2])
+
+        # Non-numeric values only pass !=
+        self.assertEqual(passing('amount = 10 or amount = 9', rows), rows[:2])
+        self.assertEqual(passing('amount != 10', rows), rows[1:])
+        self.assertEqual(passing('amount = n/a', rows), rows[2:3])
+
+        # Short rows compare as empty values
+        self.assertEqual(passing('name = ""', [['a']]), [['a']])
+        self.assertEqual(passing('amount > 0', [['a']]), [])
+
+    def test_field_names_ignore_case(self):
+
+        self.assertEqual(passing('AMOUNT >= 2', [['a', '1', 'x'], ['b', '2', 'y']]), [['b', '2', 'y']])
+        self.assertEqual(OLAP.Predicate('name = a and region = b', HEADER).columns, [0, 2])
+
+    def test_malformed_expressions(self):
+
+        for text in ('amount >', 'amount 5', '(amount > 5', 'amount > 5)', 'amount > 5 and', 'amount > 5 or or name = a',
+                     'price > 5', 'name < abc', 'amount ! 5', 'amount > 5 name = a', '"amount > 5'):
+
+            with self.assertRaises(ValueError, msg=text):
+
+                OLAP.Predicate(text, HEADER)
+
+    def test_malformed_expression_exits(self):
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        input_file = os.path.join(directory.name, 'w.csv')
+
+        with open(input_file, 'w') as csv_file:
+
+            csv_file.write('region,amount\nwest,1\n')
+
+        for mode in ([], ['--stream'], ['--jobs', '2']):
+
+            result = subprocess.run([sys.executable, OLAP.__file__, '--input', input_file, '--sum', 'amount', '--where', 'amount > 5 and'] + mode, capture_output=True, text=True)
+
+            self.assertEqual((result.returncode, result.stdout), (6, ''))
+            self.assertIn('--where expected <field> <operator> <value>', result.stderr)
+
+
+if __name__ == '__main__':
+
+    unittest.main()